@@ -5,8 +5,9 @@ from django.utils import timezone
 from .models import (
     Aluno, Turma, Disciplina, Professor, Aviso, 
     Nota, Frequencia, Matricula, Curso, Evento, HorarioAula, Documento,
-    Material, Sala
+    Material, Sala, Tarefa
 )
+from .contadores import obter_contadores
 
 
 class NexusAdminSite(AdminSite):
@@ -16,12 +17,10 @@ class NexusAdminSite(AdminSite):
     
     def index(self, request, extra_context=None):
         extra_context = extra_context or {}
-        extra_context['total_alunos'] = Aluno.objects.count()
-        extra_context['total_professores'] = Professor.objects.count()
-        extra_context['total_turmas'] = Turma.objects.count()
-        extra_context['total_cursos'] = Curso.objects.count()
-        extra_context['total_eventos'] = Evento.objects.count()
-        extra_context['documentos_pendentes'] = Documento.objects.filter(status='PENDENTE').count()
+        extra_context.update(obter_contadores(
+            'total_alunos', 'total_professores', 'total_turmas', 'total_cursos',
+            'total_eventos', 'documentos_pendentes',
+        ))
         extra_context['ultimos_alunos'] = Aluno.objects.select_related('turma_atual').order_by('-id')[:5]
         extra_context['ultimos_avisos'] = Aviso.objects.order_by('-data_criacao')[:5]
         extra_context['proximos_eventos'] = Evento.objects.filter(data__gte=timezone.now().date()).order_by('data')[:5]
@@ -259,3 +258,13 @@ class SalaAdmin(admin.ModelAdmin):
     search_fields = ['nome', 'bloco']
     list_per_page = 25
     ordering = ['nome']
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'status', 'progresso', 'tentativas', 'criado_por', 'data_criacao', 'data_conclusao']
+    list_filter = ['tipo', 'status', 'data_criacao']
+    search_fields = ['tipo', 'criado_por__username']
+    list_per_page = 25
+    ordering = ['-data_criacao']
+    readonly_fields = ['data_criacao', 'data_inicio', 'data_conclusao']
@@ -0,0 +1,95 @@
+import re
+
+from django.core.cache import cache
+
+from .busca import filtrar_por_busca
+from .models import Aluno, Professor, Turma
+from .texto import normalizar
+
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+TEMPO_CACHE_TURMAS = 60 * 60 * 24
+CHAVE_TURMAS = 'autocompletar:turmas'
+
+
+def _palavras(texto):
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def _sugestoes_alunos(termo, limite):
+    # Só nome e matrícula, que são o que a sugestão mostra; os primeiros
+    # `limite` em ordem de nome, e não os primeiros que o índice encontrar.
+    alunos = (
+        filtrar_por_busca(Aluno.objects.only('id', 'nome', 'matricula'), termo, colunas=['nome', 'matricula'])
+        .order_by('nome', 'id')[:limite]
+    )
+    return [{'id': aluno.id, 'rotulo': aluno.nome, 'detalhe': aluno.matricula} for aluno in alunos]
+
+
+def _sugestoes_professores(termo, limite):
+    # Como nos alunos: só o nome, e os primeiros `limite` em ordem de nome.
+    professores = (
+        filtrar_por_busca(Professor.objects.only('id', 'nome', 'especialidade'), termo, colunas=['nome'])
+        .order_by('nome', 'id')[:limite]
+    )
+    return [
+        {'id': professor.id, 'rotulo': professor.nome, 'detalhe': professor.especialidade or ''}
+        for professor in professores
+    ]
+
+
+def _indice_turmas():
+    """
+    Turmas ordenadas por código, com o texto normalizado de cada uma. São
+    poucas linhas, então ficam inteiras no cache e a busca é feita em memória;
+    os signals de Turma e Curso limpam o cache.
+    """
+    indice = cache.get(CHAVE_TURMAS)
+    if indice is None:
+        indice = [
+            (_palavras(f'{codigo} {curso}'), turma_id, codigo, curso)
+            for turma_id, codigo, curso in Turma.objects.order_by('codigo').values_list('id', 'codigo', 'curso__nome')
+        ]
+        cache.set(CHAVE_TURMAS, indice, TEMPO_CACHE_TURMAS)
+    return indice
+
+
+def invalidar_turmas():
+    cache.delete(CHAVE_TURMAS)
+
+
+def _sugestoes_turmas(termo, limite):
+    prefixos = _palavras(termo)
+    sugestoes = []
+    for palavras, turma_id, codigo, curso in _indice_turmas():
+        if all(any(palavra.startswith(prefixo) for palavra in palavras) for prefixo in prefixos):
+            sugestoes.append({'id': turma_id, 'rotulo': codigo, 'detalhe': curso})
+            if len(sugestoes) == limite:
+                break
+    return sugestoes
+
+
+FONTES_SUGESTOES = {
+    'alunos': _sugestoes_alunos,
+    'professores': _sugestoes_professores,
+    'turmas': _sugestoes_turmas,
+}
+
+
+def limite_sugestoes(valor):
+    """Limite pedido na requisição, entre 1 e LIMITE_MAXIMO."""
+    if not (valor or '').isdigit() or int(valor) < 1:
+        return LIMITE_PADRAO
+    return min(int(valor), LIMITE_MAXIMO)
+
+
+def sugestoes(tipo, termo, limite=LIMITE_PADRAO):
+    """
+    Até `limite` sugestões [{'id', 'rotulo', 'detalhe'}] de alunos (nome,
+    matrícula), professores (nome) ou turmas cujas palavras começam com as do termo,
+    sem diferenciar acentos.
+    """
+    if not _palavras(termo):
+        return []
+    return FONTES_SUGESTOES[tipo](termo, limite)
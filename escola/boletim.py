@@ -0,0 +1,139 @@
+from django.db.models import Count, Sum
+
+from .models import Aluno, Disciplina, Nota
+from .perfis import disciplinas_do_aluno
+
+
+MEDIA_APROVACAO = 6
+
+
+def situacao_por_media(media, possui_notas=True):
+    """Retorna a situação do aluno na disciplina a partir da média."""
+    if not possui_notas:
+        return "Cursando"
+    return "Aprovado" if media >= MEDIA_APROVACAO else "Recuperação"
+
+
+def montar_boletim(aluno):
+    """
+    Monta o boletim do aluno: notas, média e situação de cada disciplina do curso.
+
+    Usa no máximo duas consultas (disciplinas do curso e todas as notas do aluno),
+    independente do número de disciplinas, e agrupa as notas em memória.
+    """
+    if not aluno.turma_atual_id:
+        return []
+
+    disciplinas = disciplinas_do_aluno(aluno)
+
+    # Filtrar pelos ids já carregados (e não pelo join com o curso) deixa o
+    # banco partir das matrículas do aluno em vez de varrer as notas de cada
+    # disciplina da escola.
+    notas_por_disciplina = {}
+    notas = Nota.objects.filter(
+        matricula__aluno=aluno,
+        disciplina_id__in=[disciplina_id for disciplina_id, _ in disciplinas]
+    ).order_by('id').values_list('disciplina_id', 'valor')
+    for disciplina_id, valor in notas:
+        notas_por_disciplina.setdefault(disciplina_id, []).append(float(valor))
+
+    boletim = []
+    for disciplina_id, nome in disciplinas:
+        lista_notas = notas_por_disciplina.get(disciplina_id, [])
+        media = sum(lista_notas) / len(lista_notas) if lista_notas else 0
+        boletim.append({
+            'disciplina_id': disciplina_id,
+            'disciplina': nome,
+            'notas': lista_notas,
+            'media': round(media, 1),
+            'status': situacao_por_media(media, bool(lista_notas)),
+        })
+    return boletim
+
+
+def montar_boletins(alunos):
+    """
+    Boletins de vários alunos de uma vez, para a geração em lote.
+
+    `alunos` é um queryset de Aluno (os alunos de uma turma ou de um curso).
+    Usa três consultas no total: os alunos, as disciplinas dos cursos e as
+    médias de todos eles, agrupadas por (aluno, disciplina) no banco.
+    Retorna uma lista de dicionários 'nome', 'matricula', 'turma' e
+    'linhas' (disciplina, media, status, como em montar_boletim), só com
+    dados simples, que podem ser enviados a outros processos.
+    """
+    lista = list(
+        alunos.filter(turma_atual__isnull=False)
+        .order_by('turma_atual__codigo', 'nome', 'id')
+        .values('id', 'nome', 'matricula', 'turma_atual__codigo', 'turma_atual__curso_id')
+    )
+
+    disciplinas_por_curso = {}
+    for disciplina_id, nome, curso_id in Disciplina.objects.filter(
+        curso_id__in={aluno['turma_atual__curso_id'] for aluno in lista}
+    ).order_by('id').values_list('id', 'nome', 'curso_id'):
+        disciplinas_por_curso.setdefault(curso_id, []).append((disciplina_id, nome))
+
+    medias = {
+        (linha['matricula__aluno_id'], linha['disciplina_id']): (linha['soma'], linha['total'])
+        for linha in Nota.objects.filter(matricula__aluno__in=alunos.values('id'))
+        .values('matricula__aluno_id', 'disciplina_id')
+        .annotate(soma=Sum('valor'), total=Count('id'))
+        .order_by()
+    }
+
+    boletins = []
+    for aluno in lista:
+        linhas = []
+        for disciplina_id, nome in disciplinas_por_curso.get(aluno['turma_atual__curso_id'], []):
+            soma, total = medias.get((aluno['id'], disciplina_id), (0, 0))
+            media = float(soma) / total if total else 0
+            linhas.append({
+                'disciplina': nome,
+                'media': round(media, 1),
+                'status': situacao_por_media(media, bool(total)),
+            })
+        boletins.append({
+            'nome': aluno['nome'],
+            'matricula': aluno['matricula'],
+            'turma': aluno['turma_atual__codigo'],
+            'linhas': linhas,
+        })
+    return boletins
+
+
+def montar_diario_notas(turma, disciplina):
+    """
+    Monta a grade de notas da turma na disciplina: uma linha por aluno e uma
+    coluna por tipo de avaliação, além da média.
+
+    Usa duas consultas (alunos da turma e notas da disciplina) e faz o pivô em
+    memória. Para alunos com mais de uma matrícula na turma vale a mais antiga.
+    Retorna um dicionário com 'tipos' (colunas, em ordem alfabética) e
+    'alunos' (objetos Aluno com os atributos notas_por_tipo, notas_disciplina
+    e media).
+    """
+    alunos = list(Aluno.objects.filter(turma_atual=turma).order_by('nome'))
+
+    matricula_do_aluno = {}
+    notas_por_aluno = {}
+    tipos = set()
+    notas = Nota.objects.filter(
+        matricula__turma=turma,
+        matricula__aluno__turma_atual=turma,
+        disciplina=disciplina
+    ).order_by('matricula_id', 'id').values_list('matricula__aluno_id', 'matricula_id', 'tipo_avaliacao', 'valor')
+    for aluno_id, matricula_id, tipo, valor in notas:
+        if matricula_do_aluno.setdefault(aluno_id, matricula_id) != matricula_id:
+            continue
+        notas_por_aluno.setdefault(aluno_id, {})[tipo] = float(valor)
+        tipos.add(tipo)
+
+    tipos = sorted(tipos)
+    for aluno in alunos:
+        notas_aluno = notas_por_aluno.get(aluno.id, {})
+        aluno.notas_disciplina = notas_aluno
+        aluno.notas_por_tipo = [notas_aluno.get(tipo) for tipo in tipos]
+        aluno.media = sum(notas_aluno.values()) / len(notas_aluno) if notas_aluno else 0
+
+    return {'tipos': tipos, 'alunos': alunos}
@@ -0,0 +1,165 @@
+"""
+Busca textual em alunos, professores, avisos e materiais.
+
+No PostgreSQL a busca usa índices GIN sobre to_tsvector('simple',
+nexus_unaccent(...)); no SQLite, tabelas FTS5 mantidas por triggers. Os dois
+são criados na migração 0013_busca_textual e ignoram acentos e caixa: "joao"
+encontra "João". Cada palavra digitada é tratada como prefixo e todas
+precisam aparecer. Em outros bancos a busca cai para icontains nos mesmos
+campos, sem índice e sem ordem de relevância.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Aluno, Aviso, Material, Professor
+
+
+# Campos indexados de cada modelo. As expressões do PostgreSQL precisam ser
+# idênticas às dos índices da migração 0013_busca_textual para que o banco os use;
+# 'campos' são as mesmas colunas, usadas com icontains nos demais bancos.
+INDICES = {
+    Aluno: {
+        'tabela_fts': 'escola_aluno_busca',
+        'campos': ['nome', 'matricula', 'email', 'cpf'],
+        'documento_pg': (
+            "to_tsvector('simple', nexus_unaccent("
+            "coalesce(nome, '') || ' ' || coalesce(matricula, '') || ' ' || coalesce(email, '') || ' ' || "
+            "coalesce(cpf, '') || ' ' || replace(replace(coalesce(cpf, ''), '.', ''), '-', '')))"
+        ),
+    },
+    Professor: {
+        'tabela_fts': 'escola_professor_busca',
+        'campos': ['nome', 'email', 'especialidade'],
+        'documento_pg': (
+            "to_tsvector('simple', nexus_unaccent("
+            "coalesce(nome, '') || ' ' || coalesce(email, '') || ' ' || coalesce(especialidade, '')))"
+        ),
+    },
+    Aviso: {
+        'tabela_fts': 'escola_aviso_busca',
+        'campos': ['titulo', 'conteudo'],
+        'documento_pg': (
+            "to_tsvector('simple', nexus_unaccent(coalesce(titulo, '') || ' ' || coalesce(conteudo, '')))"
+        ),
+    },
+    Material: {
+        'tabela_fts': 'escola_material_busca',
+        'campos': ['titulo', 'descricao'],
+        'documento_pg': (
+            "to_tsvector('simple', nexus_unaccent(coalesce(titulo, '') || ' ' || coalesce(descricao, '')))"
+        ),
+    },
+}
+
+LIMITE_RESULTADOS = 20
+
+
+def _palavras(termo):
+    return re.findall(r'\w+', termo or '')
+
+
+def _consulta_fts5(palavras, colunas=None):
+    # Entre aspas cada palavra é um termo literal; o * faz a busca por prefixo.
+    consulta = ' AND '.join(f'"{palavra}"*' for palavra in palavras)
+    if colunas:
+        # Filtro de colunas do FTS5: as palavras só valem nessas colunas.
+        consulta = f'{{{" ".join(colunas)}}} : ({consulta})'
+    return consulta
+
+
+def _consulta_postgres(palavras):
+    return ' & '.join(f'{palavra}:*' for palavra in palavras)
+
+
+def _indexado():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _filtro_icontains(modelo, palavras, colunas=None):
+    """Cada palavra precisa aparecer em algum dos campos indexados (ou das colunas pedidas)."""
+    filtro = Q()
+    for palavra in palavras:
+        alternativas = Q()
+        for campo in colunas or INDICES[modelo]['campos']:
+            alternativas |= Q(**{f'{campo}__icontains': palavra})
+        filtro &= alternativas
+    return filtro
+
+
+def _sql_busca(modelo, palavras, ranqueada=False, colunas=None):
+    """
+    SQL (e parâmetros) que seleciona os ids que casam com as palavras, no
+    PostgreSQL ou no SQLite (veja _indexado). Com ranqueada, em ordem de
+    relevância e com um LIMIT %s. Com colunas (uma parte de
+    INDICES[modelo]['campos']), as palavras só valem nessas colunas.
+    """
+    indice = INDICES[modelo]
+    if connection.vendor == 'postgresql':
+        tabela = modelo._meta.db_table
+        condicao = f"{indice['documento_pg']} @@ to_tsquery('simple', nexus_unaccent(%s))"
+        consulta = _consulta_postgres(palavras)
+        if colunas:
+            # O índice GIN seleciona os candidatos; a segunda condição confere só as colunas pedidas.
+            documento = " || ' ' || ".join(f"coalesce({coluna}, '')" for coluna in colunas)
+            condicao += (
+                f" AND to_tsvector('simple', nexus_unaccent({documento}))"
+                " @@ to_tsquery('simple', nexus_unaccent(%s))"
+            )
+        sql = f'SELECT id FROM {tabela} WHERE {condicao}'
+        if ranqueada:
+            sql += (
+                f" ORDER BY ts_rank({indice['documento_pg']}, to_tsquery('simple', nexus_unaccent(%s))) DESC, id"
+                ' LIMIT %s'
+            )
+        return sql, [consulta] * (1 + bool(colunas) + ranqueada)
+
+    tabela = indice['tabela_fts']
+    sql = f'SELECT rowid FROM {tabela} WHERE {tabela} MATCH %s'
+    if ranqueada:
+        sql += ' ORDER BY rank, rowid LIMIT %s'
+    return sql, [_consulta_fts5(palavras, colunas)]
+
+
+def filtrar_por_busca(queryset, termo, colunas=None):
+    """
+    Restringe o queryset aos registros que casam com o termo, sem mudar a
+    ordenação (as listagens paginadas continuam ordenadas por nome). Termo
+    sem palavras não filtra nada. Com colunas, só essas colunas do índice
+    são consideradas. Para filtrar por relação, use como subconsulta:
+    documentos.filter(aluno__in=filtrar_por_busca(Aluno.objects.values('id'), termo)).
+    """
+    palavras = _palavras(termo)
+    if not palavras:
+        return queryset
+    if not _indexado():
+        return queryset.filter(_filtro_icontains(queryset.model, palavras, colunas))
+    sql, parametros = _sql_busca(queryset.model, palavras, colunas=colunas)
+    return queryset.filter(id__in=RawSQL(sql, parametros))
+
+
+def buscar(modelo, termo, limite=LIMITE_RESULTADOS, queryset=None):
+    """
+    Lista dos registros que casam com o termo, do mais relevante para o
+    menos relevante. O queryset, se informado, restringe e prepara os
+    resultados (select_related, filtros de permissão).
+    """
+    palavras = _palavras(termo)
+    if not palavras:
+        return []
+    queryset = modelo.objects.all() if queryset is None else queryset
+    if not _indexado():
+        return list(queryset.filter(_filtro_icontains(modelo, palavras)).order_by('id')[:limite])
+    sql, parametros = _sql_busca(modelo, palavras, ranqueada=True)
+
+    # Com um queryset restrito, parte dos ids ranqueados pode ficar de fora;
+    # pede-se uma folga para ainda completar o limite na maioria dos casos.
+    folga = limite if queryset.query.where else 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros + [limite + folga])
+        ids = [linha[0] for linha in cursor.fetchall()]
+
+    registros = queryset.in_bulk(ids)
+    return [registros[registro_id] for registro_id in ids if registro_id in registros][:limite]
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.db.models import Count, Max, Q
+
+from .models import Aluno, Evento, Turma
+
+
+CAMPOS_EVENTO = ('id', 'titulo', 'data', 'tipo', 'descricao', 'turma__codigo')
+MAXIMO_DIAS_PERIODO = 366
+
+
+def eventos_do_usuario(papel):
+    """
+    Eventos que o usuário pode ver: secretaria, coordenação e administradores
+    veem todos; professores e alunos veem os eventos gerais e os das suas turmas.
+    """
+    if papel.secretaria or papel.coordenacao:
+        return Evento.objects.all()
+
+    if papel.professor_id is not None:
+        turmas = Turma.objects.filter(professores__id=papel.professor_id).values('id')
+        return Evento.objects.filter(Q(turma__isnull=True) | Q(turma__in=turmas))
+
+    if papel.aluno_id is not None:
+        turma = Aluno.objects.filter(id=papel.aluno_id).values('turma_atual_id')
+        return Evento.objects.filter(Q(turma__isnull=True) | Q(turma__in=turma))
+
+    return Evento.objects.none()
+
+
+def versao_eventos(eventos):
+    """
+    Retorna (etag, ultima_alteracao) do conjunto de eventos com uma única
+    consulta agregada. Inclusões, edições e exclusões mudam a quantidade, o
+    maior id ou a data de atualização, e portanto o ETag.
+    """
+    versao = eventos.order_by().aggregate(
+        total=Count('id'), maior_id=Max('id'), ultima_alteracao=Max('data_atualizacao')
+    )
+    assinatura = f"{versao['total']}:{versao['maior_id']}:{versao['ultima_alteracao']}"
+    return hashlib.md5(assinatura.encode()).hexdigest(), versao['ultima_alteracao']
+
+
+def listar_eventos(eventos):
+    return [
+        {
+            'id': evento['id'],
+            'titulo': evento['titulo'],
+            'data': evento['data'],
+            'tipo': evento['tipo'],
+            'descricao': evento['descricao'],
+            'turma': evento['turma__codigo'],
+        }
+        for evento in eventos.order_by('data', 'id').values(*CAMPOS_EVENTO)
+    ]
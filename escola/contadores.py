@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Aluno, Curso, Documento, Evento, JustificativaFalta, Professor, Turma
+
+
+# Os signals mantêm os contadores em dia; a validade cobre o que os signals
+# não veem (bulk_create, update em lote, outros processos com cache próprio).
+TEMPO_CACHE_CONTADORES = 60 * 10
+
+# nome: (modelo, filtros). Contadores com filtro dependem dos campos do
+# registro e são invalidados em qualquer alteração; os demais só mudam
+# quando um registro é criado ou excluído.
+CONTADORES = {
+    'total_alunos': (Aluno, {}),
+    'total_professores': (Professor, {}),
+    'total_turmas': (Turma, {}),
+    'total_cursos': (Curso, {}),
+    'total_eventos': (Evento, {}),
+    'total_usuarios': (User, {}),
+    'documentos_pendentes': (Documento, {'status': 'PENDENTE'}),
+    'justificativas_pendentes': (JustificativaFalta, {'status': 'PENDENTE'}),
+}
+
+
+def _chave_contador(nome):
+    return f'contadores:{nome}'
+
+
+def obter_contadores(*nomes):
+    """Retorna {nome: total}, contando no banco só os que não estão no cache."""
+    chaves = {_chave_contador(nome): nome for nome in nomes}
+    em_cache = cache.get_many(chaves.keys())
+
+    contadores = {chaves[chave]: total for chave, total in em_cache.items()}
+    faltantes = {}
+    for chave, nome in chaves.items():
+        if nome not in contadores:
+            modelo, filtros = CONTADORES[nome]
+            contadores[nome] = faltantes[chave] = modelo.objects.filter(**filtros).count()
+    if faltantes:
+        cache.set_many(faltantes, TEMPO_CACHE_CONTADORES)
+    return contadores
+
+
+def invalidar_contadores(*nomes):
+    """
+    Remove os contadores do cache (todos, se nenhum nome for passado). A
+    remoção é repetida após o commit para que uma requisição concorrente não
+    deixe no cache um total contado antes da transação terminar.
+    """
+    chaves = [_chave_contador(nome) for nome in nomes or CONTADORES]
+    cache.delete_many(chaves)
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def invalidar_contadores_do_modelo(modelo, alterou_quantidade):
+    nomes = [
+        nome for nome, (modelo_contado, filtros) in CONTADORES.items()
+        if modelo_contado is modelo and (alterou_quantidade or filtros)
+    ]
+    if nomes:
+        invalidar_contadores(*nomes)
@@ -0,0 +1,123 @@
+"""
+Criação de contas de usuário em lote.
+
+O hash de cada senha (PBKDF2 com o custo padrão do Django) ocupa um núcleo
+por algumas centenas de milissegundos; para uma turma inteira de contas os
+hashes são calculados em um pool de processos e os usuários e seus grupos
+são gravados com bulk_create.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from .contadores import invalidar_contadores_do_modelo
+
+
+TAMANHO_LOTE = 1000
+# Abaixo disso iniciar os processos custa mais do que calcular os hashes.
+MINIMO_PARA_POOL = 4
+
+
+def _iniciar_processo():
+    import django
+    django.setup()
+
+
+def iniciar_pool(processos=None):
+    """
+    Pool de processos para gerar_hashes, para quem chama gerar_hashes várias
+    vezes seguidas (a importação, lote a lote) e não quer iniciar processos a
+    cada chamada. Use com `with`, que encerra os processos no fim.
+    """
+    return ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1, initializer=_iniciar_processo)
+
+
+def gerar_hashes(senhas, processos=None, pool=None):
+    """
+    Hashes das senhas, na mesma ordem. Senhas vazias ou None viram senhas
+    inutilizáveis (o usuário não consegue entrar até definir uma). Usa até
+    `processos` processos (padrão: um por núcleo), do `pool` se informado.
+    """
+    senhas = list(senhas)
+    processos = min(processos or os.cpu_count() or 1, len(senhas))
+    if processos < 2 or len(senhas) < MINIMO_PARA_POOL:
+        return [make_password(senha or None) for senha in senhas]
+
+    # Blocos grandes evitam uma troca de mensagens por senha.
+    blocos = max(len(senhas) // (processos * 4), 1)
+    senhas = [senha or None for senha in senhas]
+    if pool is not None:
+        return list(pool.map(make_password, senhas, chunksize=blocos))
+    with iniciar_pool(processos) as pool:
+        return list(pool.map(make_password, senhas, chunksize=blocos))
+
+
+def grupos_por_nome(nomes):
+    """
+    {nome: Group} para os nomes pedidos, sem diferenciar maiúsculas ('secretaria'
+    encontra o grupo 'Secretaria'). Grupos inexistentes são criados.
+    """
+    existentes = {grupo.name.lower(): grupo for grupo in Group.objects.all()}
+    grupos = {}
+    for nome in set(nomes):
+        grupo = existentes.get(nome.lower())
+        if grupo is None:
+            grupo = existentes[nome.lower()] = Group.objects.create(name=nome)
+        grupos[nome] = grupo
+    return grupos
+
+
+def vincular_grupos(usuarios_e_grupos, tamanho_lote=TAMANHO_LOTE):
+    """Insere em lote os vínculos [(usuário, [nomes de grupos])] na tabela de grupos."""
+    if not usuarios_e_grupos:
+        return
+    grupos = grupos_por_nome(nome for _, nomes in usuarios_e_grupos for nome in nomes)
+    Vinculo = User.groups.through
+    Vinculo.objects.bulk_create(
+        [
+            Vinculo(user_id=usuario.id, group_id=grupos[nome].id)
+            for usuario, nomes in usuarios_e_grupos
+            for nome in set(nomes)
+        ],
+        batch_size=tamanho_lote,
+        ignore_conflicts=True,
+    )
+
+
+def criar_contas(contas, processos=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Cria os usuários descritos em `contas` e retorna a lista de User salvos.
+
+    Cada conta é um dicionário com 'username' e, opcionalmente, 'senha',
+    'email', 'first_name', 'last_name', 'is_staff' e 'grupos' (lista de
+    nomes). Os nomes de usuário precisam ser novos. Os hashes são calculados
+    antes da transação, que assim só segura o banco durante os INSERTs.
+    """
+    contas = list(contas)
+    hashes = gerar_hashes([conta.get('senha') for conta in contas], processos)
+    with transaction.atomic():
+        usuarios = User.objects.bulk_create(
+            [
+                User(
+                    username=conta['username'],
+                    password=senha,
+                    email=conta.get('email') or '',
+                    first_name=conta.get('first_name') or '',
+                    last_name=conta.get('last_name') or '',
+                    is_staff=conta.get('is_staff', False),
+                )
+                for conta, senha in zip(contas, hashes)
+            ],
+            batch_size=tamanho_lote,
+        )
+        vincular_grupos(
+            [(usuario, conta['grupos']) for usuario, conta in zip(usuarios, contas) if conta.get('grupos')],
+            tamanho_lote,
+        )
+    if usuarios:
+        # bulk_create não dispara signals: o total de usuários é recontado.
+        invalidar_contadores_do_modelo(User, alterou_quantidade=True)
+    return usuarios
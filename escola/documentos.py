@@ -0,0 +1,160 @@
+"""
+Emissão automática da Declaração de Matrícula e do Atestado de Frequência.
+
+Quando um desses documentos é solicitado, o signal de Documento enfileira a
+tarefa 'emitir_documento'; o worker gera o PDF a partir da matrícula na
+turma atual e da frequência do aluno, grava o arquivo e marca o documento
+como EMITIDO. Os demais tipos (histórico, outros) continuam com a
+secretaria. Se faltar algum dado (aluno sem turma, matrícula trancada), o
+documento fica PENDENTE para a emissão manual.
+"""
+import io
+import secrets
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from .contadores import invalidar_contadores_do_modelo
+from .frequencias import frequencia_do_aluno
+from .models import Documento, Matricula
+
+
+TIPOS_AUTOMATICOS = {'DECLARACAO_MATRICULA', 'ATESTADO_FREQUENCIA'}
+LARGURA_TEXTO = 495
+
+
+class DocumentoNaoGerado(Exception):
+    """O documento não pode ser gerado automaticamente e fica para a secretaria."""
+
+
+def _matricula_atual(aluno):
+    if not aluno.turma_atual_id:
+        raise DocumentoNaoGerado(f'{aluno.nome} não está em nenhuma turma.')
+    matricula = (
+        Matricula.objects.filter(aluno=aluno, turma_id=aluno.turma_atual_id)
+        .select_related('turma__curso').order_by('id').first()
+    )
+    if matricula is None or matricula.status != 'Ativo':
+        raise DocumentoNaoGerado(f'{aluno.nome} não tem matrícula ativa na turma atual.')
+    return matricula
+
+
+def _cabecalho(p, titulo):
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, 800, "Nexus - Sistema de Gestão Escolar")
+    p.line(50, 790, 545, 790)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawCentredString(297, 750, titulo)
+
+
+def _paragrafo(p, texto, y):
+    p.setFont("Helvetica", 12)
+    for linha in simpleSplit(texto, "Helvetica", 12, LARGURA_TEXTO):
+        p.drawString(50, y, linha)
+        y -= 18
+    return y - 12
+
+
+def _rodape(p, y, data_emissao):
+    p.setFont("Helvetica", 12)
+    p.drawString(50, y, f"Emitido em {data_emissao:%d/%m/%Y}.")
+    p.line(180, y - 70, 415, y - 70)
+    p.drawCentredString(297, y - 85, "Secretaria Acadêmica")
+
+
+def pdf_declaracao_matricula(aluno, data_emissao):
+    """Conteúdo (bytes) da Declaração de Matrícula do aluno."""
+    matricula = _matricula_atual(aluno)
+    turma = matricula.turma
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    _cabecalho(p, "DECLARAÇÃO DE MATRÍCULA")
+    y = _paragrafo(p, (
+        f"Declaramos, para os devidos fins, que {aluno.nome}, CPF {aluno.cpf}, matrícula nº {aluno.matricula}, "
+        f"está regularmente matriculado(a) no curso {turma.curso.nome}, turma {turma.codigo}, "
+        f"turno {turma.get_turno_display().lower()}, semestre {turma.semestre}, "
+        f"desde {matricula.data_matricula:%d/%m/%Y}."
+    ), 700)
+    _rodape(p, y - 20, data_emissao)
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def pdf_atestado_frequencia(aluno, data_emissao):
+    """Conteúdo (bytes) do Atestado de Frequência, com a frequência por disciplina."""
+    matricula = _matricula_atual(aluno)
+    linhas, porcentagem_geral = frequencia_do_aluno(aluno)
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    _cabecalho(p, "ATESTADO DE FREQUÊNCIA")
+    y = _paragrafo(p, (
+        f"Atestamos, para os devidos fins, que {aluno.nome}, matrícula nº {aluno.matricula}, aluno(a) da turma "
+        f"{matricula.turma.codigo} do curso {matricula.turma.curso.nome}, tem frequência geral de "
+        f"{porcentagem_geral}% até {data_emissao:%d/%m/%Y}, conforme o quadro abaixo."
+    ), 700)
+
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(50, y, "DISCIPLINA")
+    p.drawString(300, y, "AULAS")
+    p.drawString(380, y, "FALTAS")
+    p.drawString(460, y, "% PRESENÇA")
+    y -= 20
+    p.setFont("Helvetica", 10)
+    for item in linhas:
+        if y < 150:
+            p.showPage()
+            p.setFont("Helvetica", 10)
+            y = 800
+        p.drawString(50, y, str(item['disciplina']))
+        p.drawString(300, y, str(item['total_aulas']))
+        p.drawString(380, y, str(item['faltas']))
+        p.drawString(460, y, f"{item['porcentagem']}%")
+        y -= 20
+
+    _rodape(p, y - 20, data_emissao)
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+GERADORES = {
+    'DECLARACAO_MATRICULA': pdf_declaracao_matricula,
+    'ATESTADO_FREQUENCIA': pdf_atestado_frequencia,
+}
+
+
+def emitir_documento(documento_id):
+    """
+    Gera o PDF do documento pendente, grava o arquivo e o marca como
+    EMITIDO. Retorna False se o documento já tiver sido emitido (pela
+    secretaria, por exemplo) ou excluído nesse meio tempo.
+    """
+    documento = Documento.objects.select_related('aluno').filter(pk=documento_id, status='PENDENTE').first()
+    if documento is None:
+        return False
+    if documento.tipo not in GERADORES:
+        raise DocumentoNaoGerado(f'Documentos do tipo {documento.get_tipo_display()} são emitidos pela secretaria.')
+
+    aluno = documento.aluno
+    data_emissao = timezone.now()
+    conteudo = GERADORES[documento.tipo](aluno, timezone.localdate(data_emissao))
+    nome = documento.arquivo.storage.save(
+        # Sufixo aleatório: a pasta de mídia pode ser servida sem login.
+        documento.arquivo.field.generate_filename(
+            documento, f'{documento.tipo.lower()}_{aluno.matricula}_{secrets.token_hex(16)}.pdf'
+        ),
+        ContentFile(conteudo),
+    )
+    # Só emite se continuar pendente: a secretaria pode ter emitido à mão.
+    emitido = Documento.objects.filter(pk=documento.pk, status='PENDENTE').update(
+        status='EMITIDO', data_emissao=data_emissao, arquivo=nome,
+    )
+    if not emitido:
+        documento.arquivo.storage.delete(nome)
+        return False
+    invalidar_contadores_do_modelo(Documento, alterou_quantidade=False)
+    return True
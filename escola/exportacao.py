@@ -0,0 +1,168 @@
+"""
+Exportação de planilhas XLSX sem montar a planilha na memória.
+
+As linhas vêm de querysets lidos com .iterator() e são gravadas em
+worksheets write-only do openpyxl, que vão direto para disco; o arquivo
+final fica em um SpooledTemporaryFile e é enviado em blocos por um
+FileResponse (StreamingHttpResponse). O uso de memória não cresce com o
+número de linhas.
+"""
+import tempfile
+
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from .models import Frequencia, Matricula, Nota
+
+
+TIPO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+TAMANHO_BLOCO_CONSULTA = 2000
+# Arquivos até esse tamanho ficam na memória; acima disso vão para disco.
+TAMANHO_EM_MEMORIA = 8 * 1024 * 1024
+# Limite de linhas de uma aba do Excel, descontado o cabeçalho.
+LINHAS_POR_ABA = 1_048_575
+
+
+def _situacao(presente):
+    return 'Presente' if presente else 'Falta'
+
+
+# nome: {título da aba, modelo, caminho até a turma, ordenação, colunas
+# [(cabeçalho, campo)] e conversões {campo: função}}. As ordenações seguem
+# os índices únicos de cada tabela, evitando ordenar milhões de linhas.
+PLANILHAS = {
+    'frequencias': {
+        'titulo': 'Frequências',
+        'modelo': Frequencia,
+        'turma': 'matricula__turma',
+        'ordenacao': ('matricula_id', 'disciplina_id', 'data_aula'),
+        'colunas': [
+            ('Matrícula', 'matricula__aluno__matricula'),
+            ('Aluno', 'matricula__aluno__nome'),
+            ('Turma', 'matricula__turma__codigo'),
+            ('Disciplina', 'disciplina__nome'),
+            ('Data', 'data_aula'),
+            ('Situação', 'presente'),
+            ('Justificativa', 'justificativa'),
+        ],
+        'conversoes': {'presente': _situacao},
+    },
+    'notas': {
+        'titulo': 'Notas',
+        'modelo': Nota,
+        'turma': 'matricula__turma',
+        'ordenacao': ('matricula_id', 'disciplina_id', 'tipo_avaliacao'),
+        'colunas': [
+            ('Matrícula', 'matricula__aluno__matricula'),
+            ('Aluno', 'matricula__aluno__nome'),
+            ('Turma', 'matricula__turma__codigo'),
+            ('Disciplina', 'disciplina__nome'),
+            ('Avaliação', 'tipo_avaliacao'),
+            ('Nota', 'valor'),
+            ('Lançamento', 'data_lancamento'),
+        ],
+    },
+    'matriculas': {
+        'titulo': 'Matrículas',
+        'modelo': Matricula,
+        'turma': 'turma',
+        'ordenacao': ('turma_id', 'aluno_id'),
+        'colunas': [
+            ('Matrícula', 'aluno__matricula'),
+            ('Aluno', 'aluno__nome'),
+            ('CPF', 'aluno__cpf'),
+            ('E-mail', 'aluno__email'),
+            ('Turma', 'turma__codigo'),
+            ('Curso', 'turma__curso__nome'),
+            ('Data da Matrícula', 'data_matricula'),
+            ('Status', 'status'),
+        ],
+    },
+}
+
+
+def _consulta(planilha, turma_id, curso_id):
+    consulta = planilha['modelo'].objects.all()
+    if turma_id is not None:
+        consulta = consulta.filter(**{f"{planilha['turma']}_id": turma_id})
+    elif curso_id is not None:
+        consulta = consulta.filter(**{f"{planilha['turma']}__curso_id": curso_id})
+    return consulta
+
+
+def contar_linhas(nome, turma_id=None, curso_id=None):
+    """Número de linhas da planilha `nome`, para acompanhar o progresso."""
+    return _consulta(PLANILHAS[nome], turma_id, curso_id).count()
+
+
+def linhas_da_planilha(nome, turma_id=None, curso_id=None):
+    """
+    Cabeçalho e iterador de linhas da planilha `nome` de PLANILHAS, restrita
+    à turma ou ao curso (sem nenhum dos dois, a escola inteira).
+    """
+    planilha = PLANILHAS[nome]
+    consulta = _consulta(planilha, turma_id, curso_id)
+
+    campos = [campo for _, campo in planilha['colunas']]
+    conversoes = [planilha.get('conversoes', {}).get(campo) for campo in campos]
+    linhas = (
+        consulta.order_by(*planilha['ordenacao'])
+        .values_list(*campos)
+        .iterator(chunk_size=TAMANHO_BLOCO_CONSULTA)
+    )
+
+    def converter():
+        for linha in linhas:
+            yield [conversao(valor) if conversao else valor for conversao, valor in zip(conversoes, linha)]
+
+    cabecalho = [titulo for titulo, _ in planilha['colunas']]
+    return cabecalho, converter() if any(conversoes) else linhas
+
+
+def escrever_xlsx(titulo, cabecalho, linhas):
+    """
+    Grava as linhas em um XLSX e retorna o arquivo temporário, posicionado
+    no início. Passado o limite de linhas de uma aba, continua em outra
+    ("Título (2)", ...).
+    """
+    planilha = Workbook(write_only=True)
+    negrito = Font(bold=True)
+
+    def nova_aba(numero):
+        aba = planilha.create_sheet(titulo if numero == 1 else f'{titulo} ({numero})')
+        celulas = []
+        for texto in cabecalho:
+            celula = WriteOnlyCell(aba, value=texto)
+            celula.font = negrito
+            celulas.append(celula)
+        aba.append(celulas)
+        return aba
+
+    numero_aba = 1
+    aba = nova_aba(numero_aba)
+    linhas_na_aba = 0
+    for linha in linhas:
+        if linhas_na_aba == LINHAS_POR_ABA:
+            numero_aba += 1
+            aba = nova_aba(numero_aba)
+            linhas_na_aba = 0
+        aba.append(linha)
+        linhas_na_aba += 1
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_EM_MEMORIA)
+    planilha.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+
+def resposta_xlsx(arquivo, nome_arquivo):
+    """Envia o arquivo em blocos, como anexo; o FileResponse o fecha ao terminar."""
+    return FileResponse(arquivo, as_attachment=True, filename=nome_arquivo, content_type=TIPO_XLSX)
+
+
+def planilha_xlsx(nome, nome_arquivo, turma_id=None, curso_id=None):
+    """Resposta com a planilha `nome` de PLANILHAS, da turma, do curso ou da escola."""
+    cabecalho, linhas = linhas_da_planilha(nome, turma_id, curso_id)
+    return resposta_xlsx(escrever_xlsx(PLANILHAS[nome]['titulo'], cabecalho, linhas), nome_arquivo)
@@ -0,0 +1,95 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import Frequencia, JustificativaFalta
+from .perfis import disciplinas_do_aluno
+from .resumos import calcular_percentual
+
+
+FREQUENCIA_MINIMA = 75
+
+
+def situacao_por_frequencia(porcentagem):
+    if porcentagem == 100:
+        return "Excelente"
+    if porcentagem < FREQUENCIA_MINIMA:
+        return "Atenção"
+    return "Regular"
+
+
+def _falta_justificada():
+    justificativa_aprovada = JustificativaFalta.objects.filter(
+        aluno_id=OuterRef('matricula__aluno_id'),
+        disciplina_id=OuterRef('disciplina_id'),
+        status='APROVADA',
+        data_inicio__lte=OuterRef('data_aula'),
+        data_fim__gte=OuterRef('data_aula'),
+    )
+    com_texto = Q(justificativa__isnull=False) & ~Q(justificativa='')
+    return Q(presente=False) & (com_texto | Exists(justificativa_aprovada))
+
+
+def estatisticas_frequencia(alunos=None, disciplinas=None):
+    """
+    Retorna as estatísticas de frequência por (aluno_id, disciplina_id).
+
+    Uma única consulta agrupada conta aulas, faltas e faltas justificadas
+    (justificativa preenchida na chamada ou justificativa aprovada cobrindo a
+    data). Pode ser filtrada por alunos e por disciplinas. O relatório da
+    coordenação não passa por aqui: ele lê os totais do ResumoAluno.
+    """
+    frequencias = Frequencia.objects.all()
+    if alunos is not None:
+        frequencias = frequencias.filter(matricula__aluno__in=alunos)
+    if disciplinas is not None:
+        frequencias = frequencias.filter(disciplina__in=disciplinas)
+
+    agrupadas = frequencias.values('matricula__aluno_id', 'disciplina_id').annotate(
+        total_aulas=Count('id'),
+        faltas=Count('id', filter=Q(presente=False)),
+        faltas_justificadas=Count('id', filter=_falta_justificada()),
+    ).order_by()
+
+    estatisticas = {}
+    for linha in agrupadas:
+        chave = (linha['matricula__aluno_id'], linha['disciplina_id'])
+        estatisticas[chave] = {
+            'total_aulas': linha['total_aulas'],
+            'faltas': linha['faltas'],
+            'faltas_justificadas': linha['faltas_justificadas'],
+            'porcentagem': calcular_percentual(linha['total_aulas'], linha['faltas']),
+        }
+    return estatisticas
+
+
+def frequencia_do_aluno(aluno):
+    """
+    Monta a frequência do aluno em cada disciplina do curso e a porcentagem geral.
+
+    Retorna uma tupla (linhas, porcentagem_geral) usando no máximo duas consultas.
+    """
+    if not aluno.turma_atual_id:
+        return [], 100
+
+    disciplinas = disciplinas_do_aluno(aluno)
+    estatisticas = estatisticas_frequencia(
+        alunos=[aluno.pk],
+        disciplinas=[disciplina_id for disciplina_id, _ in disciplinas],
+    )
+
+    linhas = []
+    total_presenca = 0
+    total_aulas_geral = 0
+    for disciplina_id, nome in disciplinas:
+        dados = estatisticas.get((aluno.pk, disciplina_id), {
+            'total_aulas': 0, 'faltas': 0, 'faltas_justificadas': 0, 'porcentagem': 100,
+        })
+        total_presenca += dados['total_aulas'] - dados['faltas']
+        total_aulas_geral += dados['total_aulas']
+        linhas.append({
+            'disciplina_id': disciplina_id,
+            'disciplina': nome,
+            'status': situacao_por_frequencia(dados['porcentagem']),
+            **dados
+        })
+
+    return linhas, calcular_percentual(total_aulas_geral, total_aulas_geral - total_presenca)
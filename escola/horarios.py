@@ -0,0 +1,87 @@
+from django.core.cache import cache
+
+from .models import HorarioAula
+
+
+DIAS_GRADE = ['SEG', 'TER', 'QUA', 'QUI', 'SEX']
+HORARIOS_PADRAO = ['07:00', '07:50', '08:40', '09:30', '09:50', '10:40', '11:30']
+# Os signals só limpam o cache do processo que alterou o horário; nos demais
+# (outros workers do servidor, cargas em lote) a grade vale até expirar.
+# Montá-la custa uma consulta, então uma validade curta sai barata.
+TEMPO_CACHE_GRADE = 60 * 5
+
+
+def _chave_grade(turma_id):
+    return f'horarios:grade:{turma_id}'
+
+
+def _grade_vazia():
+    return {hora: {dia: None for dia in DIAS_GRADE} for hora in HORARIOS_PADRAO}
+
+
+def _montar_grade(turma_id):
+    """Monta a grade horário x dia da turma em uma única passada pelas aulas."""
+    grade = _grade_vazia()
+    aulas = HorarioAula.objects.filter(turma_id=turma_id).values_list(
+        'id', 'dia_semana', 'hora_inicio', 'disciplina_id', 'disciplina__nome', 'turma__codigo'
+    )
+    for aula_id, dia, hora_inicio, disciplina_id, disciplina_nome, turma_codigo in aulas:
+        linha = grade.get(hora_inicio.strftime('%H:%M'))
+        if linha is None or dia not in linha:
+            continue
+        linha[dia] = {
+            'id': aula_id,
+            'turma': turma_codigo,
+            'disciplina': {'id': disciplina_id, 'nome': disciplina_nome},
+        }
+    return grade
+
+
+def grade_da_turma(turma_id):
+    """
+    Retorna a grade {hora: {dia: aula}} da turma, guardada em cache.
+
+    Cada aula é um dicionário com 'id', 'turma' (código) e 'disciplina'
+    ('id' e 'nome'); horários sem aula ficam com None. O cache é invalidado
+    pelos signals de HorarioAula, Disciplina e Turma e, nos outros
+    processos, expira em TEMPO_CACHE_GRADE.
+    """
+    chave = _chave_grade(turma_id)
+    grade = cache.get(chave)
+    if grade is None:
+        grade = _montar_grade(turma_id)
+        cache.set(chave, grade, TEMPO_CACHE_GRADE)
+    return grade
+
+
+def invalidar_grade(*turmas_ids):
+    cache.delete_many([_chave_grade(turma_id) for turma_id in turmas_ids if turma_id])
+
+
+def linhas_da_grade(grade):
+    """Converte a grade no formato de linhas [{'hora', 'aulas'}] usado nas telas."""
+    return [{'hora': hora, 'aulas': grade[hora]} for hora in HORARIOS_PADRAO]
+
+
+def grade_do_professor(professor):
+    """
+    Junta as grades das turmas do professor, mantendo só as aulas das suas
+    disciplinas. Cada posição da grade é uma lista, já que o mesmo horário
+    pode aparecer em mais de uma turma.
+    """
+    disciplinas_ids = {disciplina.id for disciplina in professor.disciplinas.all()}
+    turmas_ids = [turma.id for turma in sorted(professor.turmas.all(), key=lambda turma: turma.codigo)]
+
+    chaves = {_chave_grade(turma_id): turma_id for turma_id in turmas_ids}
+    em_cache = cache.get_many(chaves.keys())
+
+    grade = {hora: {dia: [] for dia in DIAS_GRADE} for hora in HORARIOS_PADRAO}
+    for chave, turma_id in chaves.items():
+        grade_turma = em_cache.get(chave)
+        if grade_turma is None:
+            grade_turma = grade_da_turma(turma_id)
+        for hora, dias in grade_turma.items():
+            for dia, aula in dias.items():
+                if aula and aula['disciplina']['id'] in disciplinas_ids:
+                    grade[hora][dia].append(aula)
+    return grade
@@ -0,0 +1,330 @@
+"""
+Importação de alunos em lote a partir de planilhas CSV ou XLSX.
+
+As linhas são lidas uma a uma (o XLSX em modo somente leitura do openpyxl),
+validadas em lotes e gravadas com bulk_create: cada lote custa algumas
+consultas de conferência e um INSERT por tabela (User e seus grupos,
+Aluno, Matricula), em vez das várias consultas por aluno do formulário de
+cadastro. Linhas com problema não impedem as demais e voltam no relatório
+com o número da linha.
+
+Pelo site a importação roda na fila de tarefas (tarefa 'importar_alunos'):
+os hashes das senhas ocupam todos os núcleos por um bom tempo e ficam no
+worker, com um único pool de processos para o arquivo inteiro.
+"""
+import codecs
+import csv
+import io
+from datetime import date, datetime
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from openpyxl import load_workbook
+
+from .contas import gerar_hashes, iniciar_pool, vincular_grupos
+from .contadores import invalidar_contadores_do_modelo
+from .models import Aluno, Matricula, Turma
+from .texto import normalizar
+
+
+TAMANHO_LOTE = 500
+TAMANHO_BLOCO_LEITURA = 64 * 1024
+COLUNAS = ['nome', 'email', 'cpf', 'matricula', 'data_nascimento', 'telefone', 'turma', 'username', 'senha']
+COLUNAS_OBRIGATORIAS = ['nome', 'email', 'cpf', 'matricula', 'data_nascimento']
+FORMATOS_DATA = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y']
+
+# Cabeçalhos aceitos além dos nomes de COLUNAS (já normalizados).
+SINONIMOS = {
+    'e-mail': 'email',
+    'data de nascimento': 'data_nascimento',
+    'nascimento': 'data_nascimento',
+    'usuario': 'username',
+    'nome de usuario': 'username',
+    'password': 'senha',
+    'codigo da turma': 'turma',
+}
+
+
+class ErroImportacao(Exception):
+    """Arquivo que não pode ser lido como planilha de alunos."""
+
+
+class ResultadoImportacao:
+    """
+    Andamento da importação. ultima_linha é a última linha do arquivo já
+    resolvida (gravada ou relatada) numa transação confirmada; os dados de
+    estado() permitem continuar de onde uma execução interrompida parou.
+    """
+    def __init__(self, criados=0, erros=(), ultima_linha=0):
+        self.criados = criados
+        self.erros = list(erros)  # [(número da linha, [mensagens])]
+        self.ultima_linha = ultima_linha
+
+    def estado(self):
+        """Dicionário serializável em JSON que recria o resultado com ResultadoImportacao(**estado)."""
+        return {'criados': self.criados, 'erros': self.erros, 'ultima_linha': self.ultima_linha}
+
+    @property
+    def linhas_com_erro(self):
+        return len(self.erros)
+
+
+def escrever_relatorio(resultado, arquivo):
+    """Grava no arquivo binário o CSV (Linha;Problemas) das linhas não importadas."""
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto, delimiter=';')
+    escritor.writerow(['Linha', 'Problemas'])
+    for numero, erros in resultado.erros:
+        escritor.writerow([numero, ' '.join(erros)])
+    texto.flush()
+    texto.detach()
+
+
+def _coluna(cabecalho):
+    nome = normalizar(str(cabecalho or '')).strip()
+    nome = SINONIMOS.get(nome, nome).replace(' ', '_')
+    return nome if nome in COLUNAS else None
+
+
+def _codificacao(arquivo):
+    """
+    Codificação do CSV: UTF-8 se o arquivo inteiro for UTF-8 válido, senão
+    cp1252 (o padrão do Excel em português). A conferência lê o arquivo em
+    blocos, sem carregá-lo na memória, antes de qualquer linha ser gravada.
+    """
+    for codificacao in ('utf-8-sig', 'cp1252'):
+        decodificador = codecs.getincrementaldecoder(codificacao)()
+        arquivo.seek(0)
+        try:
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_LEITURA), b''):
+                decodificador.decode(bloco)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            continue
+        arquivo.seek(0)
+        return codificacao
+    raise ErroImportacao('Não foi possível ler o CSV: salve o arquivo em UTF-8 e envie novamente.')
+
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding=_codificacao(arquivo), newline='')
+    primeira = texto.readline()
+    delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+    yield from csv.reader([primeira], delimiter=delimitador)
+    yield from csv.reader(texto, delimiter=delimitador)
+
+
+def _linhas_xlsx(arquivo):
+    try:
+        planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as erro:
+        raise ErroImportacao(f'Não foi possível abrir a planilha: {erro}')
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """
+    Gera (número da linha, {coluna: valor}) para cada linha preenchida do
+    arquivo, sem carregá-lo inteiro na memória. A primeira linha é o
+    cabeçalho; colunas desconhecidas são ignoradas.
+    """
+    extensao = nome_arquivo.rsplit('.', 1)[-1].lower()
+    if extensao == 'csv':
+        linhas = _linhas_csv(arquivo)
+    elif extensao == 'xlsx':
+        linhas = _linhas_xlsx(arquivo)
+    else:
+        raise ErroImportacao('Envie um arquivo .csv ou .xlsx.')
+
+    cabecalho = [_coluna(celula) for celula in next(linhas, [])]
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in cabecalho]
+    if faltando:
+        raise ErroImportacao(f'Colunas obrigatórias ausentes no cabeçalho: {", ".join(faltando)}.')
+
+    for numero, celulas in enumerate(linhas, start=2):
+        valores = {}
+        for coluna, valor in zip(cabecalho, celulas):
+            if coluna is None or valor is None:
+                continue
+            valores[coluna] = valor if isinstance(valor, (date, datetime)) else str(valor).strip()
+        if any(valores.values()):
+            yield numero, valores
+
+
+def _data(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+class _Importador:
+    def __init__(self, pool=None, resultado=None, ao_gravar_lote=None):
+        self.pool = pool
+        self.resultado = resultado or ResultadoImportacao()
+        self.ao_gravar_lote = ao_gravar_lote
+        self.turmas = {normalizar(codigo): turma_id for turma_id, codigo in Turma.objects.values_list('id', 'codigo')}
+        # Valores já usados por linhas anteriores do próprio arquivo.
+        self.vistos = {'matricula': set(), 'email': set(), 'cpf': set(), 'username': set()}
+
+    def validar(self, valores):
+        """Mensagens de erro da linha que não dependem do banco."""
+        erros = [f'Campo obrigatório vazio: {coluna}.' for coluna in COLUNAS_OBRIGATORIAS if not valores.get(coluna)]
+        if valores.get('email'):
+            try:
+                validate_email(valores['email'])
+            except ValidationError:
+                erros.append('E-mail inválido.')
+        if valores.get('data_nascimento'):
+            valores['data_nascimento'] = _data(valores['data_nascimento'])
+            if valores['data_nascimento'] is None:
+                erros.append('Data de nascimento inválida (use dd/mm/aaaa).')
+        if valores.get('turma'):
+            valores['turma_id'] = self.turmas.get(normalizar(valores['turma']))
+            if valores['turma_id'] is None:
+                erros.append(f'Turma {valores["turma"]} não encontrada.')
+        if valores.get('username') and not valores.get('senha'):
+            erros.append('Informe a senha do usuário.')
+        for campo, limite in (('matricula', 20), ('cpf', 14), ('nome', 150), ('telefone', 20), ('username', 150)):
+            if len(valores.get(campo) or '') > limite:
+                erros.append(f'{campo} com mais de {limite} caracteres.')
+        return erros
+
+    def _existentes(self, linhas):
+        """Valores de matrícula, e-mail, CPF e usuário do lote que já estão no banco."""
+        def coletar(campo):
+            return {valores[campo] for _, valores in linhas if valores.get(campo)}
+
+        existentes = {
+            campo: set(Aluno.objects.filter(**{f'{campo}__in': coletar(campo)}).values_list(campo, flat=True))
+            for campo in ('matricula', 'email', 'cpf')
+        }
+        existentes['username'] = set(
+            User.objects.filter(username__in=coletar('username')).values_list('username', flat=True)
+        )
+        return existentes
+
+    def processar_lote(self, lote):
+        # Linhas resolvidas por uma execução anterior não são validadas de
+        # novo: viriam como "já cadastrado" ou seriam gravadas em dobro.
+        lote = [(numero, valores) for numero, valores in lote if numero > self.resultado.ultima_linha]
+        if not lote:
+            return
+        existentes = self._existentes(lote)
+        novas = []
+        erros_do_lote = []
+        for numero, valores in lote:
+            erros = self.validar(valores)
+            for campo, vistos in self.vistos.items():
+                valor = valores.get(campo)
+                if not valor:
+                    continue
+                if valor in existentes[campo]:
+                    erros.append(f'{campo} {valor} já cadastrado.')
+                elif valor in vistos:
+                    erros.append(f'{campo} {valor} repetido no arquivo.')
+            if erros:
+                erros_do_lote.append((numero, erros))
+                continue
+            for campo, vistos in self.vistos.items():
+                if valores.get(campo):
+                    vistos.add(valores[campo])
+            novas.append(valores)
+
+        self.gravar(novas, erros_do_lote, ultima_linha=lote[-1][0])
+
+    def gravar(self, linhas, erros, ultima_linha):
+        """
+        Grava os alunos do lote e, na mesma transação, o andamento (via
+        ao_gravar_lote): ou o lote entra inteiro e fica marcado, ou nada fica.
+        """
+        com_usuario = [valores for valores in linhas if valores.get('username')]
+        # Os hashes ficam fora da transação, calculados em paralelo.
+        hashes = gerar_hashes([valores['senha'] for valores in com_usuario], pool=self.pool)
+        with transaction.atomic():
+            usuarios = User.objects.bulk_create([
+                User(
+                    username=valores['username'],
+                    email=valores['email'],
+                    password=senha,
+                    first_name=valores['nome'].split()[0],
+                    last_name=' '.join(valores['nome'].split()[1:]),
+                )
+                for valores, senha in zip(com_usuario, hashes)
+            ])
+            vincular_grupos([(usuario, ['Aluno']) for usuario in usuarios])
+            for valores, usuario in zip(com_usuario, usuarios):
+                valores['user_id'] = usuario.id
+
+            alunos = Aluno.objects.bulk_create([
+                Aluno(
+                    user_id=valores.get('user_id'),
+                    nome=valores['nome'],
+                    email=valores['email'],
+                    cpf=valores['cpf'],
+                    matricula=valores['matricula'],
+                    data_nascimento=valores['data_nascimento'],
+                    telefone=valores.get('telefone') or None,
+                    turma_atual_id=valores.get('turma_id'),
+                )
+                for valores in linhas
+            ])
+            # bulk_create não dispara o signal que cria a matrícula na turma atual.
+            Matricula.objects.bulk_create([
+                Matricula(aluno_id=aluno.id, turma_id=aluno.turma_atual_id, status='Ativo')
+                for aluno in alunos if aluno.turma_atual_id
+            ])
+            self.resultado.criados += len(alunos)
+            self.resultado.erros.extend(erros)
+            self.resultado.ultima_linha = ultima_linha
+            if self.ao_gravar_lote:
+                self.ao_gravar_lote(self.resultado)
+
+
+def importar_alunos(arquivo, nome_arquivo, tamanho_lote=TAMANHO_LOTE, processos=None, progresso=None,
+                    resultado=None, ao_gravar_lote=None):
+    """
+    Cadastra os alunos da planilha e retorna um ResultadoImportacao.
+
+    Colunas obrigatórias: nome, email, cpf, matricula e data_nascimento;
+    opcionais: telefone, turma (código), username e senha. Cada lote é
+    gravado em sua própria transação, então um erro inesperado no meio do
+    arquivo preserva os lotes anteriores. ao_gravar_lote(resultado), se
+    informado, roda dentro da transação de cada lote para guardar o
+    andamento; passando de volta esse andamento como `resultado`, a
+    importação continua depois da última linha resolvida. Os hashes das
+    senhas usam um pool de `processos` processos aberto uma vez para todos
+    os lotes. Se informado, progresso(linhas lidas) é chamado a cada lote.
+    Lança ErroImportacao se o arquivo não puder ser lido.
+    """
+    with iniciar_pool(processos) as pool:
+        importador = _Importador(pool, resultado, ao_gravar_lote)
+        lote = []
+        lidas = 0
+        for linha in ler_linhas(arquivo, nome_arquivo):
+            lote.append(linha)
+            if len(lote) == tamanho_lote:
+                importador.processar_lote(lote)
+                lidas += len(lote)
+                lote = []
+                if progresso:
+                    progresso(lidas)
+        if lote:
+            importador.processar_lote(lote)
+
+    if importador.resultado.criados:
+        # bulk_create não dispara signals: os totais dos dashboards são recontados.
+        invalidar_contadores_do_modelo(Aluno, alterou_quantidade=True)
+        invalidar_contadores_do_modelo(User, alterou_quantidade=True)
+    return importador.resultado
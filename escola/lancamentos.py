@@ -0,0 +1,147 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Aluno, Frequencia, Matricula, Nota, Turma
+from .resumos import recalcular_resumos
+
+
+NOTA_MINIMA = Decimal('0')
+NOTA_MAXIMA = Decimal('10')
+
+
+def _bloquear_turma(turma):
+    """
+    Serializa lançamentos concorrentes da mesma turma (SELECT ... FOR UPDATE),
+    evitando que dois envios simultâneos criem matrículas duplicadas.
+    """
+    Turma.objects.select_for_update().filter(pk=turma.pk).exists()
+
+
+def _matriculas_da_turma(alunos, turma):
+    """
+    Retorna {aluno_id: matricula_id} para os alunos na turma, criando em lote
+    as matrículas que faltam para quem tem a turma como turma atual.
+    """
+    matriculas = {}
+    for matricula_id, aluno_id in Matricula.objects.filter(
+        aluno_id__in=[aluno.id for aluno in alunos], turma=turma
+    ).order_by('id').values_list('id', 'aluno_id'):
+        matriculas.setdefault(aluno_id, matricula_id)
+
+    novas = [
+        Matricula(aluno_id=aluno.id, turma=turma, status='Ativo')
+        for aluno in alunos
+        if aluno.id not in matriculas and aluno.turma_atual_id == turma.id
+    ]
+    for matricula in Matricula.objects.bulk_create(novas):
+        matriculas[matricula.aluno_id] = matricula.id
+    return matriculas
+
+
+def lancar_notas(turma, disciplina, tipo_avaliacao, valores):
+    """
+    Grava em lote as notas de uma avaliação.
+
+    ``valores`` mapeia o id do aluno (como enviado no formulário) para o valor
+    digitado. Alunos e matrículas são resolvidos com uma consulta cada e as
+    notas são gravadas com um único INSERT ... ON CONFLICT DO UPDATE sobre a
+    restrição única (matricula, disciplina, tipo_avaliacao).
+
+    Retorna um dicionário com os contadores 'salvas', 'atualizadas',
+    'invalidas' e 'vazias'.
+    """
+    resultado = {'salvas': 0, 'atualizadas': 0, 'invalidas': 0, 'vazias': 0}
+
+    notas_por_aluno = {}
+    for aluno_id, valor in valores.items():
+        if not valor or not valor.strip():
+            resultado['vazias'] += 1
+            continue
+        try:
+            aluno_id = int(aluno_id)
+            nota_valor = Decimal(valor.strip().replace(',', '.'))
+        except (ValueError, InvalidOperation):
+            resultado['invalidas'] += 1
+            continue
+        if not nota_valor.is_finite() or nota_valor < NOTA_MINIMA or nota_valor > NOTA_MAXIMA:
+            resultado['invalidas'] += 1
+            continue
+        notas_por_aluno[aluno_id] = nota_valor
+
+    if not notas_por_aluno:
+        return resultado
+
+    with transaction.atomic():
+        _bloquear_turma(turma)
+        alunos = list(Aluno.objects.filter(id__in=notas_por_aluno.keys()).only('id', 'turma_atual_id'))
+        matriculas = _matriculas_da_turma(alunos, turma)
+        resultado['invalidas'] += len(notas_por_aluno) - len(matriculas)
+
+        existentes = set(Nota.objects.filter(
+            matricula_id__in=matriculas.values(),
+            disciplina=disciplina,
+            tipo_avaliacao=tipo_avaliacao
+        ).values_list('matricula_id', flat=True))
+
+        notas = [
+            Nota(
+                matricula_id=matricula_id,
+                disciplina=disciplina,
+                tipo_avaliacao=tipo_avaliacao,
+                valor=notas_por_aluno[aluno_id]
+            )
+            for aluno_id, matricula_id in matriculas.items()
+        ]
+        Nota.objects.bulk_create(
+            notas,
+            update_conflicts=True,
+            unique_fields=['matricula', 'disciplina', 'tipo_avaliacao'],
+            update_fields=['valor'],
+        )
+
+        resultado['atualizadas'] = len(existentes)
+        resultado['salvas'] = len(notas) - len(existentes)
+
+        # bulk_create não dispara signals: os resumos dos alunos são refeitos aqui.
+        recalcular_resumos(matriculas.keys())
+
+    return resultado
+
+
+def lancar_frequencia(turma, disciplina, data_aula, presentes):
+    """
+    Grava em lote a chamada de uma aula para todos os alunos da turma.
+
+    ``presentes`` é o conjunto de ids (int) dos alunos presentes. A gravação
+    usa um único INSERT ... ON CONFLICT DO UPDATE sobre o unique_together
+    (matricula, disciplina, data_aula) de Frequencia, então o número de
+    consultas não depende do tamanho da turma.
+
+    Retorna a quantidade de alunos com frequência gravada.
+    """
+    with transaction.atomic():
+        _bloquear_turma(turma)
+        alunos = list(Aluno.objects.filter(turma_atual=turma).only('id', 'turma_atual_id'))
+        matriculas = _matriculas_da_turma(alunos, turma)
+
+        frequencias = [
+            Frequencia(
+                matricula_id=matricula_id,
+                disciplina=disciplina,
+                data_aula=data_aula,
+                presente=aluno_id in presentes
+            )
+            for aluno_id, matricula_id in matriculas.items()
+        ]
+        Frequencia.objects.bulk_create(
+            frequencias,
+            update_conflicts=True,
+            unique_fields=['matricula', 'disciplina', 'data_aula'],
+            update_fields=['presente'],
+        )
+
+        # bulk_create não dispara signals: os resumos dos alunos são refeitos aqui.
+        recalcular_resumos(matriculas.keys())
+
+    return len(frequencias)
@@ -0,0 +1,219 @@
+import json
+import math
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from escola.models import Aluno, Frequencia, Nota, Professor, Turma
+
+
+VIEWS = [
+    'dashboard_aluno', 'aluno_boletim', 'aluno_frequencia',
+    'professor_notas', 'coordenacao_relatorios', 'secretaria_alunos',
+]
+# A comparação com a baseline usa a mediana (p50): com poucas amostras o p95
+# é praticamente o maior tempo medido e uma pausa qualquer vira regressão.
+# Abaixo deste número de repetições nem a mediana é estável.
+MINIMO_REPETICOES_BASELINE = 20
+
+
+def _percentil(valores, percentual):
+    """Percentil pelo método do posto mais próximo."""
+    ordenados = sorted(valores)
+    posicao = max(math.ceil(percentual / 100 * len(ordenados)) - 1, 0)
+    return ordenados[posicao]
+
+
+class Command(BaseCommand):
+    help = 'Mede latência (p50/p95), consultas e pico de memória das views mais acessadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=20, help='Requisições medidas por view')
+        parser.add_argument('--aquecimento', type=int, default=2, help='Requisições descartadas antes da medição')
+        parser.add_argument('--view', action='append', choices=VIEWS, help='Mede só essa view (pode repetir)')
+        parser.add_argument('--turma', type=int, help='Turma usada nas medições (padrão: a com mais alunos)')
+        parser.add_argument('--cache-frio', action='store_true', help='Limpa o cache antes de cada requisição')
+        parser.add_argument('--saida', help='Grava o resultado em JSON nesse arquivo')
+        parser.add_argument('--baseline', help=(
+            'JSON de uma execução anterior para comparação (a do repositório é benchmarks/baseline_sqlite.json, '
+            f'medida com gerar_dados_escala padrão); exige --repeticoes >= {MINIMO_REPETICOES_BASELINE}'
+        ))
+        parser.add_argument('--tolerancia', type=float, default=20,
+                            help='Aumento percentual da mediana (p50) aceito em relação à baseline')
+
+    def handle(self, *args, **options):
+        if options['repeticoes'] < 1:
+            raise CommandError('--repeticoes deve ser maior que zero.')
+        if options['baseline'] and options['repeticoes'] < MINIMO_REPETICOES_BASELINE:
+            raise CommandError(
+                f'Para comparar com a baseline use --repeticoes {MINIMO_REPETICOES_BASELINE} ou mais.'
+            )
+
+        self.cache_frio = options['cache_frio']
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING(
+                'DEBUG está ligado: o registro de consultas entra nos tempos medidos.'
+            ))
+        rotas = self.montar_rotas(options['turma'])
+        resultados = {}
+        for nome in options['view'] or VIEWS:
+            usuario, url, parametros = rotas[nome]
+            resultados[nome] = self.medir(nome, usuario, url, parametros, options['repeticoes'], options['aquecimento'])
+            self.stdout.write(
+                f"  {nome:<24} p50 {resultados[nome]['p50_ms']:>8.1f} ms   p95 {resultados[nome]['p95_ms']:>8.1f} ms   "
+                f"{resultados[nome]['consultas']:>4} consultas   {resultados[nome]['memoria_pico_kb']:>8.0f} KB"
+            )
+
+        relatorio = {
+            'data': timezone.now().isoformat(),
+            'banco': connection.vendor,
+            'repeticoes': options['repeticoes'],
+            'cache_frio': self.cache_frio,
+            'debug': settings.DEBUG,
+            'dados': self.contar_dados(),
+            'views': resultados,
+        }
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultado gravado em {options['saida']}")
+
+        if options['baseline']:
+            self.comparar(relatorio, options['baseline'], options['tolerancia'])
+
+    def contar_dados(self):
+        return {
+            'alunos': Aluno.objects.count(),
+            'notas': Nota.objects.count(),
+            'frequencias': Frequencia.objects.count(),
+        }
+
+    def montar_rotas(self, turma_id):
+        turmas = Turma.objects.annotate(total_alunos=Count('alunos_turma')).order_by('-total_alunos')
+        turma = turmas.filter(id=turma_id).first() if turma_id else turmas.first()
+        if turma is None:
+            raise CommandError('Nenhuma turma encontrada. Gere dados com gerar_dados_escala.')
+
+        aluno = turma.alunos_turma.filter(user__isnull=False).order_by('id').first()
+        professor = (
+            Professor.objects.filter(user__isnull=False, turmas=turma, disciplinas__curso=turma.curso_id)
+            .order_by('id').first()
+        )
+        gestor = User.objects.filter(
+            Q(is_superuser=True) | Q(groups__name__iexact='secretaria'), is_active=True
+        ).order_by('-is_superuser', 'id').first()
+        coordenador = User.objects.filter(
+            Q(is_superuser=True) | Q(groups__name__iexact='coordenacao'), is_active=True
+        ).order_by('-is_superuser', 'id').first()
+        if not aluno or not professor or not gestor or not coordenador:
+            raise CommandError(
+                f'A turma {turma.codigo} precisa de um aluno e um professor com usuário, e o banco '
+                'precisa de um usuário da secretaria e um da coordenação (ou um superusuário). '
+                'O gerar_dados_escala cria todos eles.'
+            )
+
+        disciplina = professor.disciplinas.filter(curso=turma.curso_id).order_by('id').first()
+        self.stdout.write(
+            f'Turma {turma.codigo} ({turma.total_alunos} alunos), aluno {aluno.matricula}, '
+            f'professor {professor.nome}, disciplina {disciplina.nome}'
+        )
+        return {
+            'dashboard_aluno': (aluno.user, reverse('dashboard_aluno'), {}),
+            'aluno_boletim': (aluno.user, reverse('aluno_boletim'), {}),
+            'aluno_frequencia': (aluno.user, reverse('aluno_frequencia'), {}),
+            'professor_notas': (
+                professor.user, reverse('professor_notas'), {'turma': turma.id, 'disciplina': disciplina.id}
+            ),
+            'coordenacao_relatorios': (coordenador, reverse('coordenacao_relatorios'), {'turma': turma.id}),
+            'secretaria_alunos': (gestor, reverse('secretaria_alunos'), {}),
+        }
+
+    def requisitar(self, client, url, parametros):
+        if self.cache_frio:
+            cache.clear()
+        response = client.get(url, parametros, HTTP_HOST='localhost')
+        if response.status_code != 200:
+            raise CommandError(f'{url} respondeu {response.status_code}.')
+        return response
+
+    def medir(self, nome, usuario, url, parametros, repeticoes, aquecimento):
+        client = Client()
+        client.force_login(usuario)
+        for _ in range(aquecimento):
+            self.requisitar(client, url, parametros)
+
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            self.requisitar(client, url, parametros)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+
+        # Consultas e memória são medidas à parte para não distorcer os tempos.
+        # Com DEBUG ligado o log de consultas pode estar cheio (ele guarda só as
+        # últimas 9000), então é limpo antes; a contagem é lida logo em seguida,
+        # antes que a próxima requisição zere o log.
+        reset_queries()
+        with CaptureQueriesContext(connection) as consultas:
+            self.requisitar(client, url, parametros)
+        total_consultas = len(consultas)
+
+        tracemalloc.start()
+        try:
+            self.requisitar(client, url, parametros)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'url': url,
+            'p50_ms': round(_percentil(tempos, 50), 2),
+            'p95_ms': round(_percentil(tempos, 95), 2),
+            'media_ms': round(sum(tempos) / len(tempos), 2),
+            'consultas': total_consultas,
+            'memoria_pico_kb': round(pico / 1024, 1),
+        }
+
+    def comparar(self, relatorio, caminho, tolerancia):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+            views = baseline['views']
+        except (OSError, ValueError, KeyError) as erro:
+            raise CommandError(f'Não foi possível ler a baseline {caminho}: {erro}')
+
+        for campo in ('banco', 'dados'):
+            if campo in baseline and baseline[campo] != relatorio[campo]:
+                self.stdout.write(self.style.WARNING(
+                    f'  {campo} diferente da baseline: {baseline[campo]} (agora {relatorio[campo]})'
+                ))
+
+        regressoes = []
+        for nome, atual in relatorio['views'].items():
+            anterior = views.get(nome)
+            if anterior is None:
+                self.stdout.write(self.style.WARNING(f'  {nome}: sem baseline'))
+                continue
+            limite_p50 = anterior['p50_ms'] * (1 + tolerancia / 100)
+            if atual['p50_ms'] > limite_p50:
+                regressoes.append(
+                    f"{nome}: p50 {atual['p50_ms']} ms > {limite_p50:.2f} ms "
+                    f"(baseline {anterior['p50_ms']} ms + {tolerancia:g}%)"
+                )
+            if atual['consultas'] > anterior['consultas']:
+                regressoes.append(f"{nome}: {atual['consultas']} consultas > {anterior['consultas']} na baseline")
+
+        if regressoes:
+            for regressao in regressoes:
+                self.stderr.write(self.style.ERROR(f'  {regressao}'))
+            raise CommandError(f'{len(regressoes)} regressão(ões) em relação a {caminho}.')
+        self.stdout.write(self.style.SUCCESS(f'Sem regressões em relação a {caminho}.'))
@@ -0,0 +1,63 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from escola.contas import TAMANHO_LOTE, criar_contas
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria contas de usuário em lote a partir de um CSV com as colunas username, senha, '
+        'email, first_name, last_name e grupos (separados por "|"). Os hashes das senhas '
+        'são calculados em paralelo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV')
+        parser.add_argument('--grupo', action='append', default=[],
+                            help='Grupo dado a todas as contas (pode repetir), ex.: Aluno, Professor')
+        parser.add_argument('--delimitador', default=',', help='Separador de colunas do CSV')
+        parser.add_argument('--processos', type=int, default=None,
+                            help='Processos para calcular os hashes (padrão: um por núcleo)')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Linhas por INSERT em lote')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+                linhas = list(csv.DictReader(arquivo, delimiter=options['delimitador']))
+        except OSError as erro:
+            raise CommandError(f'Não foi possível ler o arquivo: {erro}')
+
+        contas = []
+        vistos = set()
+        for numero, linha in enumerate(linhas, start=2):
+            username = (linha.get('username') or '').strip()
+            if not username or username in vistos:
+                self.stdout.write(self.style.WARNING(f'  linha {numero}: username vazio ou repetido, ignorada'))
+                continue
+            vistos.add(username)
+            grupos = [nome.strip() for nome in (linha.get('grupos') or '').split('|') if nome.strip()]
+            contas.append({
+                'username': username,
+                'senha': linha.get('senha'),
+                'email': (linha.get('email') or '').strip(),
+                'first_name': (linha.get('first_name') or '').strip(),
+                'last_name': (linha.get('last_name') or '').strip(),
+                'grupos': grupos + options['grupo'],
+            })
+
+        existentes = set(
+            User.objects.filter(username__in=[conta['username'] for conta in contas])
+            .values_list('username', flat=True)
+        )
+        if existentes:
+            self.stdout.write(self.style.WARNING(f'  {len(existentes)} usuário(s) já existem e foram ignorados'))
+        contas = [conta for conta in contas if conta['username'] not in existentes]
+
+        inicio = time.perf_counter()
+        usuarios = criar_contas(contas, processos=options['processos'], tamanho_lote=max(options['lote'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(usuarios)} conta(s) criada(s) em {time.perf_counter() - inicio:.1f}s.'
+        ))
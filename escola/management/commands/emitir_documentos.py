@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from escola.documentos import TIPOS_AUTOMATICOS, DocumentoNaoGerado, emitir_documento
+from escola.models import Documento
+
+
+class Command(BaseCommand):
+    help = 'Emite agora as declarações de matrícula e os atestados de frequência pendentes'
+
+    def handle(self, *args, **options):
+        pendentes = list(
+            Documento.objects.filter(status='PENDENTE', tipo__in=TIPOS_AUTOMATICOS)
+            .order_by('data_solicitacao').values_list('id', flat=True)
+        )
+        emitidos = 0
+        for documento_id in pendentes:
+            try:
+                emitidos += emitir_documento(documento_id)
+            except DocumentoNaoGerado as erro:
+                self.stdout.write(self.style.WARNING(f'Documento #{documento_id}: {erro}'))
+
+        self.stdout.write(self.style.SUCCESS(f'{emitidos} de {len(pendentes)} documento(s) pendente(s) emitido(s).'))
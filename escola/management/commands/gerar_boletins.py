@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from escola.boletim import montar_boletins
+from escola.models import Aluno, Curso, Turma
+from escola.pdf_boletins import FORMATOS, gravar_boletins
+
+
+class Command(BaseCommand):
+    help = 'Gera os boletins de uma turma ou de um curso inteiro em um ZIP (um PDF por aluno) ou em um PDF único'
+
+    def add_arguments(self, parser):
+        alvo = parser.add_mutually_exclusive_group(required=True)
+        alvo.add_argument('--turma', help='ID ou código da turma')
+        alvo.add_argument('--curso', help='ID ou código do curso')
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='zip')
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: boletins_<código>.<formato>)')
+        parser.add_argument('--processos', type=int, default=None,
+                            help='Processos para desenhar os PDFs (padrão: um por núcleo)')
+
+    def buscar(self, modelo, valor):
+        filtro = {'id': valor} if valor.isdigit() else {'codigo': valor}
+        try:
+            return modelo.objects.get(**filtro)
+        except modelo.DoesNotExist:
+            raise CommandError(f'{modelo._meta.verbose_name} {valor} não encontrado(a).')
+
+    def handle(self, *args, **options):
+        if options['turma']:
+            turma = self.buscar(Turma, options['turma'])
+            alunos, codigo = Aluno.objects.filter(turma_atual=turma), turma.codigo
+        else:
+            curso = self.buscar(Curso, options['curso'])
+            alunos, codigo = Aluno.objects.filter(turma_atual__curso=curso), curso.codigo
+
+        formato = options['formato']
+        saida = options['saida'] or f'boletins_{codigo}.{formato}'
+
+        inicio = time.perf_counter()
+        boletins = montar_boletins(alunos)
+        with open(saida, 'wb') as arquivo:
+            gravar_boletins(boletins, formato, arquivo, options['processos'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(boletins)} boletins gravados em {saida} em {time.perf_counter() - inicio:.1f}s.'
+        ))
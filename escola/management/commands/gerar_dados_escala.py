@@ -0,0 +1,372 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as time_cls, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from escola.contadores import TEMPO_CACHE_CONTADORES, invalidar_contadores
+from escola.contas import criar_contas
+from escola.models import (
+    Aluno, Curso, Disciplina, Evento, Frequencia, HorarioAula, Matricula, Nota, Professor, Turma
+)
+from escola.resumos import recalcular_resumos
+
+
+CURSOS = [
+    ('INF', 'Técnico em Informática', 1200, [
+        'Programação I', 'Programação II', 'Banco de Dados',
+        'Redes de Computadores', 'Sistemas Operacionais', 'Web Design',
+    ]),
+    ('ADM', 'Técnico em Administração', 1000, [
+        'Contabilidade', 'Gestão de Pessoas', 'Marketing',
+        'Empreendedorismo', 'Gestão Financeira', 'Direito Empresarial',
+    ]),
+    ('ENF', 'Técnico em Enfermagem', 1800, [
+        'Anatomia', 'Fisiologia', 'Farmacologia',
+        'Enfermagem Clínica', 'Primeiros Socorros', 'Saúde Coletiva',
+    ]),
+]
+TURNOS = ['Manhã', 'Tarde', 'Noite']
+DIAS = ['SEG', 'TER', 'QUA', 'QUI', 'SEX']
+HORARIOS = ['07:00', '07:50', '08:40', '09:50', '10:40', '11:30']
+TIPOS_AVALIACAO = ['Prova 1', 'Prova 2', 'Trabalho', 'Recuperação', 'Seminário']
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor',
+         'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa',
+              'Ferreira', 'Almeida', 'Carvalho', 'Gomes', 'Ribeiro', 'Martins']
+
+
+def _inicio_do_semestre(hoje, atras):
+    """Data de início do semestre ``atras`` semestres antes do atual (0 = atual)."""
+    indice = hoje.year * 2 + (0 if hoje.month < 7 else 1) - atras
+    ano, metade = divmod(indice, 2)
+    return date(ano, 2 if metade == 0 else 8, 1), f'{ano}/{metade + 1}'
+
+
+def _iniciar_processo():
+    import django
+    django.setup()
+
+
+def _inserir_em_lote(modelo, campos, linhas, tamanho):
+    """
+    INSERT via executemany com tuplas prontas. Para milhões de linhas o custo
+    de bulk_create está em montar instâncias e compilar o SQL de cada lote.
+    """
+    quote = connection.ops.quote_name
+    colunas = [quote(modelo._meta.get_field(campo).column) for campo in campos]
+    sql = f"INSERT INTO {quote(modelo._meta.db_table)} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+    with transaction.atomic(), connection.cursor() as cursor:
+        for inicio in range(0, len(linhas), tamanho):
+            cursor.executemany(sql, linhas[inicio:inicio + tamanho])
+
+
+def _gerar_lote(parametros):
+    """
+    Gera notas e frequências de um lote de alunos e refaz os resumos deles.
+    Roda no processo principal ou em um processo do pool, com conexão própria.
+
+    O gerador aleatório é semeado pelo número do lote, então o resultado não
+    depende de quantos processos foram usados.
+    """
+    aleatorio = random.Random(f"{parametros['seed']}-{parametros['numero']}")
+    avaliacoes = TIPOS_AVALIACAO[:parametros['avaliacoes']]
+    notas = []
+    frequencias = []
+
+    for matricula_id, disciplinas_ids, inicio_semestre in parametros['matriculas']:
+        desempenho = min(max(aleatorio.gauss(7, 1.5), 1), 10)
+        assiduidade = aleatorio.uniform(0.6, 1)
+        data_lancamento = inicio_semestre + timedelta(days=60)
+        for posicao, disciplina_id in enumerate(disciplinas_ids):
+            for tipo in avaliacoes:
+                valor = min(max(aleatorio.gauss(desempenho, 1.2), 0), 10)
+                notas.append((matricula_id, disciplina_id, tipo, Decimal(f'{valor:.1f}'), data_lancamento))
+            for aula in range(parametros['aulas']):
+                frequencias.append((
+                    matricula_id, disciplina_id, inicio_semestre + timedelta(days=posicao + aula * 7),
+                    aleatorio.random() < assiduidade,
+                ))
+
+    _inserir_em_lote(
+        Nota, ['matricula', 'disciplina', 'tipo_avaliacao', 'valor', 'data_lancamento'], notas, parametros['lote']
+    )
+    _inserir_em_lote(
+        Frequencia, ['matricula', 'disciplina', 'data_aula', 'presente'], frequencias, parametros['lote']
+    )
+    recalcular_resumos(parametros['alunos_resumo'])
+    return len(notas), len(frequencias)
+
+
+class Command(BaseCommand):
+    help = 'Gera uma escola sintética em larga escala (alunos, turmas, notas e frequências) para testes de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alunos', type=int, default=1000, help='Quantidade de alunos')
+        parser.add_argument('--turmas', type=int, default=30, help='Turmas por semestre')
+        parser.add_argument('--semestres', type=int, default=2, help='Semestres de histórico (o último é o atual)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados; também prefixa os códigos gerados')
+        parser.add_argument('--aulas', type=int, default=20, help='Aulas por disciplina em cada semestre')
+        parser.add_argument('--avaliacoes', type=int, default=3, choices=range(1, len(TIPOS_AVALIACAO) + 1),
+                            help='Avaliações por disciplina em cada semestre')
+        parser.add_argument('--lote', type=int, default=5000, help='Linhas por INSERT em lote')
+        parser.add_argument('--alunos-por-lote', type=int, default=200,
+                            help='Alunos processados por tarefa de notas, frequências e resumos')
+        parser.add_argument('--processos', type=int, default=1,
+                            help='Processos paralelos para notas/frequências (ignorado no SQLite)')
+
+    def handle(self, *args, **options):
+        for opcao in ('alunos', 'turmas', 'semestres', 'lote', 'alunos_por_lote', 'processos'):
+            if options[opcao] < 1:
+                raise CommandError(f'--{opcao.replace("_", "-")} deve ser maior que zero.')
+
+        if not 0 <= options['seed'] < 1000:
+            raise CommandError('--seed deve estar entre 0 e 999 (ela compõe os CPFs gerados).')
+
+        self.seed = options['seed']
+        self.prefixo = f'G{self.seed}'
+        self.lote = options['lote']
+        self.aleatorio = random.Random(self.seed)
+        if Curso.objects.filter(codigo__startswith=f'{self.prefixo}-').exists():
+            raise CommandError(
+                f'Já existem dados gerados com a semente {self.seed}. Use outra --seed.'
+            )
+
+        inicio = time.perf_counter()
+        self.etapa('cursos e disciplinas', self.criar_cursos)
+        self.etapa('turmas', lambda: self.criar_turmas(options['turmas'], options['semestres']))
+        self.etapa('professores', self.criar_professores)
+        self.etapa('alunos', lambda: self.criar_alunos(options['alunos']))
+        self.etapa('secretaria e coordenação', self.criar_gestores)
+        self.etapa('matrículas', self.criar_matriculas)
+        self.etapa('horários e eventos', self.criar_horarios_eventos)
+        self.etapa('notas, frequências e resumos', lambda: self.criar_notas_frequencias(options))
+        # bulk_create não dispara signals: os totais dos dashboards são recontados.
+        # A invalidação fica aqui, uma vez e depois do pool, e não em _gerar_lote:
+        # nos processos do pool ela só limparia o cache local de cada um.
+        invalidar_contadores()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nEscola {self.prefixo} gerada em {time.perf_counter() - inicio:.1f}s.'
+        ))
+        if 'locmem' in settings.CACHES['default']['BACKEND'].lower():
+            self.stdout.write(
+                f'Servidores já em execução usam cache próprio em memória e mostram os novos '
+                f'totais em até {TEMPO_CACHE_CONTADORES // 60} minutos.'
+            )
+
+    def etapa(self, descricao, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        self.stdout.write(self.style.SUCCESS(
+            f'  {resultado} ({descricao}) em {time.perf_counter() - inicio:.1f}s'
+        ))
+
+    def criar_cursos(self):
+        self.cursos = Curso.objects.bulk_create([
+            Curso(codigo=f'{self.prefixo}-{sigla}', nome=nome, carga_horaria=carga)
+            for sigla, nome, carga, _ in CURSOS
+        ])
+        self.disciplinas_por_curso = {}
+        for curso, (_, _, _, nomes) in zip(self.cursos, CURSOS):
+            disciplinas = Disciplina.objects.bulk_create([Disciplina(nome=nome, curso=curso) for nome in nomes])
+            self.disciplinas_por_curso[curso.id] = [disciplina.id for disciplina in disciplinas]
+        total = sum(len(ids) for ids in self.disciplinas_por_curso.values())
+        return f'{len(self.cursos)} cursos, {total} disciplinas'
+
+    def criar_turmas(self, turmas_por_semestre, semestres):
+        hoje = date.today()
+        self.semestres = []
+        for atras in reversed(range(semestres)):
+            inicio_semestre, rotulo = _inicio_do_semestre(hoje, atras)
+            turmas = Turma.objects.bulk_create([
+                Turma(
+                    codigo=f'{self.prefixo}-{self.cursos[numero % len(self.cursos)].codigo[-3:]}-'
+                           f'{rotulo.replace("/", ".")}-{numero + 1}',
+                    semestre=rotulo,
+                    turno=TURNOS[numero % len(TURNOS)],
+                    curso=self.cursos[numero % len(self.cursos)],
+                )
+                for numero in range(turmas_por_semestre)
+            ])
+            self.semestres.append((inicio_semestre, turmas))
+        return f'{turmas_por_semestre * semestres} turmas'
+
+    def criar_professores(self):
+        turmas_atuais = self.semestres[-1][1]
+        professores = []
+        vinculos = []
+        for curso in self.cursos:
+            turmas_curso = [turma.id for turma in turmas_atuais if turma.curso_id == curso.id]
+            for disciplina_id in self.disciplinas_por_curso[curso.id]:
+                professores.append(Professor(
+                    nome=f'Prof. {self.aleatorio.choice(NOMES)} {self.aleatorio.choice(SOBRENOMES)}',
+                    email=f'{self.prefixo.lower()}.prof{disciplina_id}@escola.com',
+                    data_admissao=date.today() - timedelta(days=self.aleatorio.randint(30, 3650)),
+                ))
+                vinculos.append((disciplina_id, turmas_curso))
+        usuarios = User.objects.bulk_create([
+            User(username=professor.email.split('@')[0], email=professor.email, password=make_password(None))
+            for professor in professores
+        ])
+        for professor, usuario in zip(professores, usuarios):
+            professor.user_id = usuario.id
+        professores = Professor.objects.bulk_create(professores)
+
+        Professor.disciplinas.through.objects.bulk_create([
+            Professor.disciplinas.through(professor_id=professor.id, disciplina_id=disciplina_id)
+            for professor, (disciplina_id, _) in zip(professores, vinculos)
+        ])
+        Professor.turmas.through.objects.bulk_create([
+            Professor.turmas.through(professor_id=professor.id, turma_id=turma_id)
+            for professor, (_, turmas_ids) in zip(professores, vinculos)
+            for turma_id in turmas_ids
+        ], batch_size=self.lote)
+        return f'{len(professores)} professores'
+
+    def criar_alunos(self, quantidade):
+        # Senha inutilizável: evita o custo do hash; os testes de carga usam force_login.
+        senha = make_password(None)
+        turmas_atuais = self.semestres[-1][1]
+        prefixo = self.prefixo.lower()
+        self.alunos = []
+        for inicio in range(0, quantidade, self.lote):
+            numeros = range(inicio, min(inicio + self.lote, quantidade))
+            usuarios = User.objects.bulk_create([
+                User(username=f'{prefixo}.aluno{numero}', password=senha, email=f'{prefixo}.aluno{numero}@escola.com')
+                for numero in numeros
+            ])
+            self.alunos += Aluno.objects.bulk_create([
+                Aluno(
+                    user_id=usuario.id,
+                    matricula=f'{self.prefixo}-{numero:07d}',
+                    nome=f'{self.aleatorio.choice(NOMES)} {self.aleatorio.choice(SOBRENOMES)} '
+                         f'{self.aleatorio.choice(SOBRENOMES)}',
+                    email=usuario.email,
+                    cpf=f'{self.seed:03d}{numero:011d}',
+                    data_nascimento=date(2005, 1, 1) + timedelta(days=self.aleatorio.randint(0, 3650)),
+                    turma_atual=turmas_atuais[numero % len(turmas_atuais)],
+                )
+                for usuario, numero in zip(usuarios, numeros)
+            ])
+        return f'{len(self.alunos)} alunos'
+
+    def criar_gestores(self):
+        # Usuários que o benchmark_views usa nas rotas da secretaria e da coordenação.
+        prefixo = self.prefixo.lower()
+        usuarios = criar_contas([
+            {'username': f'{prefixo}.{papel}', 'email': f'{prefixo}.{papel}@escola.com', 'grupos': [grupo]}
+            for papel, grupo in (('secretaria', 'Secretaria'), ('coordenacao', 'Coordenacao'))
+        ])
+        return ', '.join(usuario.username for usuario in usuarios)
+
+    def criar_matriculas(self):
+        # Cada aluno passa pela turma de mesma posição em todos os semestres.
+        self.matriculas = []
+        ultimo = len(self.semestres) - 1
+        for indice, (inicio_semestre, turmas) in enumerate(self.semestres):
+            for inicio in range(0, len(self.alunos), self.lote):
+                alunos = self.alunos[inicio:inicio + self.lote]
+                novas = Matricula.objects.bulk_create([
+                    Matricula(
+                        aluno_id=aluno.id,
+                        turma=turmas[numero % len(turmas)],
+                        data_matricula=inicio_semestre,
+                        status='Ativo' if indice == ultimo else 'Concluido',
+                    )
+                    for numero, aluno in enumerate(alunos, start=inicio)
+                ])
+                self.matriculas += [
+                    (matricula.id, matricula.aluno_id,
+                     self.disciplinas_por_curso[matricula.turma.curso_id], inicio_semestre)
+                    for matricula in novas
+                ]
+        return f'{len(self.matriculas)} matrículas'
+
+    def criar_horarios_eventos(self):
+        inicio_semestre, turmas = self.semestres[-1]
+        horarios = []
+        for turma in turmas:
+            disciplinas = self.disciplinas_por_curso[turma.curso_id]
+            for posicao_dia, dia in enumerate(DIAS):
+                for posicao, inicio in enumerate(HORARIOS):
+                    hora_inicio = time_cls(*map(int, inicio.split(':')))
+                    horarios.append(HorarioAula(
+                        turma=turma,
+                        disciplina_id=disciplinas[(posicao + posicao_dia) % len(disciplinas)],
+                        dia_semana=dia,
+                        hora_inicio=hora_inicio,
+                        hora_fim=(datetime.combine(inicio_semestre, hora_inicio) + timedelta(minutes=50)).time(),
+                    ))
+        HorarioAula.objects.bulk_create(horarios, batch_size=self.lote)
+
+        tipos = [tipo for tipo, _ in Evento.TIPO_CHOICES]
+        eventos = Evento.objects.bulk_create([
+            Evento(
+                titulo=f'{dict(Evento.TIPO_CHOICES)[tipos[numero % len(tipos)]]} {numero + 1}',
+                data=inicio_semestre + timedelta(days=numero * 4),
+                tipo=tipos[numero % len(tipos)],
+                turma=turmas[numero % len(turmas)] if numero % 3 else None,
+            )
+            for numero in range(45)
+        ])
+        return f'{len(horarios)} horários, {len(eventos)} eventos'
+
+    def criar_notas_frequencias(self, options):
+        # Todas as matrículas de um aluno ficam no mesmo lote, assim cada lote
+        # também refaz os resumos dos seus alunos sem disputar linhas com os outros.
+        matriculas_por_aluno = {}
+        for matricula_id, aluno_id, disciplinas, inicio_semestre in self.matriculas:
+            matriculas_por_aluno.setdefault(aluno_id, []).append((matricula_id, disciplinas, inicio_semestre))
+
+        tamanho = options['alunos_por_lote']
+        alunos_ids = [aluno.id for aluno in self.alunos]
+        lotes = [
+            {
+                'numero': numero,
+                'seed': self.seed,
+                'lote': self.lote,
+                'aulas': options['aulas'],
+                'avaliacoes': options['avaliacoes'],
+                'matriculas': [
+                    matricula for aluno_id in alunos_ids[inicio:inicio + tamanho]
+                    for matricula in matriculas_por_aluno[aluno_id]
+                ],
+                'alunos_resumo': alunos_ids[inicio:inicio + tamanho],
+            }
+            for numero, inicio in enumerate(range(0, len(alunos_ids), tamanho))
+        ]
+
+        processos = options['processos']
+        if processos > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('  O SQLite não aceita escritas paralelas; usando um processo.'))
+            processos = 1
+
+        pool = None
+        if processos > 1:
+            # Os processos filhos abrem conexões próprias; as do processo principal
+            # não podem ser herdadas.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo)
+            resultados = pool.map(_gerar_lote, lotes)
+        else:
+            resultados = map(_gerar_lote, lotes)
+
+        total_notas = total_frequencias = 0
+        try:
+            for numero, (notas, frequencias) in enumerate(resultados, start=1):
+                total_notas += notas
+                total_frequencias += frequencias
+                self.stdout.write(
+                    f'    lote {numero}/{len(lotes)}: {total_notas} notas, {total_frequencias} frequências'
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return f'{total_notas} notas, {total_frequencias} frequências'
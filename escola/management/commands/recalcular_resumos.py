@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from escola.models import Aluno
+from escola.resumos import recalcular_resumos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos de notas e frequência dos alunos (use após cargas em lote)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aluno', type=int, action='append', help='ID do aluno (pode repetir)')
+        parser.add_argument('--turma', type=int, help='Recalcula apenas os alunos da turma')
+        parser.add_argument('--lote', type=int, default=500, help='Quantidade de alunos por lote')
+
+    def handle(self, *args, **options):
+        alunos = Aluno.objects.order_by('id')
+        if options['aluno']:
+            alunos = alunos.filter(id__in=options['aluno'])
+        if options['turma']:
+            alunos = alunos.filter(turma_atual_id=options['turma'])
+
+        ids = list(alunos.values_list('id', flat=True))
+        lote = max(options['lote'], 1)
+        total = 0
+        for inicio in range(0, len(ids), lote):
+            total += recalcular_resumos(ids[inicio:inicio + lote])
+            self.stdout.write(f'  {total}/{len(ids)} alunos recalculados')
+
+        self.stdout.write(self.style.SUCCESS(f'Resumos recalculados para {total} alunos.'))
@@ -0,0 +1,66 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from escola.tarefas import executar, limpar_tarefas, reservar_tarefa
+
+
+# Intervalo entre as limpezas das tarefas antigas, em segundos.
+INTERVALO_LIMPEZA = 3600
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano da fila (exportações, boletins, importações); rode um ou mais em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Segundos de espera quando a fila está vazia')
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Executa as tarefas disponíveis e termina')
+        parser.add_argument('--maximo', type=int, default=None,
+                            help='Termina depois de executar esse número de tarefas')
+        parser.add_argument('--manter-dias', type=int, default=7,
+                            help='Dias que as tarefas terminadas (e os arquivos) são mantidas')
+
+    def handle(self, *args, **options):
+        self.parar = False
+        # Termina a tarefa atual antes de sair.
+        anteriores = {numero: signal.signal(numero, self.pedir_parada) for numero in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            executadas = self.trabalhar(options)
+        finally:
+            for numero, tratador in anteriores.items():
+                signal.signal(numero, tratador)
+        self.stdout.write(self.style.SUCCESS(f'{executadas} tarefa(s) executada(s).'))
+
+    def trabalhar(self, options):
+        executadas = 0
+        ultima_limpeza = None
+        while not self.parar:
+            if ultima_limpeza is None or time.monotonic() - ultima_limpeza >= INTERVALO_LIMPEZA:
+                removidas = limpar_tarefas(options['manter_dias'])
+                if removidas:
+                    self.stdout.write(f'{removidas} tarefa(s) antiga(s) removida(s).')
+                ultima_limpeza = time.monotonic()
+
+            tarefa = reservar_tarefa()
+            if tarefa is None:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.perf_counter()
+            self.stdout.write(f'Tarefa #{tarefa.pk} ({tarefa.tipo}), tentativa {tarefa.tentativas}...')
+            if executar(tarefa):
+                self.stdout.write(f'  {tarefa.get_status_display()} em {time.perf_counter() - inicio:.1f}s.')
+            else:
+                self.stdout.write(self.style.WARNING('  Prazo vencido e tarefa assumida por outro worker; resultado descartado.'))
+            executadas += 1
+            if options['maximo'] and executadas >= options['maximo']:
+                break
+        return executadas
+
+    def pedir_parada(self, numero, quadro):
+        self.parar = True
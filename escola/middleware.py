@@ -0,0 +1,21 @@
+from django.utils.functional import SimpleLazyObject
+
+from .papeis import obter_papel
+from .perfis import PerfisDaRequisicao
+
+
+class PapelMiddleware:
+    """
+    Disponibiliza request.nexus_role com o papel do usuário e request.perfil
+    com os perfis de aluno/professor já acompanhados de turma, curso e
+    disciplinas. O papel fica guardado na sessão, então as verificações de
+    permissão das views não consultam grupos nem perfis a cada requisição.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.nexus_role = SimpleLazyObject(lambda: obter_papel(request))
+        request.perfil = PerfisDaRequisicao(request)
+        return self.get_response(request)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0008_add_professor_foto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoAluno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('soma_notas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_notas', models.IntegerField(default=0)),
+                ('total_aulas', models.IntegerField(default=0)),
+                ('total_faltas', models.IntegerField(default=0)),
+                ('percentual_frequencia', models.IntegerField(default=100)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('aluno', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumo', to='escola.aluno')),
+            ],
+            options={
+                'verbose_name': 'Resumo do Aluno',
+                'verbose_name_plural': 'Resumos dos Alunos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoDisciplina',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('soma_notas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_notas', models.IntegerField(default=0)),
+                ('total_aulas', models.IntegerField(default=0)),
+                ('total_faltas', models.IntegerField(default=0)),
+                ('percentual_frequencia', models.IntegerField(default=100)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_disciplina', to='escola.aluno')),
+                ('disciplina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_alunos', to='escola.disciplina')),
+            ],
+            options={
+                'verbose_name': 'Resumo por Disciplina',
+                'verbose_name_plural': 'Resumos por Disciplina',
+                'unique_together': {('aluno', 'disciplina')},
+            },
+        ),
+    ]
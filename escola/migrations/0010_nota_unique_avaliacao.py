@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:10
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remover_notas_duplicadas(apps, schema_editor):
+    """Mantém apenas a nota mais recente de cada (matricula, disciplina, tipo_avaliacao)."""
+    Nota = apps.get_model('escola', 'Nota')
+    duplicadas = Nota.objects.values('matricula', 'disciplina', 'tipo_avaliacao').annotate(
+        total=Count('id'), ultima=Max('id')
+    ).filter(total__gt=1)
+    for grupo in duplicadas:
+        Nota.objects.filter(
+            matricula=grupo['matricula'],
+            disciplina=grupo['disciplina'],
+            tipo_avaliacao=grupo['tipo_avaliacao'],
+        ).exclude(id=grupo['ultima']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0009_resumoaluno_resumodisciplina'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_notas_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together={('matricula', 'disciplina', 'tipo_avaliacao')},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0010_nota_unique_avaliacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evento',
+            name='data',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,110 @@
+from django.db import migrations
+
+
+# (tabela, tabela FTS5, colunas da FTS5, expressões SQL de cada coluna sobre "new.")
+INDICES_SQLITE = [
+    (
+        'escola_aluno', 'escola_aluno_busca', ['nome', 'matricula', 'email', 'cpf'],
+        ['{t}.nome', '{t}.matricula', '{t}.email',
+         "{t}.cpf || ' ' || replace(replace({t}.cpf, '.', ''), '-', '')"],
+    ),
+    (
+        'escola_professor', 'escola_professor_busca', ['nome', 'email', 'especialidade'],
+        ['{t}.nome', '{t}.email', '{t}.especialidade'],
+    ),
+    ('escola_aviso', 'escola_aviso_busca', ['titulo', 'conteudo'], ['{t}.titulo', '{t}.conteudo']),
+    ('escola_material', 'escola_material_busca', ['titulo', 'descricao'], ['{t}.titulo', '{t}.descricao']),
+]
+
+# Mesmas expressões de escola.busca.INDICES.
+INDICES_POSTGRES = [
+    (
+        'escola_aluno', 'escola_aluno_busca_idx',
+        "to_tsvector('simple', nexus_unaccent("
+        "coalesce(nome, '') || ' ' || coalesce(matricula, '') || ' ' || coalesce(email, '') || ' ' || "
+        "coalesce(cpf, '') || ' ' || replace(replace(coalesce(cpf, ''), '.', ''), '-', '')))",
+    ),
+    (
+        'escola_professor', 'escola_professor_busca_idx',
+        "to_tsvector('simple', nexus_unaccent("
+        "coalesce(nome, '') || ' ' || coalesce(email, '') || ' ' || coalesce(especialidade, '')))",
+    ),
+    (
+        'escola_aviso', 'escola_aviso_busca_idx',
+        "to_tsvector('simple', nexus_unaccent(coalesce(titulo, '') || ' ' || coalesce(conteudo, '')))",
+    ),
+    (
+        'escola_material', 'escola_material_busca_idx',
+        "to_tsvector('simple', nexus_unaccent(coalesce(titulo, '') || ' ' || coalesce(descricao, '')))",
+    ),
+]
+
+
+def criar_indices(apps, schema_editor):
+    executar = schema_editor.execute
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        for tabela, tabela_fts, colunas, expressoes in INDICES_SQLITE:
+            lista_colunas = ', '.join(colunas)
+            valores_novos = ', '.join(expressao.format(t='new') for expressao in expressoes)
+            executar(
+                f'CREATE VIRTUAL TABLE {tabela_fts} USING fts5('
+                f"{lista_colunas}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            executar(
+                f'INSERT INTO {tabela_fts}(rowid, {lista_colunas}) '
+                f"SELECT id, {', '.join(expressao.format(t=tabela) for expressao in expressoes)} FROM {tabela}"
+            )
+            executar(
+                f'CREATE TRIGGER {tabela_fts}_ai AFTER INSERT ON {tabela} BEGIN '
+                f'INSERT INTO {tabela_fts}(rowid, {lista_colunas}) VALUES (new.id, {valores_novos}); END'
+            )
+            executar(
+                f'CREATE TRIGGER {tabela_fts}_au AFTER UPDATE OF {lista_colunas} ON {tabela} BEGIN '
+                f'DELETE FROM {tabela_fts} WHERE rowid = old.id; '
+                f'INSERT INTO {tabela_fts}(rowid, {lista_colunas}) VALUES (new.id, {valores_novos}); END'
+            )
+            executar(
+                f'CREATE TRIGGER {tabela_fts}_ad AFTER DELETE ON {tabela} BEGIN '
+                f'DELETE FROM {tabela_fts} WHERE rowid = old.id; END'
+            )
+
+    elif vendor == 'postgresql':
+        executar('CREATE EXTENSION IF NOT EXISTS unaccent')
+        # unaccent() não é IMMUTABLE e por isso não pode entrar em um índice;
+        # fixar o dicionário permite declarar o invólucro como IMMUTABLE.
+        executar(
+            'CREATE OR REPLACE FUNCTION nexus_unaccent(text) RETURNS text AS '
+            "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+            'LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT'
+        )
+        for tabela, indice, documento in INDICES_POSTGRES:
+            executar(f'CREATE INDEX {indice} ON {tabela} USING gin ({documento})')
+
+
+def remover_indices(apps, schema_editor):
+    executar = schema_editor.execute
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        for _, tabela_fts, _, _ in INDICES_SQLITE:
+            for sufixo in ('ai', 'au', 'ad'):
+                executar(f'DROP TRIGGER IF EXISTS {tabela_fts}_{sufixo}')
+            executar(f'DROP TABLE IF EXISTS {tabela_fts}')
+
+    elif vendor == 'postgresql':
+        for _, indice, _ in INDICES_POSTGRES:
+            executar(f'DROP INDEX IF EXISTS {indice}')
+        executar('DROP FUNCTION IF EXISTS nexus_unaccent(text)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0012_listagem_nome_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+# Tabelas FTS5 usadas pelo autocompletar. Os índices de prefixo (2 e 3
+# caracteres) evitam percorrer todos os termos do índice a cada "joa*"; os
+# triggers da 0013_busca_textual continuam valendo para as tabelas recriadas.
+INDICES_SQLITE = [
+    (
+        'escola_aluno', 'escola_aluno_busca', ['nome', 'matricula', 'email', 'cpf'],
+        ['nome', 'matricula', 'email', "cpf || ' ' || replace(replace(cpf, '.', ''), '-', '')"],
+    ),
+    (
+        'escola_professor', 'escola_professor_busca', ['nome', 'email', 'especialidade'],
+        ['nome', 'email', 'especialidade'],
+    ),
+]
+
+
+def _recriar(schema_editor, opcoes):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    executar = schema_editor.execute
+    for tabela, tabela_fts, colunas, expressoes in INDICES_SQLITE:
+        lista_colunas = ', '.join(colunas)
+        executar(f'DROP TABLE IF EXISTS {tabela_fts}')
+        executar(
+            f'CREATE VIRTUAL TABLE {tabela_fts} USING fts5('
+            f"{lista_colunas}, tokenize='unicode61 remove_diacritics 2'{opcoes})"
+        )
+        executar(
+            f'INSERT INTO {tabela_fts}(rowid, {lista_colunas}) '
+            f"SELECT id, {', '.join(expressoes)} FROM {tabela}"
+        )
+
+
+def criar_prefixos(apps, schema_editor):
+    _recriar(schema_editor, ", prefix='2 3'")
+
+
+def remover_prefixos(apps, schema_editor):
+    _recriar(schema_editor, '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0013_busca_textual'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_prefixos, remover_prefixos),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0015_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoPapel',
+            fields=[
+                ('usuario_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('versao', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versão do Papel',
+                'verbose_name_plural': 'Versões dos Papéis',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:24
+
+import escola.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0016_versaopapel'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tarefa',
+            name='arquivo',
+            field=models.FileField(blank=True, null=True, upload_to=escola.models.caminho_do_resultado),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0017_tarefa_arquivo_aleatorio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarefa',
+            name='reserva',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
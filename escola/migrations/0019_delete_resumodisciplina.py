@@ -0,0 +1,16 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0018_tarefa_reserva'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ResumoDisciplina',
+        ),
+    ]
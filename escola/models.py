@@ -1,3 +1,6 @@
+import os
+import uuid
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -82,6 +85,10 @@ class Professor(models.Model):
     class Meta:
         verbose_name = "Professor"
         verbose_name_plural = "Professores"
+        indexes = [
+            # Ordem das listagens paginadas por chave (nome, id).
+            models.Index(fields=['nome', 'id'], name='professor_nome_id_idx'),
+        ]
 
 
 class Aviso(models.Model):
@@ -135,19 +142,23 @@ class Aluno(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.matricula})"
 
+    def obter_resumo(self):
+        from .resumos import obter_resumo_aluno
+        return obter_resumo_aluno(self)
+
     def calcular_media_geral(self):
-        notas = Nota.objects.filter(matricula__aluno=self)
-        if not notas.exists():
-            return 0
-        soma = sum([float(n.valor) for n in notas])
-        return round(soma / len(notas), 1)
+        return self.obter_resumo().media
 
     def contar_faltas(self):
-        return Frequencia.objects.filter(matricula__aluno=self, presente=False).count()
+        return self.obter_resumo().total_faltas
 
     class Meta:
         verbose_name = "Aluno"
         verbose_name_plural = "Alunos"
+        indexes = [
+            # Ordem das listagens paginadas por chave (nome, id).
+            models.Index(fields=['nome', 'id'], name='aluno_nome_id_idx'),
+        ]
 
 
 class Matricula(models.Model):
@@ -186,6 +197,7 @@ class Nota(models.Model):
     class Meta:
         verbose_name = "Nota"
         verbose_name_plural = "Notas"
+        unique_together = ['matricula', 'disciplina', 'tipo_avaliacao']
 
 
 class Frequencia(models.Model):
@@ -214,10 +226,11 @@ class Evento(models.Model):
         ('reuniao', 'Reunião'),
     ]
     titulo = models.CharField(max_length=200)
-    data = models.DateField()
+    data = models.DateField(db_index=True)
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     descricao = models.TextField(blank=True, null=True)
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE, null=True, blank=True)
+    data_atualizacao = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.titulo} ({self.data})"
@@ -354,3 +367,91 @@ class JustificativaFalta(models.Model):
         verbose_name = "Justificativa de Falta"
         verbose_name_plural = "Justificativas de Faltas"
         ordering = ['-data_solicitacao']
+
+
+class ResumoAluno(models.Model):
+    """Totais de notas e frequência do aluno, mantidos pelos signals de Nota e Frequencia."""
+    aluno = models.OneToOneField(Aluno, on_delete=models.CASCADE, related_name='resumo')
+    soma_notas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_notas = models.IntegerField(default=0)
+    total_aulas = models.IntegerField(default=0)
+    total_faltas = models.IntegerField(default=0)
+    percentual_frequencia = models.IntegerField(default=100)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Resumo - {self.aluno}"
+
+    @property
+    def media(self):
+        if not self.total_notas:
+            return 0
+        return round(float(self.soma_notas) / self.total_notas, 1)
+
+    class Meta:
+        verbose_name = "Resumo do Aluno"
+        verbose_name_plural = "Resumos dos Alunos"
+
+
+def caminho_do_resultado(instance, filename):
+    """Nome aleatório para o resultado: a pasta de mídia pode ser servida sem login."""
+    extensao = os.path.splitext(filename)[1]
+    return f'tarefas/{uuid.uuid4().hex}{extensao}'
+
+
+class Tarefa(models.Model):
+    """Trabalho demorado (exportações, boletins, documentos, importações) executado pelo comando run_worker; ver escola/tarefas.py."""
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDA', 'Concluída'),
+        ('FALHOU', 'Falhou'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    progresso = models.PositiveSmallIntegerField(default=0)
+    mensagem = models.CharField(max_length=255, blank=True)
+    arquivo = models.FileField(upload_to=caminho_do_resultado, blank=True, null=True)
+    erro = models.TextField(blank=True)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    maximo_tentativas = models.PositiveSmallIntegerField(default=3)
+    # Pendente: quando pode ser executada (espera entre tentativas).
+    # Executando: fim do prazo do worker, renovado a cada progresso.
+    disponivel_em = models.DateTimeField(default=timezone.now)
+    # Identifica a reserva atual: só o worker que a fez grava progresso e resultado.
+    reserva = models.UUIDField(blank=True, null=True)
+    criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tarefas')
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(blank=True, null=True)
+    data_conclusao = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['status', 'disponivel_em'], name='tarefa_fila_idx'),
+        ]
+
+
+class VersaoPapel(models.Model):
+    """
+    Versão do papel do usuário, trocada pelos signals quando grupos ou perfis
+    mudam. Fica no banco para que todos os processos vejam a troca.
+    """
+    # Sem chave estrangeira: os signals gravam a versão também durante a
+    # exclusão do próprio usuário (perfis removidos em cascata).
+    usuario_id = models.IntegerField(primary_key=True)
+    versao = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Papel de {self.usuario_id} (versão {self.versao})"
+
+    class Meta:
+        verbose_name = "Versão do Papel"
+        verbose_name_plural = "Versões dos Papéis"
@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+
+TAMANHO_PAGINA = 50
+
+
+def _codificar_cursor(valores):
+    texto = json.dumps(valores, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, total_campos):
+    """Valores do cursor, ou None se ele estiver malformado."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(texto)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(valores, list) or len(valores) != total_campos:
+        return None
+    return valores
+
+
+def _depois_de(ordenacao, valores, invertido=False):
+    """
+    Condição "vem depois de valores" na ordenação dada, comparando os campos
+    em ordem (nome, depois id): (a > x) OU (a = x E b > y) ...
+    """
+    condicoes = []
+    for posicao, campo in enumerate(ordenacao):
+        decrescente = campo.startswith('-')
+        nome = campo.lstrip('-')
+        operador = 'lt' if decrescente != invertido else 'gt'
+        iguais = {c.lstrip('-'): v for c, v in zip(ordenacao[:posicao], valores)}
+        condicoes.append(Q(**iguais, **{f'{nome}__{operador}': valores[posicao]}))
+    return reduce(or_, condicoes)
+
+
+def _inverter(ordenacao):
+    return [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in ordenacao]
+
+
+class PaginaPorChave:
+    """
+    Página de uma listagem paginada por chave (keyset): em vez de OFFSET, cada
+    página parte do último registro da anterior, então o custo não cresce com
+    o número da página. url_anterior/url_proximo são query strings que mantêm
+    os filtros da listagem e trocam só o cursor ('antes'/'apos').
+    """
+
+    def __init__(self, itens, ordenacao, tem_anterior, tem_proximo, total, parametros):
+        self.itens = itens
+        self.total = total
+        self.parametros = parametros
+        chave = [campo.lstrip('-') for campo in ordenacao]
+        self.url_anterior = self._url('antes', itens[0], chave) if itens and tem_anterior else None
+        self.url_proximo = self._url('apos', itens[-1], chave) if itens and tem_proximo else None
+
+    def _url(self, direcao, item, chave):
+        parametros = self.parametros.copy()
+        parametros.pop('antes', None)
+        parametros.pop('apos', None)
+        parametros[direcao] = _codificar_cursor([getattr(item, campo) for campo in chave])
+        return '?' + parametros.urlencode()
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __bool__(self):
+        return bool(self.itens)
+
+
+def paginar_por_chave(queryset, parametros, ordenacao=('nome', 'id'), tamanho=TAMANHO_PAGINA):
+    """
+    Retorna a PaginaPorChave de queryset indicada pelos parâmetros 'apos' ou
+    'antes' de request.GET. O último campo da ordenação precisa ser único
+    (normalmente o id) para que a chave defina a posição sem empates, e os
+    campos precisam ter valores que o JSON represente (texto e números).
+    Cursores inválidos levam à primeira página.
+    """
+    ordenacao = list(ordenacao)
+    total = queryset.count()
+
+    apos = _decodificar_cursor(parametros.get('apos', ''), len(ordenacao))
+    antes = _decodificar_cursor(parametros.get('antes', ''), len(ordenacao))
+
+    if antes is not None:
+        # Volta uma página: lê na ordem inversa a partir do cursor e desvira.
+        anteriores = queryset.filter(_depois_de(ordenacao, antes, invertido=True))
+        itens = list(anteriores.order_by(*_inverter(ordenacao))[:tamanho + 1])
+        tem_anterior = len(itens) > tamanho
+        itens = itens[:tamanho][::-1]
+        return PaginaPorChave(itens, ordenacao, tem_anterior, True, total, parametros)
+
+    if apos is not None:
+        queryset = queryset.filter(_depois_de(ordenacao, apos))
+    itens = list(queryset.order_by(*ordenacao)[:tamanho + 1])
+    tem_proximo = len(itens) > tamanho
+    return PaginaPorChave(itens[:tamanho], ordenacao, apos is not None, tem_proximo, total, parametros)
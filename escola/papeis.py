@@ -0,0 +1,154 @@
+import time
+
+
+CHAVE_SESSAO = 'nexus_papel'
+# O papel guardado na sessão também é revalidado depois desse tempo, para
+# cobrir alterações que os signals não veem (update em lote, SQL direto).
+VALIDADE_PAPEL = 300
+
+
+def versao_do_usuario(usuario_id):
+    """Versão atual do papel (uma consulta pela chave primária)."""
+    from .models import VersaoPapel
+
+    return VersaoPapel.objects.filter(usuario_id=usuario_id).values_list('versao', flat=True).first()
+
+
+def invalidar_papel(*usuarios_ids):
+    """
+    Faz as sessões desses usuários recalcularem o papel na próxima requisição.
+    A versão fica no banco, e não no cache: com um cache por processo (LocMem)
+    a troca feita em um worker não chegaria aos outros, e quem perdeu um
+    grupo manteria o acesso até o fim da validade.
+    """
+    from .models import VersaoPapel
+
+    versao = time.time_ns()
+    VersaoPapel.objects.bulk_create(
+        [VersaoPapel(usuario_id=usuario_id, versao=versao) for usuario_id in set(usuarios_ids) if usuario_id],
+        update_conflicts=True, unique_fields=['usuario_id'], update_fields=['versao'],
+    )
+
+
+class PapelNexus:
+    """
+    Papel do usuário no sistema, lido da sessão; do banco só se lê a versão.
+
+    Segue as regras das funções check_*_permission: o superusuário passa em
+    todas as verificações; secretaria e coordenação vêm dos grupos; aluno e
+    professor, do perfil vinculado ao usuário.
+    """
+
+    def __init__(self, superusuario=False, grupos=(), aluno_id=None, professor_id=None):
+        self.superusuario = superusuario
+        self.grupos = frozenset(grupos)
+        self.aluno_id = aluno_id
+        self.professor_id = professor_id
+
+    @property
+    def admin(self):
+        return self.superusuario
+
+    @property
+    def secretaria(self):
+        return self.superusuario or 'secretaria' in self.grupos
+
+    @property
+    def coordenacao(self):
+        return self.superusuario or 'coordenacao' in self.grupos
+
+    @property
+    def professor(self):
+        return self.superusuario or self.professor_id is not None
+
+    @property
+    def aluno(self):
+        return self.aluno_id is not None
+
+    @property
+    def principal(self):
+        """Nome do papel que define o dashboard inicial do usuário."""
+        if self.superusuario:
+            return 'admin'
+        if self.aluno_id is not None:
+            return 'aluno'
+        if self.professor_id is not None:
+            return 'professor'
+        if 'secretaria' in self.grupos:
+            return 'secretaria'
+        if 'coordenacao' in self.grupos:
+            return 'coordenacao'
+        return None
+
+    def __repr__(self):
+        return f'<PapelNexus {self.principal}>'
+
+
+def resolver_papel(user):
+    """
+    Consulta grupos e perfis do usuário. Usuários sem perfil vinculado mas com
+    aluno ou professor cadastrado com o mesmo e-mail são vinculados aqui.
+    """
+    from .models import Aluno, Professor
+
+    grupos = {nome.lower() for nome in user.groups.values_list('name', flat=True)}
+    aluno_id = Aluno.objects.filter(user=user).values_list('id', flat=True).first()
+    professor_id = Professor.objects.filter(user=user).values_list('id', flat=True).first()
+
+    if aluno_id is None and professor_id is None and user.email:
+        aluno_id = _vincular_por_email(Aluno, user)
+        if aluno_id is None:
+            professor_id = _vincular_por_email(Professor, user)
+
+    return PapelNexus(user.is_superuser, grupos, aluno_id, professor_id)
+
+
+def _vincular_por_email(modelo, user):
+    perfil = modelo.objects.filter(email=user.email).first()
+    if perfil is None or perfil.user_id not in (None, user.pk):
+        return None
+    if not perfil.user_id:
+        perfil.user = user
+        perfil.save()
+    return perfil.id
+
+
+def guardar_papel(request, user, papel, versao):
+    """
+    Guarda o papel na sessão com a versão lida antes de resolver_papel: se
+    o papel mudar no meio, a versão guardada já é a antiga e a próxima
+    requisição resolve de novo.
+    """
+    request.session[CHAVE_SESSAO] = {
+        'usuario': user.pk,
+        'grupos': sorted(papel.grupos),
+        'aluno': papel.aluno_id,
+        'professor': papel.professor_id,
+        'versao': versao,
+        'resolvido_em': time.time(),
+    }
+
+
+def obter_papel(request):
+    """
+    Papel do usuário da requisição. Usa o que está na sessão enquanto for do
+    mesmo usuário, estiver na validade e a versão não tiver mudado; senão
+    consulta o banco e guarda de novo.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return PapelNexus()
+
+    guardado = request.session.get(CHAVE_SESSAO)
+    versao = versao_do_usuario(user.pk)
+    if (
+        guardado
+        and guardado['usuario'] == user.pk
+        and time.time() - guardado['resolvido_em'] < VALIDADE_PAPEL
+        and guardado['versao'] == versao
+    ):
+        return PapelNexus(user.is_superuser, guardado['grupos'], guardado['aluno'], guardado['professor'])
+
+    papel = resolver_papel(user)
+    guardar_papel(request, user, papel, versao)
+    return papel
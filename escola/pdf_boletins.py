@@ -0,0 +1,156 @@
+"""
+Boletins e relatórios de frequência em PDF; os boletins também em lote.
+
+Em lote, os dados vêm de boletim.montar_boletins (três consultas para a
+turma ou o curso inteiro) e cada boletim é desenhado em um processo do pool,
+já que o reportlab ocupa só um núcleo. O resultado é um ZIP com um PDF por
+aluno ou um PDF único com uma página por aluno, gravado em um arquivo
+temporário e enviado em blocos.
+"""
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.http import FileResponse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from .boletim import montar_boletins
+
+
+FORMATOS = {'zip': 'application/zip', 'pdf': 'application/pdf'}
+# Abaixo disso iniciar os processos custa mais do que desenhar os boletins.
+MINIMO_PARA_POOL = 50
+TAMANHO_EM_MEMORIA = 8 * 1024 * 1024
+
+
+def _iniciar_processo():
+    import django
+    django.setup()
+
+
+def desenhar_boletim(p, boletim):
+    """Desenha o boletim (nome, matricula, turma e linhas) na página atual do canvas."""
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, 800, "Boletim Escolar - Nexus")
+    p.setFont("Helvetica", 12)
+    p.drawString(50, 780, f"Aluno: {boletim['nome']}")
+    p.drawString(50, 765, f"Matrícula: {boletim['matricula']}")
+    p.drawString(50, 750, f"Turma: {boletim['turma'] or 'Sem Turma'}")
+
+    p.line(50, 740, 550, 740)
+
+    y = 710
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(50, y, "DISCIPLINA")
+    p.drawString(250, y, "MÉDIA")
+    p.drawString(400, y, "SITUAÇÃO")
+    y -= 20
+
+    for item in boletim['linhas']:
+        status = item['status']
+
+        p.setFont("Helvetica", 10)
+        p.drawString(50, y, str(item['disciplina']))
+        p.drawString(250, y, str(item['media']))
+
+        if status == "Recuperação":
+            p.setFillColor(colors.red)
+        elif status == "Aprovado":
+            p.setFillColor(colors.green)
+        else:
+            p.setFillColor(colors.black)
+
+        p.drawString(400, y, status)
+        p.setFillColor(colors.black)
+        y -= 20
+
+    p.showPage()
+
+
+def pdf_do_boletim(boletim):
+    """Conteúdo (bytes) do PDF de um boletim."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    desenhar_boletim(p, boletim)
+    p.save()
+    return buffer.getvalue()
+
+
+def pdf_da_frequencia(frequencia):
+    """Conteúdo (bytes) do relatório de frequência (nome e linhas de frequencia_do_aluno)."""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, 800, "Relatório de Frequência - Nexus")
+    p.setFont("Helvetica", 12)
+    p.drawString(50, 780, f"Aluno: {frequencia['nome']}")
+
+    y = 740
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(50, y, "DISCIPLINA")
+    p.drawString(250, y, "FALTAS")
+    p.drawString(350, y, "% PRESENÇA")
+    y -= 20
+
+    for item in frequencia['linhas']:
+        p.setFont("Helvetica", 10)
+        p.drawString(50, y, str(item['disciplina']))
+        p.drawString(250, y, str(item['faltas']))
+        p.drawString(350, y, f"{item['porcentagem']}%")
+        y -= 20
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def _pdfs(boletins, processos):
+    processos = min(processos or os.cpu_count() or 1, len(boletins))
+    if processos < 2 or len(boletins) < MINIMO_PARA_POOL:
+        yield from map(pdf_do_boletim, boletins)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo)
+    try:
+        blocos = max(len(boletins) // (processos * 4), 1)
+        yield from pool.map(pdf_do_boletim, boletins, chunksize=blocos)
+    finally:
+        pool.shutdown()
+
+
+def gravar_boletins(boletins, formato, arquivo, processos=None, progresso=None):
+    """
+    Grava os boletins em `arquivo` (aberto para escrita binária): 'zip' com
+    um PDF por aluno, desenhados em paralelo, ou 'pdf' com uma página por
+    aluno. O PDF único é um só documento e por isso é desenhado em sequência.
+    Se informado, progresso(feitos, total) é chamado a cada boletim.
+    """
+    if formato == 'pdf':
+        p = canvas.Canvas(arquivo, pagesize=A4)
+        for feitos, boletim in enumerate(boletins, 1):
+            desenhar_boletim(p, boletim)
+            if progresso:
+                progresso(feitos, len(boletins))
+        p.save()
+        return
+
+    with zipfile.ZipFile(arquivo, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        for feitos, (boletim, conteudo) in enumerate(zip(boletins, _pdfs(boletins, processos)), 1):
+            pacote.writestr(f"{boletim['turma']}/boletim_{boletim['matricula']}.pdf", conteudo)
+            if progresso:
+                progresso(feitos, len(boletins))
+
+
+def resposta_boletins(alunos, formato, nome_arquivo, processos=None):
+    """Resposta com os boletins dos alunos (queryset), enviada em blocos."""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_EM_MEMORIA)
+    gravar_boletins(montar_boletins(alunos), formato, arquivo, processos)
+    arquivo.seek(0)
+    return FileResponse(
+        arquivo, as_attachment=True, filename=f'{nome_arquivo}.{formato}', content_type=FORMATOS[formato]
+    )
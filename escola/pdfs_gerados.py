@@ -0,0 +1,134 @@
+"""
+Cache em disco dos PDFs gerados para o aluno (boletim, frequência).
+
+Cada arquivo fica em MEDIA_ROOT/pdfs_gerados com nome (tipo, aluno,
+versão). A versão resume tudo o que aparece no documento: dados do aluno,
+turma e disciplinas do curso e a data de atualização do ResumoAluno, que os
+signals de Nota e Frequencia (e o recálculo em lote) renovam a cada
+alteração. Enquanto a versão não muda, o mesmo arquivo é servido, com ETag
+igual à versão, sem passar pelo reportlab. Passado o tamanho máximo da
+pasta, os arquivos usados há mais tempo são removidos.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import salted_hmac
+from django.utils.http import quote_etag
+
+from .perfis import disciplinas_do_aluno
+from .resumos import obter_resumo_aluno
+
+
+PASTA = 'pdfs_gerados'
+# Muda quando o desenho dos PDFs muda, descartando os arquivos antigos.
+VERSAO_LEIAUTE = 1
+# Ao passar do limite, remove até a pasta ficar com essa fração dele.
+FRACAO_APOS_LIMPEZA = 0.8
+
+
+def _pasta():
+    pasta = os.path.join(settings.MEDIA_ROOT, PASTA)
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def versao_dos_dados(aluno):
+    """
+    Versão dos dados do aluno que aparecem nos PDFs. Com o perfil carregado
+    por carregar_aluno custa uma consulta (o resumo). O HMAC com a SECRET_KEY
+    torna o nome do arquivo impossível de adivinhar.
+    """
+    resumo = obter_resumo_aluno(aluno)
+    turma = aluno.turma_atual.codigo if aluno.turma_atual_id else ''
+    partes = [
+        VERSAO_LEIAUTE, aluno.pk, aluno.nome, aluno.matricula, turma,
+        disciplinas_do_aluno(aluno) if aluno.turma_atual_id else [],
+        resumo.data_atualizacao.isoformat(),
+    ]
+    return salted_hmac('escola.pdfs_gerados', repr(partes)).hexdigest()[:32]
+
+
+def _limpar(pasta, tamanho_maximo, substituidos, manter):
+    """
+    Remove as versões antigas (nomes começando com `substituidos`) e depois
+    os arquivos usados há mais tempo (mtime) até a pasta caber no limite,
+    sempre preservando o arquivo `manter`.
+    """
+    arquivos = []
+    total = os.path.getsize(manter)
+    for entrada in os.scandir(pasta):
+        if not entrada.is_file() or entrada.path == manter:
+            continue
+        if entrada.name.startswith(substituidos):
+            _remover(entrada.path)
+            continue
+        informacoes = entrada.stat()
+        arquivos.append((informacoes.st_mtime, informacoes.st_size, entrada.path))
+        total += informacoes.st_size
+
+    if total <= tamanho_maximo:
+        return
+    for _, tamanho, caminho in sorted(arquivos):
+        _remover(caminho)
+        total -= tamanho
+        if total <= tamanho_maximo * FRACAO_APOS_LIMPEZA:
+            break
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def caminho_do_pdf(tipo, aluno, versao, gerar):
+    """
+    Caminho do PDF `tipo` do aluno na versão dada. Na primeira vez chama
+    gerar() (que retorna os bytes), grava o arquivo e remove as versões
+    anteriores; nas seguintes só marca o arquivo como usado agora.
+    """
+    pasta = _pasta()
+    prefixo = f'{tipo}-{aluno.pk}-'
+    caminho = os.path.join(pasta, f'{prefixo}{versao}.pdf')
+    try:
+        os.utime(caminho)
+        return caminho
+    except FileNotFoundError:
+        pass
+
+    # Grava em um temporário e renomeia: requisições simultâneas nunca leem
+    # um arquivo pela metade.
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(gerar())
+        # O nome definitivo só aparece depois da limpeza das versões antigas.
+        _limpar(pasta, settings.PDFS_GERADOS_TAMANHO_MAXIMO, prefixo, manter=temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        # Erro em gerar() ou na gravação: o temporário não fica ocupando a pasta.
+        _remover(temporario)
+        raise
+    return caminho
+
+
+def resposta_pdf(request, tipo, aluno, nome_arquivo, gerar):
+    """
+    Resposta com o PDF do aluno vindo do cache: 304 se o navegador já tem
+    a versão atual (If-None-Match), senão o arquivo, gerado só se preciso.
+    """
+    versao = versao_dos_dados(aluno)
+    etag = quote_etag(versao)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(
+            open(caminho_do_pdf(tipo, aluno, versao, gerar), 'rb'),
+            as_attachment=True, filename=nome_arquivo, content_type='application/pdf',
+        )
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
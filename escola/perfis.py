@@ -0,0 +1,64 @@
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
+
+from .models import Aluno, Disciplina, Professor, Turma
+
+
+def carregar_aluno(aluno_id):
+    """Aluno com turma, curso e disciplinas do curso em duas consultas."""
+    return (
+        Aluno.objects.select_related('turma_atual__curso')
+        .prefetch_related('turma_atual__curso__disciplinas')
+        .filter(id=aluno_id).first()
+    )
+
+
+def carregar_professor(professor_id):
+    """Professor com turmas (e seus cursos) e disciplinas em três consultas."""
+    return (
+        Professor.objects.prefetch_related(
+            Prefetch('turmas', queryset=Turma.objects.select_related('curso')),
+            'disciplinas',
+        )
+        .filter(id=professor_id).first()
+    )
+
+
+def disciplinas_do_aluno(aluno):
+    """
+    Pares (id, nome) das disciplinas do curso do aluno, ordenados por id.
+    Aproveita as disciplinas já trazidas por carregar_aluno; sem elas, consulta.
+    """
+    if Aluno.turma_atual.is_cached(aluno) and aluno.turma_atual is not None:
+        curso = aluno.turma_atual.curso
+        if 'disciplinas' in getattr(curso, '_prefetched_objects_cache', {}):
+            return sorted((disciplina.id, disciplina.nome) for disciplina in curso.disciplinas.all())
+    return list(
+        Disciplina.objects.filter(curso__turma=aluno.turma_atual_id).order_by('id').values_list('id', 'nome')
+    )
+
+
+class PerfisDaRequisicao:
+    """
+    Perfis de aluno e professor do usuário da requisição, carregados só quando
+    acessados e no máximo uma vez. O perfil carregado também fica em
+    request.user.perfil_aluno / perfil_professor.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def _vincular(self, perfil):
+        if perfil is not None:
+            perfil.user = self.request.user
+        return perfil
+
+    @cached_property
+    def aluno(self):
+        aluno_id = self.request.nexus_role.aluno_id
+        return self._vincular(carregar_aluno(aluno_id)) if aluno_id is not None else None
+
+    @cached_property
+    def professor(self):
+        professor_id = self.request.nexus_role.professor_id
+        return self._vincular(carregar_professor(professor_id)) if professor_id is not None else None
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+
+from .models import Aluno, Frequencia, Nota
+from .resumos import calcular_percentual, recalcular_resumos
+
+
+CHAVE_INDICADORES_GERAIS = 'relatorios:indicadores_gerais'
+TEMPO_CACHE_INDICADORES = 300
+
+
+def alunos_com_indicadores(turma):
+    """
+    Alunos da turma em ordem de nome, com o ResumoAluno (média, total de
+    aulas e porcentagem de frequência) lido na mesma consulta. Os resumos
+    que ainda não existem são calculados juntos, de uma vez.
+    """
+    alunos = Aluno.objects.filter(turma_atual=turma).select_related('resumo').order_by('nome')
+    sem_resumo = [aluno.pk for aluno in alunos if not hasattr(aluno, 'resumo')]
+    if sem_resumo:
+        recalcular_resumos(sem_resumo)
+        alunos = alunos.all()
+    return list(alunos)
+
+
+def indicadores_gerais():
+    """Média geral de notas e frequência média da escola, guardadas em cache."""
+    indicadores = cache.get(CHAVE_INDICADORES_GERAIS)
+    if indicadores is None:
+        media = Nota.objects.aggregate(avg=Avg('valor'))['avg']
+        frequencias = Frequencia.objects.aggregate(
+            total=Count('id'), presencas=Count('id', filter=Q(presente=True))
+        )
+        indicadores = {
+            'media_geral': round(float(media), 1) if media else None,
+            'frequencia_media': (
+                calcular_percentual(frequencias['total'], frequencias['total'] - frequencias['presencas'])
+                if frequencias['total'] else None
+            ),
+        }
+        cache.set(CHAVE_INDICADORES_GERAIS, indicadores, TEMPO_CACHE_INDICADORES)
+    return indicadores
@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Aluno, Frequencia, Nota, ResumoAluno
+
+
+PERCENTUAL_FREQUENCIA = Case(
+    When(total_aulas=0, then=Value(100)),
+    default=(F('total_aulas') - F('total_faltas')) * 100 / F('total_aulas'),
+    output_field=IntegerField(),
+)
+
+
+def calcular_percentual(total_aulas, total_faltas):
+    if total_aulas <= 0:
+        return 100
+    return int(((total_aulas - total_faltas) / total_aulas) * 100)
+
+
+def _novo_total():
+    return {'soma_notas': Decimal('0'), 'total_notas': 0, 'total_aulas': 0, 'total_faltas': 0}
+
+
+def recalcular_resumos(alunos_ids=None):
+    """
+    Recalcula do zero os resumos dos alunos informados (ou de todos os alunos).
+
+    Usa duas consultas agrupadas por aluno, uma para as notas e outra para as
+    frequências, e regrava os resumos em lote.
+    """
+    notas = Nota.objects.all()
+    frequencias = Frequencia.objects.all()
+    alunos = Aluno.objects.all()
+    if alunos_ids is not None:
+        alunos_ids = list(alunos_ids)
+        notas = notas.filter(matricula__aluno_id__in=alunos_ids)
+        frequencias = frequencias.filter(matricula__aluno_id__in=alunos_ids)
+        alunos = alunos.filter(id__in=alunos_ids)
+
+    por_aluno = {aluno_id: _novo_total() for aluno_id in alunos.values_list('id', flat=True)}
+    agrupadas = notas.values('matricula__aluno_id').annotate(soma=Sum('valor'), total=Count('id')).order_by()
+    for linha in agrupadas:
+        totais = por_aluno.get(linha['matricula__aluno_id'])
+        if totais is not None:
+            totais['soma_notas'] += linha['soma'] or 0
+            totais['total_notas'] += linha['total']
+
+    agrupadas = frequencias.values('matricula__aluno_id').annotate(
+        total=Count('id'), faltas=Count('id', filter=Q(presente=False))
+    ).order_by()
+    for linha in agrupadas:
+        totais = por_aluno.get(linha['matricula__aluno_id'])
+        if totais is not None:
+            totais['total_aulas'] += linha['total']
+            totais['total_faltas'] += linha['faltas']
+
+    resumos_aluno = [
+        ResumoAluno(
+            aluno_id=aluno_id,
+            percentual_frequencia=calcular_percentual(totais['total_aulas'], totais['total_faltas']),
+            **totais
+        )
+        for aluno_id, totais in por_aluno.items()
+    ]
+
+    with transaction.atomic():
+        ResumoAluno.objects.filter(aluno_id__in=por_aluno.keys()).delete()
+        ResumoAluno.objects.bulk_create(resumos_aluno, batch_size=1000)
+
+    return len(resumos_aluno)
+
+
+def aplicar_variacao(aluno_id, soma_notas=0, total_notas=0, total_aulas=0, total_faltas=0, criar=True):
+    """
+    Soma uma variação ao resumo do aluno com UPDATE ... SET campo = campo + x.
+
+    Se o resumo ainda não existir e ``criar`` for verdadeiro, ele é
+    recalculado do zero.
+    """
+    alteracoes = {
+        'soma_notas': F('soma_notas') + Decimal(str(soma_notas)),
+        'total_notas': F('total_notas') + total_notas,
+        'total_aulas': F('total_aulas') + total_aulas,
+        'total_faltas': F('total_faltas') + total_faltas,
+        'data_atualizacao': timezone.now(),
+    }
+    resumo_aluno = ResumoAluno.objects.filter(aluno_id=aluno_id)
+
+    with transaction.atomic():
+        atualizados = resumo_aluno.update(**alteracoes)
+        if total_aulas or total_faltas:
+            resumo_aluno.update(percentual_frequencia=PERCENTUAL_FREQUENCIA)
+
+    if criar and not atualizados:
+        recalcular_resumos([aluno_id])
+
+
+def obter_resumo_aluno(aluno):
+    """Retorna o resumo do aluno, calculando-o na primeira vez que for pedido."""
+    try:
+        return aluno.resumo
+    except ResumoAluno.DoesNotExist:
+        recalcular_resumos([aluno.pk])
+        aluno.resumo = ResumoAluno.objects.get(aluno=aluno)
+        return aluno.resumo
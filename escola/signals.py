@@ -1,4 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from decimal import Decimal
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -20,3 +23,205 @@ def criar_matricula_para_aluno(sender, instance, created, **kwargs):
                 data_matricula=timezone.now().date(),
                 status='Ativo'
             )
+
+
+def _aluno_do_resumo(instance):
+    return instance.matricula.aluno_id
+
+
+def _variacao_nota(instance, sinal):
+    return {'soma_notas': sinal * Decimal(str(instance.valor)), 'total_notas': sinal}
+
+
+def _variacao_frequencia(instance, sinal):
+    return {'total_aulas': sinal, 'total_faltas': sinal * (0 if instance.presente else 1)}
+
+
+def _guardar_estado_anterior(sender, instance):
+    instance._resumo_anterior = None
+    if instance.pk:
+        instance._resumo_anterior = sender.objects.select_related('matricula').filter(pk=instance.pk).first()
+
+
+def _atualizar_resumo_apos_salvar(instance, calcular_variacao):
+    from .resumos import aplicar_variacao
+
+    variacoes = {}
+    anterior = getattr(instance, '_resumo_anterior', None)
+    if anterior is not None:
+        variacoes[_aluno_do_resumo(anterior)] = calcular_variacao(anterior, -1)
+
+    aluno_id = _aluno_do_resumo(instance)
+    atual = calcular_variacao(instance, 1)
+    if aluno_id in variacoes:
+        atual = {campo: valor + variacoes[aluno_id][campo] for campo, valor in atual.items()}
+    variacoes[aluno_id] = atual
+
+    for aluno_id, variacao in variacoes.items():
+        aplicar_variacao(aluno_id, **variacao)
+
+
+@receiver(pre_save, sender='escola.Nota')
+def guardar_nota_anterior(sender, instance, **kwargs):
+    _guardar_estado_anterior(sender, instance)
+
+
+@receiver(post_save, sender='escola.Nota')
+def atualizar_resumo_nota(sender, instance, **kwargs):
+    _atualizar_resumo_apos_salvar(instance, _variacao_nota)
+
+
+@receiver(post_delete, sender='escola.Nota')
+def remover_nota_do_resumo(sender, instance, **kwargs):
+    from .resumos import aplicar_variacao
+
+    aplicar_variacao(_aluno_do_resumo(instance), criar=False, **_variacao_nota(instance, -1))
+
+
+@receiver(pre_save, sender='escola.Frequencia')
+def guardar_frequencia_anterior(sender, instance, **kwargs):
+    _guardar_estado_anterior(sender, instance)
+
+
+@receiver(post_save, sender='escola.Frequencia')
+def atualizar_resumo_frequencia(sender, instance, **kwargs):
+    _atualizar_resumo_apos_salvar(instance, _variacao_frequencia)
+
+
+@receiver(post_delete, sender='escola.Frequencia')
+def remover_frequencia_do_resumo(sender, instance, **kwargs):
+    from .resumos import aplicar_variacao
+
+    aplicar_variacao(_aluno_do_resumo(instance), criar=False, **_variacao_frequencia(instance, -1))
+
+
+@receiver(pre_save, sender='escola.HorarioAula')
+def guardar_turma_anterior_do_horario(sender, instance, **kwargs):
+    instance._turma_anterior_id = None
+    if instance.pk:
+        instance._turma_anterior_id = sender.objects.filter(pk=instance.pk).values_list('turma_id', flat=True).first()
+
+
+@receiver(post_save, sender='escola.HorarioAula')
+@receiver(post_delete, sender='escola.HorarioAula')
+def invalidar_grade_do_horario(sender, instance, **kwargs):
+    from .horarios import invalidar_grade
+
+    invalidar_grade(instance.turma_id, getattr(instance, '_turma_anterior_id', None))
+
+
+@receiver(post_save, sender='escola.Disciplina')
+def invalidar_grades_da_disciplina(sender, instance, created, **kwargs):
+    from .horarios import invalidar_grade
+    from .models import HorarioAula
+
+    if not created:
+        invalidar_grade(*HorarioAula.objects.filter(disciplina=instance).values_list('turma_id', flat=True).distinct())
+
+
+@receiver(post_save, sender='escola.Turma')
+def invalidar_grade_da_turma(sender, instance, created, **kwargs):
+    from .horarios import invalidar_grade
+
+    if not created:
+        invalidar_grade(instance.pk)
+
+
+@receiver(user_logged_in)
+def resolver_papel_no_login(sender, request, user, **kwargs):
+    from .papeis import guardar_papel, resolver_papel, versao_do_usuario
+
+    if request is None or not hasattr(request, 'session'):
+        return
+    versao = versao_do_usuario(user.pk)
+    request.nexus_role = resolver_papel(user)
+    guardar_papel(request, user, request.nexus_role, versao)
+
+
+@receiver(m2m_changed, sender='auth.User_groups')
+def invalidar_papel_dos_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    from .papeis import invalidar_papel
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidar_papel(instance.pk)
+    elif action == 'pre_clear':
+        invalidar_papel(*instance.user_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidar_papel(*pk_set)
+
+
+@receiver(post_save, sender='auth.Group')
+def invalidar_papel_do_grupo_renomeado(sender, instance, created, **kwargs):
+    from .papeis import invalidar_papel
+
+    if not created:
+        invalidar_papel(*instance.user_set.values_list('id', flat=True))
+
+
+@receiver(pre_save, sender='escola.Aluno')
+@receiver(pre_save, sender='escola.Professor')
+def guardar_usuario_anterior_do_perfil(sender, instance, **kwargs):
+    instance._usuario_anterior_id = None
+    if instance.pk:
+        instance._usuario_anterior_id = sender.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender='escola.Aluno')
+@receiver(post_save, sender='escola.Professor')
+@receiver(post_delete, sender='escola.Aluno')
+@receiver(post_delete, sender='escola.Professor')
+def invalidar_papel_do_perfil(sender, instance, **kwargs):
+    from .papeis import invalidar_papel
+
+    anterior = getattr(instance, '_usuario_anterior_id', None)
+    if kwargs.get('created') is False and anterior == instance.user_id:
+        return
+    invalidar_papel(instance.user_id, anterior)
+
+
+@receiver(post_save, sender='auth.User')
+@receiver(post_save, sender='escola.Aluno')
+@receiver(post_save, sender='escola.Professor')
+@receiver(post_save, sender='escola.Turma')
+@receiver(post_save, sender='escola.Curso')
+@receiver(post_save, sender='escola.Evento')
+@receiver(post_save, sender='escola.Documento')
+@receiver(post_save, sender='escola.JustificativaFalta')
+def atualizar_contadores_apos_salvar(sender, instance, created, **kwargs):
+    from .contadores import invalidar_contadores_do_modelo
+
+    invalidar_contadores_do_modelo(sender, alterou_quantidade=created)
+
+
+@receiver(post_delete, sender='auth.User')
+@receiver(post_delete, sender='escola.Aluno')
+@receiver(post_delete, sender='escola.Professor')
+@receiver(post_delete, sender='escola.Turma')
+@receiver(post_delete, sender='escola.Curso')
+@receiver(post_delete, sender='escola.Evento')
+@receiver(post_delete, sender='escola.Documento')
+@receiver(post_delete, sender='escola.JustificativaFalta')
+def atualizar_contadores_apos_excluir(sender, instance, **kwargs):
+    from .contadores import invalidar_contadores_do_modelo
+
+    invalidar_contadores_do_modelo(sender, alterou_quantidade=True)
+
+
+@receiver(post_save, sender='escola.Turma')
+@receiver(post_delete, sender='escola.Turma')
+@receiver(post_save, sender='escola.Curso')
+@receiver(post_delete, sender='escola.Curso')
+def invalidar_autocompletar_turmas(sender, instance, **kwargs):
+    from .autocompletar import invalidar_turmas
+
+    invalidar_turmas()
+
+
+@receiver(post_save, sender='escola.Documento')
+def emitir_documento_automatico(sender, instance, created, **kwargs):
+    from .documentos import TIPOS_AUTOMATICOS
+    from .tarefas import enfileirar
+
+    if created and instance.status == 'PENDENTE' and instance.tipo in TIPOS_AUTOMATICOS:
+        enfileirar('emitir_documento', {'documento_id': instance.pk}, usuario=instance.criado_por)
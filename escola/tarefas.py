@@ -0,0 +1,293 @@
+"""
+Fila de tarefas em segundo plano guardada no próprio banco (modelo Tarefa).
+
+As views enfileiram o trabalho demorado com enfileirar() e devolvem a
+página de acompanhamento; o comando run_worker reserva as tarefas com
+reservar_tarefa() e as executa com executar(). Em bancos com
+SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL) cada worker pula as linhas
+já travadas por outro; no SQLite, que só trava o banco inteiro, a reserva
+é um UPDATE condicional no status, que só um dos workers consegue fazer.
+
+Uma tarefa que falha volta para a fila com espera crescente (30s, 60s,
+120s, ...) até esgotar as tentativas. A reserva tem prazo, renovado a cada
+progresso: se o worker morrer no meio, a tarefa volta a ficar disponível
+quando o prazo acabar. Cada reserva tem um identificador próprio, e as
+gravações do worker (progresso, resultado, nova tentativa) só valem para a
+reserva atual; um worker que perdeu a reserva descarta o que produziu.
+"""
+import tempfile
+import traceback
+import uuid
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .boletim import montar_boletins
+from .documentos import DocumentoNaoGerado, emitir_documento
+from .exportacao import PLANILHAS, contar_linhas, escrever_xlsx, linhas_da_planilha
+from .importacao import ErroImportacao, ResultadoImportacao, escrever_relatorio, importar_alunos, ler_linhas
+from .models import Aluno, Tarefa
+from .pdf_boletins import gravar_boletins
+
+
+PRAZO_EXECUCAO = timedelta(minutes=10)
+ESPERA_ENTRE_TENTATIVAS = timedelta(seconds=30)
+ESPERA_MAXIMA = timedelta(hours=1)
+
+TAREFAS = {}
+AO_TERMINAR = {}
+
+
+class ErroTarefa(Exception):
+    """Erro definitivo (parâmetros inválidos, registro inexistente): não adianta tentar de novo."""
+
+
+class ReservaPerdida(Exception):
+    """O prazo da reserva venceu e outro worker assumiu a tarefa."""
+
+
+def registrar_tarefa(tipo, ao_terminar=None):
+    """
+    Registra a função que executa as tarefas do `tipo`. Ela recebe a Tarefa
+    e os parâmetros como argumentos nomeados e retorna None ou
+    (nome_do_arquivo, arquivo aberto) com o resultado. ao_terminar(tarefa),
+    se informada, roda uma vez quando a tarefa é concluída ou falha de vez,
+    e não entre tentativas: é o lugar de remover os arquivos de entrada.
+    """
+    def registrar(funcao):
+        TAREFAS[tipo] = funcao
+        if ao_terminar is not None:
+            AO_TERMINAR[tipo] = ao_terminar
+        return funcao
+    return registrar
+
+
+def enfileirar(tipo, parametros=None, usuario=None, maximo_tentativas=3):
+    """Cria a tarefa pendente; parametros precisa ser serializável em JSON."""
+    if tipo not in TAREFAS:
+        raise ValueError(f'Tipo de tarefa desconhecido: {tipo}.')
+    return Tarefa.objects.create(
+        tipo=tipo, parametros=parametros or {}, criado_por=usuario, maximo_tentativas=maximo_tentativas,
+    )
+
+
+def reservar_tarefa():
+    """
+    Reserva a próxima tarefa disponível para este worker e a retorna, ou
+    None se a fila estiver vazia. Tarefas executando com o prazo vencido
+    (worker interrompido) também são reservadas, contando uma tentativa.
+    """
+    pular_travadas = connection.features.has_select_for_update_skip_locked
+    while True:
+        # No SQLite a leitura e o UPDATE ficam fora de uma transação: ao
+        # promover a trava de leitura para escrita dois workers se
+        # bloqueariam ("database is locked"), e o UPDATE sozinho já é atômico.
+        with transaction.atomic() if pular_travadas else nullcontext():
+            agora = timezone.now()
+            fila = Tarefa.objects.filter(
+                status__in=['PENDENTE', 'EXECUTANDO'], disponivel_em__lte=agora
+            ).order_by('disponivel_em', 'id')
+            if pular_travadas:
+                fila = fila.select_for_update(skip_locked=True)
+            tarefa = fila.first()
+            if tarefa is None:
+                return None
+            reservada = Tarefa.objects.filter(
+                pk=tarefa.pk, status=tarefa.status, disponivel_em=tarefa.disponivel_em
+            ).update(
+                status='EXECUTANDO', tentativas=F('tentativas') + 1, disponivel_em=agora + PRAZO_EXECUCAO,
+                data_inicio=agora, progresso=0, mensagem='', reserva=uuid.uuid4(),
+            )
+        if not reservada:
+            # Outro worker reservou a mesma tarefa primeiro (SQLite).
+            continue
+        tarefa.refresh_from_db()
+        if tarefa.tentativas > tarefa.maximo_tentativas:
+            _falhar(tarefa, 'Prazo de execução esgotado em todas as tentativas.')
+            continue
+        return tarefa
+
+
+def _da_reserva(tarefa):
+    return Tarefa.objects.filter(pk=tarefa.pk, reserva=tarefa.reserva, status='EXECUTANDO')
+
+
+def informar_progresso(tarefa, feitos, total, mensagem=''):
+    """
+    Atualiza o progresso (0 a 100) e renova o prazo da reserva. Só grava
+    quando o percentual muda, então pode ser chamada a cada item. Lança
+    ReservaPerdida se outro worker tiver assumido a tarefa.
+    """
+    progresso = min(feitos * 100 // total, 99) if total else 0
+    if progresso == tarefa.progresso and mensagem == tarefa.mensagem:
+        return
+    tarefa.progresso, tarefa.mensagem = progresso, mensagem
+    if not _da_reserva(tarefa).update(
+        progresso=progresso, mensagem=mensagem, disponivel_em=timezone.now() + PRAZO_EXECUCAO,
+    ):
+        raise ReservaPerdida()
+
+
+def _finalizar(tarefa, **campos):
+    """Grava o desfecho se a reserva ainda for deste worker; retorna se gravou."""
+    gravou = _da_reserva(tarefa).update(**campos)
+    if gravou:
+        for campo, valor in campos.items():
+            setattr(tarefa, campo, valor)
+    return bool(gravou)
+
+
+def _terminar(tarefa):
+    ao_terminar = AO_TERMINAR.get(tarefa.tipo)
+    if ao_terminar is not None:
+        ao_terminar(tarefa)
+
+
+def _falhar(tarefa, erro):
+    falhou = _finalizar(tarefa, status='FALHOU', erro=erro, data_conclusao=timezone.now())
+    if falhou:
+        _terminar(tarefa)
+    return falhou
+
+
+def executar(tarefa):
+    """
+    Executa a tarefa reservada e grava o resultado. Em caso de erro a tarefa
+    volta para a fila com espera crescente, ou falha de vez se o erro for
+    definitivo ou as tentativas acabarem. Se a reserva tiver sido perdida,
+    nada é gravado e o arquivo produzido é removido. Retorna se o desfecho
+    foi gravado.
+    """
+    nome = None
+    try:
+        funcao = TAREFAS.get(tarefa.tipo)
+        if funcao is None:
+            raise ErroTarefa(f'Tipo de tarefa desconhecido: {tarefa.tipo}.')
+        resultado = funcao(tarefa, **tarefa.parametros)
+        if resultado is not None:
+            nome_arquivo, arquivo = resultado
+            with arquivo:
+                tarefa.arquivo.save(nome_arquivo, File(arquivo), save=False)
+            nome = tarefa.arquivo.name
+    except ReservaPerdida:
+        return False
+    except Exception as erro:
+        if isinstance(erro, ErroTarefa) or tarefa.tentativas >= tarefa.maximo_tentativas:
+            return _falhar(tarefa, traceback.format_exc())
+        espera = min(ESPERA_ENTRE_TENTATIVAS * 2 ** (tarefa.tentativas - 1), ESPERA_MAXIMA)
+        return _finalizar(
+            tarefa, status='PENDENTE', erro=traceback.format_exc(), disponivel_em=timezone.now() + espera,
+        )
+
+    concluida = _finalizar(
+        tarefa, status='CONCLUIDA', progresso=100, erro='', arquivo=nome, data_conclusao=timezone.now(),
+    )
+    if concluida:
+        _terminar(tarefa)
+    elif nome:
+        tarefa.arquivo.storage.delete(nome)
+    return concluida
+
+
+def limpar_tarefas(dias):
+    """Remove as tarefas terminadas há mais de `dias` dias, com os arquivos."""
+    antigas = Tarefa.objects.filter(
+        status__in=['CONCLUIDA', 'FALHOU'], data_conclusao__lt=timezone.now() - timedelta(days=dias)
+    )
+    for tarefa in antigas.exclude(arquivo='').exclude(arquivo__isnull=True).only('arquivo'):
+        tarefa.arquivo.delete(save=False)
+    return antigas.delete()[0]
+
+
+@registrar_tarefa('exportar_planilha')
+def exportar_planilha(tarefa, planilha, nome_arquivo, turma_id=None, curso_id=None):
+    if planilha not in PLANILHAS:
+        raise ErroTarefa(f'Planilha inexistente: {planilha}.')
+    total = contar_linhas(planilha, turma_id, curso_id)
+    cabecalho, linhas = linhas_da_planilha(planilha, turma_id, curso_id)
+
+    def acompanhar():
+        for feitos, linha in enumerate(linhas, 1):
+            yield linha
+            informar_progresso(tarefa, feitos, total, 'Gravando linhas')
+
+    return nome_arquivo, escrever_xlsx(PLANILHAS[planilha]['titulo'], cabecalho, acompanhar())
+
+
+@registrar_tarefa('gerar_boletins')
+def gerar_boletins(tarefa, formato, nome_arquivo, turma_id=None, curso_id=None):
+    if turma_id is not None:
+        alunos = Aluno.objects.filter(turma_atual_id=turma_id)
+    elif curso_id is not None:
+        alunos = Aluno.objects.filter(turma_atual__curso_id=curso_id)
+    else:
+        raise ErroTarefa('Informe a turma ou o curso dos boletins.')
+
+    arquivo = tempfile.TemporaryFile()
+    gravar_boletins(
+        montar_boletins(alunos), formato, arquivo,
+        progresso=lambda feitos, total: informar_progresso(tarefa, feitos, total, 'Desenhando boletins'),
+    )
+    arquivo.seek(0)
+    return nome_arquivo, arquivo
+
+
+@registrar_tarefa('emitir_documento')
+def emitir_documento_pendente(tarefa, documento_id):
+    try:
+        emitir_documento(documento_id)
+    except DocumentoNaoGerado as erro:
+        raise ErroTarefa(str(erro)) from erro
+
+
+def _remover_planilha(tarefa):
+    default_storage.delete(tarefa.parametros['caminho'])
+
+
+@registrar_tarefa('importar_alunos', ao_terminar=_remover_planilha)
+def importar_planilha_de_alunos(tarefa, caminho, planilha, nome_arquivo, andamento=None):
+    """
+    Importa a planilha enviada pelo site (guardada em `caminho` no storage e
+    removida quando a tarefa termina). O andamento é gravado nos parâmetros
+    da tarefa junto com cada lote, então uma nova tentativa continua depois
+    da última linha resolvida em vez de importar os lotes de novo. O resumo
+    fica na mensagem da tarefa e, se alguma linha não entrou, o relatório
+    delas é o arquivo da tarefa.
+    """
+    def guardar_andamento(resultado):
+        tarefa.parametros = {**tarefa.parametros, 'andamento': resultado.estado()}
+        if not _da_reserva(tarefa).update(
+            parametros=tarefa.parametros, disponivel_em=timezone.now() + PRAZO_EXECUCAO,
+        ):
+            # Desfaz o lote: quem assumiu a tarefa vai gravá-lo.
+            raise ReservaPerdida()
+
+    try:
+        with default_storage.open(caminho, 'rb') as arquivo:
+            total = sum(1 for _ in ler_linhas(arquivo, planilha))
+        with default_storage.open(caminho, 'rb') as arquivo:
+            resultado = importar_alunos(
+                arquivo, planilha,
+                progresso=lambda lidas: informar_progresso(tarefa, lidas, total, 'Importando alunos'),
+                resultado=ResultadoImportacao(**andamento) if andamento else None,
+                ao_gravar_lote=guardar_andamento,
+            )
+    except ErroImportacao as erro:
+        informar_progresso(tarefa, 0, 0, str(erro)[:255])
+        raise ErroTarefa(str(erro)) from erro
+
+    informar_progresso(
+        tarefa, total, total,
+        f'{resultado.criados} aluno(s) importado(s), {resultado.linhas_com_erro} linha(s) com erro.',
+    )
+    if not resultado.erros:
+        return None
+    arquivo = tempfile.TemporaryFile()
+    escrever_relatorio(resultado, arquivo)
+    arquivo.seek(0)
+    return nome_arquivo, arquivo
@@ -1,3 +1,1183 @@
-from django.test import TestCase
+import base64
+import functools
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import Counter
+from datetime import date, datetime, time as hora, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from . import urls as escola_urls
+from .boletim import montar_boletim, montar_boletins
+from .busca import buscar, filtrar_por_busca
+from .contas import criar_contas, iniciar_pool
+from .exportacao import escrever_xlsx
+from .importacao import ErroImportacao, _Importador, importar_alunos, ler_linhas
+from .lancamentos import lancar_frequencia, lancar_notas
+from .models import (
+    Aluno, Aviso, Curso, Disciplina, Documento, Evento, Frequencia, HorarioAula,
+    JustificativaFalta, Material, Matricula, Nota, Professor, ResumoAluno, Tarefa, Turma
+)
+from .paginacao import paginar_por_chave
+from .papeis import invalidar_papel, resolver_papel
+from .pdfs_gerados import caminho_do_pdf
+from .relatorios import alunos_com_indicadores
+from .resumos import recalcular_resumos
+from .tarefas import TAREFAS, ErroTarefa, enfileirar, executar, reservar_tarefa
+
+
+ALUNOS_POR_TURMA = 20
+AULAS_POR_DISCIPLINA = 10
+TIPOS_AVALIACAO = ['Prova 1', 'Prova 2', 'Trabalho']
+MEDIA_ROOT_TESTES = tempfile.mkdtemp(prefix='nexus-testes-')
+
+# Limite de consultas por rota. Rotas fora da tabela usam o limite padrão.
+# Os valores valem para a fixture abaixo (duas turmas de 20 alunos): uma
+# rota com N+1 passa facilmente do limite.
+LIMITE_CONSULTAS_PADRAO = 15
+LIMITE_CONSULTAS = {
+    'dashboard_admin': 22,
+    'secretaria_professor_editar': 19,
+}
+
+# Tempo máximo (em segundos) por requisição, incluindo a leitura do corpo.
+LIMITE_TEMPO_PADRAO = 1.0
+LIMITE_TEMPO = {
+    'exportar_boletim_pdf': 2.0,
+    'exportar_frequencia_pdf': 2.0,
+    'exportar_frequencia_excel': 2.0,
+}
+
+ROTAS_PUBLICAS = {'home', 'login', 'logout', 'institucional', 'plataforma', 'juridico'}
+ROTAS_DE_TODOS = {'calendario_eventos'}
+ROTAS_DA_SECRETARIA = {
+    'autocompletar', 'exportar_planilha', 'tarefa_detalhe', 'tarefa_progresso', 'tarefa_arquivo',
+}
+
+
+def papel_da_rota(nome):
+    """Papel usado para acessar a rota, deduzido do nome dela em escola/urls.py."""
+    if nome in ROTAS_PUBLICAS:
+        return 'publico'
+    if nome in ROTAS_DE_TODOS:
+        return 'todos'
+    if nome in ROTAS_DA_SECRETARIA:
+        return 'secretaria'
+    if nome.startswith(('aluno_', 'exportar_')) or nome == 'dashboard_aluno':
+        return 'aluno'
+    if nome.startswith('professor_') or nome in ('dashboard_professor', 'download_material'):
+        return 'professor'
+    for papel in ('secretaria', 'coordenacao', 'admin'):
+        if nome.startswith(f'{papel}_') or nome == f'dashboard_{papel}':
+            return papel
+    return None
+
+
+def normalizar_sql(sql):
+    """Troca literais por ? para agrupar consultas que só diferem nos parâmetros."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    return re.sub(r'IN \((?:\?, )*\?\)', 'IN (...)', sql)
+
+
+def consultas_repetidas(consultas):
+    repeticoes = Counter(normalizar_sql(consulta['sql']) for consulta in consultas)
+    return [(total, sql) for sql, total in repeticoes.most_common() if total > 1]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT_TESTES)
+class OrcamentoDeConsultasTest(TestCase):
+    """
+    Acessa todas as rotas de escola/urls.py com o papel correspondente e
+    verifica o número de consultas e o tempo de cada uma.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT_TESTES, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        hoje = date.today()
+        curso = Curso.objects.create(nome='Técnico em Informática', codigo='TI', carga_horaria=1200)
+        cls.disciplinas = [
+            Disciplina.objects.create(nome=nome, curso=curso)
+            for nome in ['Programação', 'Banco de Dados', 'Redes', 'Matemática']
+        ]
+        cls.turmas = [
+            Turma.objects.create(codigo=codigo, semestre='2025.1', turno='Manhã', curso=curso)
+            for codigo in ['TI-1A', 'TI-1B']
+        ]
+        turma = cls.turmas[0]
+
+        horarios = ['07:00', '07:50', '08:40', '09:50', '10:40']
+        HorarioAula.objects.bulk_create([
+            HorarioAula(
+                turma=t, disciplina=cls.disciplinas[(i + j) % len(cls.disciplinas)], dia_semana=dia,
+                hora_inicio=hora(*map(int, inicio.split(':'))), hora_fim=hora(12, 0)
+            )
+            for t in cls.turmas
+            for i, dia in enumerate(['SEG', 'TER', 'QUA', 'QUI', 'SEX'])
+            for j, inicio in enumerate(horarios)
+        ])
+
+        cls.usuarios = {
+            'secretaria': User.objects.create_user('secretaria'),
+            'coordenacao': User.objects.create_user('coordenacao'),
+            'admin': User.objects.create_superuser('admin', 'admin@nexus.test'),
+            'professor': User.objects.create_user('professor'),
+        }
+        for papel in ('secretaria', 'coordenacao'):
+            cls.usuarios[papel].groups.add(Group.objects.get_or_create(name=papel)[0])
+
+        cls.professor = Professor.objects.create(
+            user=cls.usuarios['professor'], nome='Professor Teste', email='professor@nexus.test',
+            data_admissao=hoje,
+        )
+        cls.professor.turmas.set(cls.turmas)
+        cls.professor.disciplinas.set(cls.disciplinas)
+
+        alunos = []
+        for t in cls.turmas:
+            for numero in range(ALUNOS_POR_TURMA):
+                chave = f'{t.codigo}-{numero:02d}'
+                alunos.append(Aluno.objects.create(
+                    user=User.objects.create_user(f'aluno-{chave}'),
+                    matricula=chave, nome=f'Aluno {chave}', email=f'{chave}@nexus.test',
+                    cpf=chave, data_nascimento=date(2008, 1, 1), turma_atual=t,
+                ))
+        cls.aluno = alunos[0]
+        cls.usuarios['aluno'] = cls.aluno.user
+
+        matriculas = Matricula.objects.filter(aluno__in=alunos)
+        Nota.objects.bulk_create([
+            Nota(matricula=matricula, disciplina=disciplina, tipo_avaliacao=tipo,
+                 valor=Decimal(5 + (matricula.id + indice) % 5))
+            for matricula in matriculas
+            for disciplina in cls.disciplinas
+            for indice, tipo in enumerate(TIPOS_AVALIACAO)
+        ])
+        Frequencia.objects.bulk_create([
+            Frequencia(matricula=matricula, disciplina=disciplina,
+                       data_aula=hoje - timedelta(days=aula), presente=(matricula.id + aula) % 4 != 0)
+            for matricula in matriculas
+            for disciplina in cls.disciplinas
+            for aula in range(AULAS_POR_DISCIPLINA)
+        ])
+        recalcular_resumos()
+
+        Evento.objects.bulk_create([
+            Evento(titulo=f'Evento {dia}', data=hoje + timedelta(days=dia), tipo='evento',
+                   turma=cls.turmas[dia % 2] if dia % 3 else None)
+            for dia in range(0, 60, 3)
+        ])
+        cls.evento = Evento.objects.first()
+        cls.evento_descartavel = Evento.objects.create(titulo='Descartável', data=hoje, tipo='evento')
+
+        Aviso.objects.bulk_create([
+            Aviso(titulo=f'Aviso {numero}', conteudo='Conteúdo', autor=cls.usuarios['coordenacao'], turma=turma)
+            for numero in range(10)
+        ])
+        JustificativaFalta.objects.bulk_create([
+            JustificativaFalta(aluno=aluno, disciplina=cls.disciplinas[0], data_inicio=hoje,
+                               data_fim=hoje, justificativa='Atestado médico')
+            for aluno in alunos[:10]
+        ])
+
+        cls.documento = Documento.objects.create(aluno=cls.aluno, tipo='DECLARACAO_MATRICULA', status='EMITIDO')
+        cls.documento.arquivo.save('declaracao.pdf', ContentFile(b'%PDF-1.4'))
+        Documento.objects.bulk_create([
+            Documento(aluno=aluno, tipo='HISTORICO') for aluno in alunos[1:10]
+        ])
+        cls.material = Material(
+            titulo='Apostila', disciplina=cls.disciplinas[0], turma=turma, professor=cls.professor
+        )
+        cls.material.arquivo.save('apostila.pdf', ContentFile(b'%PDF-1.4'))
+        cls.tarefa = Tarefa.objects.create(
+            tipo='exportar_planilha', parametros={'nome_arquivo': 'notas_TI.xlsx'}, criado_por=cls.usuarios['secretaria'],
+        )
+        cls.tarefa.arquivo.save('notas_TI.xlsx', ContentFile(b'PK'))
+
+    def setUp(self):
+        # Os caches (grades horárias, indicadores) são zerados para medir sempre a primeira visita.
+        cache.clear()
+
+    def argumentos_da_rota(self, nome):
+        argumentos = {
+            'aluno_id': self.aluno.id,
+            'professor_id': self.professor.id,
+            'turma_id': self.turmas[0].id,
+            'curso_id': self.turmas[0].curso_id,
+            'doc_id': self.documento.id,
+            'evento_id': self.evento.id,
+            'material_id': self.material.id,
+            'tipo': 'alunos',
+            'planilha': 'frequencias',
+            'tarefa_id': self.tarefa.id,
+        }
+        if nome == 'secretaria_evento_excluir':
+            # Essa rota exclui o evento já no GET.
+            argumentos['evento_id'] = self.evento_descartavel.id
+        return argumentos
+
+    def parametros_da_rota(self, nome):
+        turma_e_disciplina = {'turma': self.turmas[0].id, 'disciplina': self.disciplinas[0].id}
+        hoje = date.today()
+        return {
+            'calendario_eventos': {'inicio': hoje.replace(day=1), 'fim': hoje + timedelta(days=31)},
+            'professor_notas': turma_e_disciplina,
+            'professor_notas_json': turma_e_disciplina,
+            'professor_frequencia': turma_e_disciplina,
+            'coordenacao_relatorios': {'turma': self.turmas[0].id},
+            'coordenacao_horarios': {'turma': self.turmas[0].id},
+            'autocompletar': {'q': 'Aluno'},
+            'exportar_planilha': {'turma': self.turmas[0].id},
+            'secretaria_boletins': {'turma': self.turmas[0].id},
+        }.get(nome, {})
+
+    def rotas_do_papel(self, papel):
+        for padrao in escola_urls.urlpatterns:
+            if not isinstance(padrao, URLPattern):
+                continue
+            papel_rota = papel_da_rota(padrao.name)
+            if papel_rota == papel or (papel_rota == 'todos' and papel != 'publico'):
+                kwargs = {
+                    nome: valor for nome, valor in self.argumentos_da_rota(padrao.name).items()
+                    if nome in padrao.pattern.converters
+                }
+                yield padrao.name, reverse(padrao.name, kwargs=kwargs)
+
+    def medir(self, url, parametros):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = self.client.get(url, parametros, HTTP_HOST='localhost')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            else:
+                response.content
+            response.close()
+            duracao = time.perf_counter() - inicio
+        return response, consultas.captured_queries, duracao
+
+    def verificar_papel(self, papel):
+        rotas = list(self.rotas_do_papel(papel))
+        self.assertTrue(rotas, f'Nenhuma rota encontrada para o papel {papel}.')
+
+        for nome, url in rotas:
+            with self.subTest(rota=nome, papel=papel):
+                self.client.logout()
+                if papel != 'publico':
+                    self.client.force_login(self.usuarios[papel])
+
+                response, consultas, duracao = self.medir(url, self.parametros_da_rota(nome))
+                self.assertLess(response.status_code, 500, f'{url} respondeu {response.status_code}.')
+
+                limite = LIMITE_CONSULTAS.get(nome, LIMITE_CONSULTAS_PADRAO)
+                if len(consultas) > limite:
+                    repetidas = '\n'.join(
+                        f'  {total}x {sql}' for total, sql in consultas_repetidas(consultas)[:5]
+                    ) or '  (nenhuma consulta repetida)'
+                    self.fail(
+                        f'{url} fez {len(consultas)} consultas (limite {limite}). '
+                        f'Consultas repetidas:\n{repetidas}'
+                    )
+
+                limite_tempo = LIMITE_TEMPO.get(nome, LIMITE_TEMPO_PADRAO)
+                self.assertLessEqual(
+                    duracao, limite_tempo, f'{url} levou {duracao:.3f}s (limite {limite_tempo}s).'
+                )
+
+    def test_todas_as_rotas_tem_papel(self):
+        sem_papel = [
+            padrao.name for padrao in escola_urls.urlpatterns
+            if isinstance(padrao, URLPattern) and papel_da_rota(padrao.name) is None
+        ]
+        self.assertEqual(sem_papel, [], 'Defina o papel dessas rotas em papel_da_rota().')
+
+    def test_rotas_publicas(self):
+        self.verificar_papel('publico')
+
+    def test_rotas_do_aluno(self):
+        self.verificar_papel('aluno')
+
+    def test_rotas_do_professor(self):
+        self.verificar_papel('professor')
+
+    def test_rotas_da_secretaria(self):
+        self.verificar_papel('secretaria')
+
+    def test_rotas_da_coordenacao(self):
+        self.verificar_papel('coordenacao')
+
+    def test_rotas_do_admin(self):
+        self.verificar_papel('admin')
+
+
+class PapelEmSessaoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.grupo = Group.objects.create(name='Secretaria')
+        self.usuario = User.objects.create_user('papel', password='x')
+        self.usuario.groups.add(self.grupo)
+        self.client.force_login(self.usuario)
+        self.url = reverse('secretaria_alunos')
+
+    def test_permissao_nao_consulta_grupos(self):
+        self.client.get(self.url, HTTP_HOST='localhost')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'auth_user_groups' in c['sql']])
+
+    def test_mudanca_de_grupo_invalida_papel(self):
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 200)
+        self.grupo.user_set.remove(self.usuario)
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 302)
+        self.usuario.groups.add(self.grupo)
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 200)
+
+    def test_grupo_removido_vale_para_todos_os_processos(self):
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 200)
+        self.grupo.user_set.remove(self.usuario)
+        # Outro worker do gunicorn tem o próprio cache (LocMem), sem a troca.
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 302)
+
+    def test_revogacao_durante_a_resolucao_nao_fica_na_sessao(self):
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 200)
+
+        def resolver_e_revogar(user):
+            papel = resolver_papel(user)
+            # O grupo é removido depois da leitura dos grupos e antes de guardar o papel.
+            self.grupo.user_set.remove(self.usuario)
+            return papel
+
+        invalidar_papel(self.usuario.pk)
+        with mock.patch('escola.papeis.resolver_papel', side_effect=resolver_e_revogar):
+            self.client.get(self.url, HTTP_HOST='localhost')
+        self.assertEqual(self.client.get(self.url, HTTP_HOST='localhost').status_code, 302)
+
+    def test_vinculo_de_perfil_invalida_papel(self):
+        self.client.get(reverse('dashboard_professor'), HTTP_HOST='localhost')
+        Professor.objects.create(
+            nome='Prof. Papel', email='papel@nexus.edu', data_admissao=date(2020, 1, 1), user=self.usuario
+        )
+        response = self.client.get(reverse('dashboard_professor'), HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+
+
+class ContadoresDosDashboardsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_superuser('contadores', password='x')
+        self.client.force_login(self.usuario)
+        self.curso = Curso.objects.create(nome='Informática', codigo='INF', carga_horaria=1200)
+        self.turma = Turma.objects.create(codigo='INF-1', curso=self.curso, semestre='2025.1', turno='Manhã')
+
+    def contagens(self, rota):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse(rota), HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return response, [c['sql'] for c in consultas.captured_queries if 'COUNT(*)' in c['sql']]
+
+    def test_dashboards_com_cache_nao_contam(self):
+        for rota in ('dashboard_secretaria', 'dashboard_coordenacao', 'dashboard_admin'):
+            self.contagens(rota)
+            _, contagens = self.contagens(rota)
+            self.assertEqual(contagens, [], rota)
+
+    def test_novo_aluno_atualiza_total(self):
+        response, _ = self.contagens('dashboard_secretaria')
+        self.assertEqual(response.context['total_alunos'], 0)
+        Aluno.objects.create(
+            nome='Aluno Novo', matricula='2025999', cpf='999.999.999-99', email='novo@nexus.edu',
+            data_nascimento=date(2005, 1, 1), turma_atual=self.turma,
+        )
+        response, _ = self.contagens('dashboard_secretaria')
+        self.assertEqual(response.context['total_alunos'], 1)
+
+
+class ResumosPorSignalTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='História', codigo='HIS', carga_horaria=800)
+        turma = Turma.objects.create(codigo='HIS-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        cls.antiga, cls.moderna = [
+            Disciplina.objects.create(nome=nome, curso=curso) for nome in ('História Antiga', 'História Moderna')
+        ]
+        cls.aluno = Aluno.objects.create(
+            nome='Resumo Signal', matricula='R1', cpf='R1', email='r1@nexus.test',
+            data_nascimento=date(2008, 1, 1), turma_atual=turma,
+        )
+        cls.matricula = Matricula.objects.get(aluno=cls.aluno, turma=turma)
+
+    def totais(self):
+        campos = ['soma_notas', 'total_notas', 'total_aulas', 'total_faltas', 'percentual_frequencia']
+        return list(ResumoAluno.objects.filter(aluno=self.aluno).values_list(*campos))
+
+    def assertIgualAoRecalculo(self):
+        mantidos = self.totais()
+        recalcular_resumos([self.aluno.id])
+        self.assertEqual(mantidos, self.totais())
+        return mantidos
+
+    def test_criacao_alteracao_e_exclusao(self):
+        nota = Nota.objects.create(matricula=self.matricula, disciplina=self.antiga, tipo_avaliacao='Prova 1', valor=8)
+        Nota.objects.create(matricula=self.matricula, disciplina=self.moderna, tipo_avaliacao='Prova 2', valor=6)
+        falta = Frequencia.objects.create(
+            matricula=self.matricula, disciplina=self.antiga, data_aula=date(2025, 3, 3), presente=False
+        )
+        Frequencia.objects.create(
+            matricula=self.matricula, disciplina=self.antiga, data_aula=date(2025, 3, 4), presente=True
+        )
+        self.assertEqual(self.assertIgualAoRecalculo(), [(Decimal('14'), 2, 2, 1, 50)])
+
+        # Na alteração o valor antigo sai do resumo, inclusive ao trocar de disciplina.
+        nota.valor = 5
+        nota.save()
+        falta.presente = True
+        falta.save()
+        self.assertEqual(self.assertIgualAoRecalculo(), [(Decimal('11'), 2, 2, 0, 100)])
+        nota.disciplina = self.moderna
+        nota.save()
+        self.assertEqual(self.assertIgualAoRecalculo(), [(Decimal('11'), 2, 2, 0, 100)])
+
+        nota.delete()
+        falta.delete()
+        self.assertEqual(self.assertIgualAoRecalculo(), [(Decimal('6'), 1, 1, 0, 100)])
+
+    def test_alteracao_renova_data_atualizacao(self):
+        nota = Nota.objects.create(matricula=self.matricula, disciplina=self.antiga, tipo_avaliacao='Prova 1', valor=8)
+        ontem = timezone.now() - timedelta(days=1)
+        ResumoAluno.objects.filter(aluno=self.aluno).update(data_atualizacao=ontem)
+        nota.valor = 9
+        nota.save()
+        self.assertGreater(ResumoAluno.objects.get(aluno=self.aluno).data_atualizacao, ontem)
+
+
+    def test_relatorio_da_turma_le_os_resumos(self):
+        Nota.objects.create(matricula=self.matricula, disciplina=self.antiga, tipo_avaliacao='Prova 1', valor=7)
+        Frequencia.objects.create(
+            matricula=self.matricula, disciplina=self.antiga, data_aula=date(2025, 3, 3), presente=False
+        )
+        # Aluno sem resumo ainda: o resumo é calculado na hora.
+        sem_resumo = Aluno.objects.create(
+            nome='Sem Resumo', matricula='R2', cpf='R2', email='r2@nexus.test',
+            data_nascimento=date(2008, 1, 1), turma_atual=self.aluno.turma_atual,
+        )
+        ResumoAluno.objects.filter(aluno=sem_resumo).delete()
+
+        alunos = alunos_com_indicadores(self.aluno.turma_atual)
+        self.assertEqual(
+            [(aluno.nome, aluno.resumo.media, aluno.resumo.percentual_frequencia) for aluno in alunos],
+            [('Resumo Signal', 7.0, 0), ('Sem Resumo', 0, 100)],
+        )
+
+class LancamentosEmLoteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Biologia', codigo='BIO', carga_horaria=800)
+        cls.turma = Turma.objects.create(codigo='BIO-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        outra_turma = Turma.objects.create(codigo='BIO-1B', semestre='2025.1', turno='Tarde', curso=curso)
+        cls.disciplina = Disciplina.objects.create(nome='Genética', curso=curso)
+        cls.alunos = [
+            Aluno.objects.create(
+                nome=f'Aluno {numero}', matricula=f'L{numero}', cpf=f'L{numero}', email=f'l{numero}@nexus.test',
+                data_nascimento=date(2008, 1, 1), turma_atual=cls.turma,
+            )
+            for numero in range(2)
+        ]
+        # Turma atual gravada sem o signal: ainda sem matrícula na turma.
+        cls.sem_matricula = Aluno.objects.create(
+            nome='Sem Matrícula', matricula='L9', cpf='L9', email='l9@nexus.test', data_nascimento=date(2008, 1, 1),
+        )
+        Aluno.objects.filter(pk=cls.sem_matricula.pk).update(turma_atual=cls.turma)
+        cls.de_outra_turma = Aluno.objects.create(
+            nome='Outra Turma', matricula='L8', cpf='L8', email='l8@nexus.test', data_nascimento=date(2008, 1, 1),
+            turma_atual=outra_turma,
+        )
+
+    def test_notas_criadas_atualizadas_e_invalidas(self):
+        primeiro, segundo = self.alunos
+        valores = {
+            str(primeiro.id): '7,5', str(segundo.id): '11', str(self.sem_matricula.id): '6',
+            str(self.de_outra_turma.id): '9', 'abc': '5', '999999': ' ',
+        }
+        with mock.patch('escola.lancamentos.recalcular_resumos', wraps=recalcular_resumos) as recalcular:
+            resultado = lancar_notas(self.turma, self.disciplina, 'Prova 1', valores)
+        self.assertEqual(resultado, {'salvas': 2, 'atualizadas': 0, 'invalidas': 3, 'vazias': 1})
+        self.assertEqual(set(recalcular.call_args.args[0]), {primeiro.id, self.sem_matricula.id})
+
+        # A matrícula que faltava foi criada; o aluno de outra turma continua sem nota.
+        matricula = Matricula.objects.get(aluno=self.sem_matricula, turma=self.turma)
+        self.assertEqual(Nota.objects.get(matricula=matricula).valor, Decimal('6'))
+        self.assertFalse(Nota.objects.filter(matricula__aluno=self.de_outra_turma).exists())
+        self.assertEqual(ResumoAluno.objects.get(aluno=primeiro).soma_notas, Decimal('7.5'))
+
+        # Reenviar a mesma avaliação atualiza as notas em vez de duplicá-las.
+        resultado = lancar_notas(self.turma, self.disciplina, 'Prova 1', {
+            str(primeiro.id): '8', str(segundo.id): '4',
+        })
+        self.assertEqual(resultado, {'salvas': 1, 'atualizadas': 1, 'invalidas': 0, 'vazias': 0})
+        self.assertEqual(Nota.objects.filter(disciplina=self.disciplina, tipo_avaliacao='Prova 1').count(), 3)
+        self.assertEqual(Nota.objects.get(matricula__aluno=primeiro).valor, Decimal('8'))
+        self.assertEqual(Matricula.objects.filter(aluno=self.sem_matricula, turma=self.turma).count(), 1)
+        resumo = ResumoAluno.objects.get(aluno=primeiro)
+        self.assertEqual((resumo.soma_notas, resumo.total_notas), (Decimal('8'), 1))
+
+    def test_chamada_da_turma_inteira(self):
+        primeiro, segundo = self.alunos
+        aula = date(2025, 3, 10)
+        with mock.patch('escola.lancamentos.recalcular_resumos', wraps=recalcular_resumos) as recalcular:
+            gravadas = lancar_frequencia(self.turma, self.disciplina, aula, {primeiro.id, self.de_outra_turma.id})
+        # Só os alunos da turma atual, incluindo o que ainda não tinha matrícula.
+        self.assertEqual(gravadas, 3)
+        self.assertEqual(
+            set(recalcular.call_args.args[0]), {primeiro.id, segundo.id, self.sem_matricula.id}
+        )
+        self.assertTrue(Matricula.objects.filter(aluno=self.sem_matricula, turma=self.turma).exists())
+        self.assertFalse(Frequencia.objects.filter(matricula__aluno=self.de_outra_turma).exists())
+        self.assertEqual(
+            dict(Frequencia.objects.filter(data_aula=aula).values_list('matricula__aluno_id', 'presente')),
+            {primeiro.id: True, segundo.id: False, self.sem_matricula.id: False},
+        )
+        self.assertEqual(ResumoAluno.objects.get(aluno=segundo).total_faltas, 1)
+
+        # Refazer a chamada do mesmo dia corrige as presenças sem duplicar.
+        self.assertEqual(lancar_frequencia(self.turma, self.disciplina, aula, {segundo.id}), 3)
+        self.assertEqual(Frequencia.objects.filter(data_aula=aula).count(), 3)
+        self.assertEqual(Matricula.objects.filter(aluno=self.sem_matricula, turma=self.turma).count(), 1)
+        self.assertEqual(
+            dict(Frequencia.objects.filter(data_aula=aula).values_list('matricula__aluno_id', 'presente')),
+            {primeiro.id: False, segundo.id: True, self.sem_matricula.id: False},
+        )
+        resumos = dict(ResumoAluno.objects.filter(aluno__in=self.alunos).values_list('aluno_id', 'total_faltas'))
+        self.assertEqual(resumos, {primeiro.id: 1, segundo.id: 0})
+
+
+class PaginacaoPorChaveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Nomes repetidos: o id desempata a ordem entre páginas.
+        for numero in range(23):
+            Aluno.objects.create(
+                nome=f'Aluno {numero % 5}', matricula=f'P{numero:03}', cpf=f'P{numero:03}',
+                email=f'p{numero}@nexus.test', data_nascimento=date(2008, 1, 1),
+            )
+        cls.ordem = list(Aluno.objects.order_by('nome', 'id').values_list('id', flat=True))
+
+    def parametros(self, url=''):
+        return QueryDict(url.lstrip('?'))
+
+    def test_percorre_todas_as_paginas_e_volta(self):
+        pagina = paginar_por_chave(Aluno.objects.all(), self.parametros(), tamanho=5)
+        paginas = [[aluno.id for aluno in pagina]]
+        while pagina.url_proximo:
+            pagina = paginar_por_chave(Aluno.objects.all(), self.parametros(pagina.url_proximo), tamanho=5)
+            paginas.append([aluno.id for aluno in pagina])
+        self.assertEqual([aluno_id for ids in paginas for aluno_id in ids], self.ordem)
+        self.assertEqual(pagina.total, 23)
+
+        for ids in reversed(paginas[:-1]):
+            pagina = paginar_por_chave(Aluno.objects.all(), self.parametros(pagina.url_anterior), tamanho=5)
+            self.assertEqual([aluno.id for aluno in pagina], ids)
+        self.assertIsNone(pagina.url_anterior)
+
+    def test_cursor_invalido_volta_para_primeira_pagina(self):
+        pagina = paginar_por_chave(Aluno.objects.all(), self.parametros('?apos=xyz&busca=Aluno'), tamanho=5)
+        self.assertEqual([aluno.id for aluno in pagina], self.ordem[:5])
+        self.assertIn('busca=Aluno', pagina.url_proximo)
+
+
+class BuscaTextualTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        dados = [('João da Conceição', '2025001'), ('Joana Araújo', '2025002'), ('Márcio Souza', '2025003')]
+        cls.alunos = [
+            Aluno.objects.create(
+                nome=nome, matricula=matricula, cpf=f'123.456.789-0{numero}', email=f'{matricula}@nexus.test',
+                data_nascimento=date(2008, 1, 1),
+            )
+            for numero, (nome, matricula) in enumerate(dados)
+        ]
+
+    def nomes(self, termo):
+        return sorted(aluno.nome for aluno in filtrar_por_busca(Aluno.objects.all(), termo))
+
+    def test_ignora_acentos_e_usa_prefixos(self):
+        self.assertEqual(self.nomes('joao conceicao'), ['João da Conceição'])
+        self.assertEqual(self.nomes('jo'), ['Joana Araújo', 'João da Conceição'])
+        self.assertEqual(self.nomes('MARCIO'), ['Márcio Souza'])
+        self.assertEqual(self.nomes('12345678902'), ['Márcio Souza'])
+
+    def test_indice_acompanha_alteracoes(self):
+        aluno = self.alunos[2]
+        aluno.nome = 'Mário Souza'
+        aluno.save()
+        self.assertEqual(self.nomes('marcio'), [])
+        self.assertEqual(self.nomes('mario'), ['Mário Souza'])
+        aluno.delete()
+        self.assertEqual(self.nomes('souza'), [])
+
+    def test_resultados_ranqueados(self):
+        Aviso.objects.create(titulo='Reunião de pais', conteudo='Sala 3.')
+        Aviso.objects.create(titulo='Provas', conteudo='Reunião sobre provas e reunião de notas.')
+        Aviso.objects.create(titulo='Feriado', conteudo='Não haverá aula.')
+        resultados = buscar(Aviso, 'reuniao')
+        self.assertEqual(len(resultados), 2)
+        self.assertEqual(buscar(Aviso, '!!!'), [])
+
+    def test_bancos_sem_indice_usam_icontains(self):
+        with mock.patch('escola.busca._indexado', return_value=False):
+            self.assertEqual(self.nomes('joão conceição'), ['João da Conceição'])
+            self.assertEqual(self.nomes('2025002'), ['Joana Araújo'])
+            self.assertEqual([aluno.nome for aluno in buscar(Aluno, 'souza')], ['Márcio Souza'])
+
+
+class AutocompletarTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Educação Física', codigo='EF', carga_horaria=800)
+        cls.turma = Turma.objects.create(codigo='EF-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        Aluno.objects.create(
+            nome='Ângela Lúcia', matricula='2025100', cpf='100', email='angela@nexus.test',
+            data_nascimento=date(2008, 1, 1),
+        )
+        cls.usuario = User.objects.create_user('secretaria-autocompletar')
+        cls.usuario.groups.add(Group.objects.create(name='Secretaria'))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def sugestoes(self, tipo, termo):
+        response = self.client.get(reverse('autocompletar', args=[tipo]), {'q': termo}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 200)
+        return [item['rotulo'] for item in response.json()['resultados']]
+
+    def test_alunos_por_prefixo_sem_acento(self):
+        self.assertEqual(self.sugestoes('alunos', 'angela lu'), ['Ângela Lúcia'])
+        self.assertEqual(self.sugestoes('alunos', '202510'), ['Ângela Lúcia'])
+        self.assertEqual(self.sugestoes('alunos', 'lucas'), [])
+
+    def test_alunos_so_por_nome_e_matricula_em_ordem_de_nome(self):
+        self.assertEqual(self.sugestoes('alunos', 'nexus'), [])  # e-mail
+        self.assertEqual(self.sugestoes('alunos', '100'), [])  # CPF
+        for numero, nome in enumerate(['Davi Lima', 'Bruna Lima', 'Carla Lima']):
+            Aluno.objects.create(
+                nome=nome, matricula=f'202520{numero}', cpf=f'20{numero}', email=f'lima{numero}@nexus.test',
+                data_nascimento=date(2008, 1, 1),
+            )
+        response = self.client.get(
+            reverse('autocompletar', args=['alunos']), {'q': 'lima', 'limite': 2}, HTTP_HOST='localhost'
+        )
+        self.assertEqual([item['rotulo'] for item in response.json()['resultados']], ['Bruna Lima', 'Carla Lima'])
+
+    def test_professores_so_por_nome_em_ordem_de_nome(self):
+        for nome in ['Paulo Rocha', 'Marta Rocha', 'Beatriz Rocha']:
+            Professor.objects.create(
+                nome=nome, email=f'{nome.split()[0].lower()}@rocha.test', data_admissao=date(2020, 1, 1),
+            )
+        Professor.objects.create(nome='Ana Souza', email='ana@rocha.test', data_admissao=date(2020, 1, 1))
+        response = self.client.get(
+            reverse('autocompletar', args=['professores']), {'q': 'rocha', 'limite': 2}, HTTP_HOST='localhost'
+        )
+        self.assertEqual([item['rotulo'] for item in response.json()['resultados']], ['Beatriz Rocha', 'Marta Rocha'])
+
+    def test_turmas_acompanham_alteracoes(self):
+        self.assertEqual(self.sugestoes('turmas', 'educacao'), ['EF-1A'])
+        self.turma.codigo = 'EF-2A'
+        self.turma.save()
+        self.assertEqual(self.sugestoes('turmas', 'ef 2'), ['EF-2A'])
+
+    def test_exige_secretaria_ou_coordenacao(self):
+        self.client.force_login(User.objects.create_user('sem-papel'))
+        response = self.client.get(reverse('autocompletar', args=['alunos']), {'q': 'an'}, HTTP_HOST='localhost')
+        self.assertEqual(response.status_code, 403)
+
+
+class ImportacaoAlunosTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Química', codigo='QUI', carga_horaria=800)
+        cls.turma = Turma.objects.create(codigo='QUI-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        Aluno.objects.create(
+            nome='Já Cadastrado', matricula='2025300', cpf='300', email='cadastrado@nexus.test',
+            data_nascimento=date(2008, 1, 1),
+        )
+        cls.usuario = User.objects.create_user('secretaria-importacao')
+        cls.usuario.groups.add(Group.objects.create(name='Secretaria'))
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='nexus-importacao-')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.pasta = pasta
+
+    def test_importa_csv_pela_fila_e_relata_linhas_com_erro(self):
+        planilha = (
+            'Nome;E-mail;CPF;Matrícula;Data de Nascimento;Turma;Usuário;Senha\n'
+            'Bruno Alves;bruno@nexus.test;301;2025301;10/02/2009;qui-1a;bruno.alves;senha-1\n'
+            'Carla Dias;carla@nexus.test;302;2025302;2009-03-04;;;\n'
+            'Sem Data;semdata@nexus.test;303;2025303;;;;\n'
+            'Repetida;cadastrado@nexus.test;304;2025304;01/01/2009;;;\n'
+            'Outra Carla;outra@nexus.test;305;2025302;01/01/2009;XYZ;;\n'
+        )
+        self.client.force_login(self.usuario)
+        response = self.client.post(
+            reverse('secretaria_alunos_importar'),
+            {'arquivo': SimpleUploadedFile('alunos.csv', planilha.encode('utf-8-sig'))},
+            HTTP_HOST='localhost',
+        )
+        tarefa = Tarefa.objects.get(tipo='importar_alunos')
+        self.assertRedirects(response, reverse('tarefa_detalhe', args=[tarefa.id]), fetch_redirect_response=False)
+        self.assertFalse(Aluno.objects.filter(matricula='2025301').exists())
+
+        self.assertTrue(executar(reservar_tarefa()))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'CONCLUIDA')
+        self.assertEqual(tarefa.mensagem, '2 aluno(s) importado(s), 3 linha(s) com erro.')
+        with tarefa.arquivo.open('rb') as arquivo:
+            relatorio = arquivo.read().decode('utf-8-sig').splitlines()
+        self.assertEqual([linha.split(';')[0] for linha in relatorio], ['Linha', '4', '5', '6'])
+        self.assertIn('XYZ', relatorio[3])  # turma inexistente e matrícula repetida
+        self.assertIn('repetido', relatorio[3])
+        # A planilha enviada não fica guardada depois da importação.
+        self.assertEqual(os.listdir(os.path.join(self.pasta, 'importacoes')), [])
+
+        bruno = Aluno.objects.get(matricula='2025301')
+        self.assertEqual(bruno.turma_atual, self.turma)
+        self.assertTrue(bruno.user.check_password('senha-1'))
+        self.assertTrue(Matricula.objects.filter(aluno=bruno, turma=self.turma).exists())
+        self.assertIsNone(Aluno.objects.get(matricula='2025302').user)
+
+    def test_nova_tentativa_continua_depois_dos_lotes_gravados(self):
+        planilha = 'nome;email;cpf;matricula;data_nascimento\n' + ''.join(
+            f'Aluno {numero};retomada{numero}@nexus.test;33{numero};202533{numero};01/01/2009\n'
+            for numero in range(5)
+        ) + 'Repetida;cadastrado@nexus.test;339;2025339;01/01/2009\n'
+        caminho = default_storage.save('importacoes/retomada.csv', io.BytesIO(planilha.encode()))
+        tarefa = enfileirar('importar_alunos', {
+            'caminho': caminho, 'planilha': 'alunos.csv', 'nome_arquivo': 'linhas_nao_importadas.csv',
+        })
+
+        gravar = _Importador.gravar
+
+        def falhar_no_segundo_lote(importador, *args, **kwargs):
+            if importador.resultado.ultima_linha:
+                raise OSError('conexão perdida')
+            return gravar(importador, *args, **kwargs)
+
+        em_lotes_de_dois = functools.partial(importar_alunos, tamanho_lote=2)
+        with mock.patch('escola.tarefas.importar_alunos', em_lotes_de_dois), \
+                mock.patch.object(_Importador, 'gravar', falhar_no_segundo_lote):
+            executar(reservar_tarefa())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.parametros['andamento']['ultima_linha']), ('PENDENTE', 3))
+        self.assertTrue(default_storage.exists(caminho))
+
+        Tarefa.objects.filter(pk=tarefa.pk).update(disponivel_em=timezone.now())
+        with mock.patch('escola.tarefas.importar_alunos', em_lotes_de_dois):
+            self.assertTrue(executar(reservar_tarefa()))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.mensagem, '5 aluno(s) importado(s), 1 linha(s) com erro.')
+        self.assertEqual(Aluno.objects.filter(email__startswith='retomada').count(), 5)
+        self.assertFalse(default_storage.exists(caminho))
+
+    def test_importa_csv_do_excel_em_cp1252(self):
+        planilha = (
+            'nome;email;cpf;matricula;data_nascimento\n'
+            'José Conceição;jose@nexus.test;306;2025306;05/06/2009\n'
+        )
+        resultado = importar_alunos(io.BytesIO(planilha.encode('cp1252')), 'alunos.csv')
+        self.assertEqual((resultado.criados, resultado.erros), (1, []))
+        self.assertEqual(Aluno.objects.get(matricula='2025306').nome, 'José Conceição')
+
+    def test_csv_ilegivel_vira_erro_de_importacao(self):
+        # 0x81 não existe nem em UTF-8 isolado nem em cp1252.
+        with self.assertRaises(ErroImportacao):
+            list(ler_linhas(io.BytesIO(b'nome;email\n\x81\n'), 'alunos.csv'))
+
+    def test_importa_xlsx_em_lotes(self):
+        planilha = Workbook()
+        planilha.active.append(['nome', 'email', 'cpf', 'matricula', 'data_nascimento', 'turma'])
+        for numero in range(5):
+            planilha.active.append([
+                f'Aluno {numero}', f'lote{numero}@nexus.test', f'31{numero}', 202531 + numero,
+                datetime(2009, 1, numero + 1), 'QUI-1A',
+            ])
+        arquivo = io.BytesIO()
+        planilha.save(arquivo)
+        arquivo.seek(0)
+
+        resultado = importar_alunos(arquivo, 'alunos.xlsx', tamanho_lote=2)
+        self.assertEqual((resultado.criados, resultado.erros), (5, []))
+        self.assertEqual(Matricula.objects.filter(turma=self.turma).count(), 5)
+        self.assertEqual(Aluno.objects.get(email='lote0@nexus.test').matricula, '202531')
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_um_pool_de_processos_para_todos_os_lotes(self):
+        planilha = 'nome;email;cpf;matricula;data_nascimento;username;senha\n' + ''.join(
+            f'Conta {numero};conta{numero}@nexus.test;32{numero};202532{numero};01/01/2009;conta{numero};senha-{numero}\n'
+            for numero in range(8)
+        )
+        with mock.patch('escola.importacao.iniciar_pool', wraps=iniciar_pool) as pool:
+            resultado = importar_alunos(io.BytesIO(planilha.encode()), 'alunos.csv', tamanho_lote=4, processos=2)
+        self.assertEqual((resultado.criados, resultado.erros), (8, []))
+        pool.assert_called_once_with(2)
+        self.assertTrue(User.objects.get(username='conta7').check_password('senha-7'))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CriacaoDeContasTest(TestCase):
+    def test_hashes_em_paralelo_e_grupos_em_lote(self):
+        Group.objects.create(name='Secretaria')
+        contas = [
+            {'username': f'conta{numero}', 'senha': f'senha-{numero}', 'grupos': ['Aluno', 'secretaria']}
+            for numero in range(6)
+        ]
+        contas.append({'username': 'sem-senha'})
+
+        usuarios = criar_contas(contas, processos=2)
+
+        self.assertEqual(len(usuarios), 7)
+        self.assertTrue(User.objects.get(username='conta4').check_password('senha-4'))
+        self.assertFalse(User.objects.get(username='sem-senha').has_usable_password())
+        self.assertEqual(
+            sorted(User.objects.get(username='conta0').groups.values_list('name', flat=True)),
+            ['Aluno', 'Secretaria'],
+        )
+        self.assertEqual(Group.objects.count(), 2)
+
+
+class ExportacaoDePlanilhasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Física', codigo='FIS', carga_horaria=800)
+        cls.turma = Turma.objects.create(codigo='FIS-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        disciplina = Disciplina.objects.create(nome='Óptica', curso=curso)
+        aluno = Aluno.objects.create(
+            nome='Davi Souza', matricula='2025400', cpf='400', email='davi@nexus.test',
+            data_nascimento=date(2008, 1, 1), turma_atual=cls.turma,
+        )
+        matricula = Matricula.objects.get(aluno=aluno, turma=cls.turma)
+        for dia, presente in ((1, True), (2, False)):
+            Frequencia.objects.create(
+                matricula=matricula, disciplina=disciplina, data_aula=date(2025, 3, dia), presente=presente
+            )
+        cls.usuario = User.objects.create_user('coordenacao-exportacao')
+        cls.usuario.groups.add(Group.objects.create(name='Coordenacao'))
+
+    def test_planilha_da_turma_em_streaming(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(
+            reverse('exportar_planilha', args=['frequencias']), {'turma': self.turma.id}, HTTP_HOST='localhost'
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn('frequencias_FIS-1A.xlsx', response['Content-Disposition'])
+
+        planilha = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        linhas = list(planilha['Frequências'].iter_rows(values_only=True))
+        self.assertEqual(linhas[0][:2], ('Matrícula', 'Aluno'))
+        self.assertEqual([linha[5] for linha in linhas[1:]], ['Presente', 'Falta'])
+
+    def test_abas_extras_quando_passa_do_limite(self):
+        with mock.patch('escola.exportacao.LINHAS_POR_ABA', 2):
+            arquivo = escrever_xlsx('Notas', ['Valor'], ([valor] for valor in range(5)))
+        planilha = load_workbook(arquivo, read_only=True)
+        self.assertEqual(planilha.sheetnames, ['Notas', 'Notas (2)', 'Notas (3)'])
+        self.assertEqual(list(planilha['Notas (3)'].iter_rows(values_only=True)), [('Valor',), (4,)])
+
+
+class BoletinsEmLoteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Biologia', codigo='BIO', carga_horaria=800)
+        cls.turma = Turma.objects.create(codigo='BIO-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        disciplinas = [Disciplina.objects.create(nome=nome, curso=curso) for nome in ('Genética', 'Ecologia')]
+        cls.alunos = []
+        for numero, notas in enumerate(([Decimal('7.5'), Decimal('8')], [Decimal('4')])):
+            aluno = Aluno.objects.create(
+                nome=f'Aluno Bio {numero}', matricula=f'202550{numero}', cpf=f'50{numero}',
+                email=f'bio{numero}@nexus.test', data_nascimento=date(2008, 1, 1), turma_atual=cls.turma,
+            )
+            matricula = Matricula.objects.get(aluno=aluno, turma=cls.turma)
+            for tipo, valor in zip(TIPOS_AVALIACAO, notas):
+                Nota.objects.create(matricula=matricula, disciplina=disciplinas[0], tipo_avaliacao=tipo, valor=valor)
+            cls.alunos.append(aluno)
+        cls.usuario = User.objects.create_user('secretaria-boletins')
+        cls.usuario.groups.add(Group.objects.create(name='Secretaria'))
+
+    def test_lote_igual_ao_boletim_individual(self):
+        with self.assertNumQueries(3):
+            boletins = montar_boletins(Aluno.objects.filter(turma_atual=self.turma))
+        for aluno, boletim in zip(self.alunos, boletins):
+            esperado = [
+                {campo: item[campo] for campo in ('disciplina', 'media', 'status')}
+                for item in montar_boletim(aluno)
+            ]
+            self.assertEqual(boletim['linhas'], esperado)
+
+    def test_zip_da_turma(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('secretaria_boletins'), {'turma': self.turma.id}, HTTP_HOST='localhost')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        pacote = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(pacote.namelist()), ['BIO-1A/boletim_2025500.pdf', 'BIO-1A/boletim_2025501.pdf']
+        )
+        self.assertTrue(pacote.read('BIO-1A/boletim_2025500.pdf').startswith(b'%PDF'))
+
+
+class PdfsGeradosTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Química', codigo='QUI', carga_horaria=800)
+        turma = Turma.objects.create(codigo='QUI-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        cls.disciplina = Disciplina.objects.create(nome='Orgânica', curso=curso)
+        cls.aluno = Aluno.objects.create(
+            user=User.objects.create_user('aluno-pdf'), nome='Aluno Pdf', matricula='2025600', cpf='600',
+            email='pdf@nexus.test', data_nascimento=date(2008, 1, 1), turma_atual=turma,
+        )
+        cls.matricula = Matricula.objects.get(aluno=cls.aluno, turma=turma)
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='nexus-pdfs-')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.pasta = os.path.join(pasta, 'pdfs_gerados')
+        self.client.force_login(self.aluno.user)
+
+    def baixar(self, rota='exportar_boletim_pdf', **cabecalhos):
+        return self.client.get(reverse(rota), HTTP_HOST='localhost', **cabecalhos)
+
+    def test_segundo_download_vem_do_cache(self):
+        primeira = self.baixar()
+        self.assertEqual(primeira.status_code, 200)
+        self.assertTrue(b''.join(primeira.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(os.listdir(self.pasta)), 1)
+
+        with mock.patch('escola.views.pdf_do_boletim') as gerar:
+            segunda = self.baixar()
+            b''.join(segunda.streaming_content)
+        gerar.assert_not_called()
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+
+        self.assertEqual(self.baixar(HTTP_IF_NONE_MATCH=primeira['ETag']).status_code, 304)
+
+    def test_nova_nota_gera_outra_versao(self):
+        antiga = self.baixar()['ETag']
+        Nota.objects.create(
+            matricula=self.matricula, disciplina=self.disciplina, tipo_avaliacao=TIPOS_AVALIACAO[0], valor=Decimal('9')
+        )
+        nova = self.baixar()
+        self.assertNotEqual(nova['ETag'], antiga)
+        b''.join(nova.streaming_content)
+        self.assertEqual(len(os.listdir(self.pasta)), 1)
+
+    def test_limite_remove_os_usados_ha_mais_tempo(self):
+        os.makedirs(self.pasta)
+        antigo = os.path.join(self.pasta, 'boletim-0-antigo.pdf')
+        with open(antigo, 'wb') as arquivo:
+            arquivo.write(b'x' * 4096)
+        os.utime(antigo, (0, 0))
+
+        with override_settings(PDFS_GERADOS_TAMANHO_MAXIMO=4096):
+            b''.join(self.baixar('exportar_frequencia_pdf').streaming_content)
+        self.assertEqual([nome.split('-')[0] for nome in os.listdir(self.pasta)], ['frequencia'])
+
+    def test_erro_ao_gerar_nao_deixa_temporario(self):
+        def gerar():
+            raise ValueError('falha no reportlab')
+
+        with self.assertRaises(ValueError):
+            caminho_do_pdf('boletim', self.aluno, 'v1', gerar)
+        self.assertEqual(os.listdir(self.pasta), [])
+
+
+class TarefasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.curso = Curso.objects.create(nome='Física', codigo='FIS', carga_horaria=800)
+        turma = Turma.objects.create(codigo='FIS-1A', semestre='2025.1', turno='Manhã', curso=cls.curso)
+        disciplina = Disciplina.objects.create(nome='Mecânica', curso=cls.curso)
+        aluno = Aluno.objects.create(
+            nome='Aluno Fis', matricula='2025700', cpf='700', email='fis@nexus.test',
+            data_nascimento=date(2008, 1, 1), turma_atual=turma,
+        )
+        Nota.objects.create(
+            matricula=Matricula.objects.get(aluno=aluno, turma=turma), disciplina=disciplina,
+            tipo_avaliacao='Prova 1', valor=Decimal('7'),
+        )
+        cls.usuario = User.objects.create_user('secretaria-tarefas')
+        cls.usuario.groups.add(Group.objects.create(name='Secretaria'))
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='nexus-tarefas-')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def registrar(self, tipo, funcao):
+        TAREFAS[tipo] = funcao
+        self.addCleanup(TAREFAS.pop, tipo)
+
+    def test_planilha_do_curso_pela_fila(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('exportar_planilha', args=['notas']), {'curso': self.curso.id})
+        tarefa = Tarefa.objects.get()
+        self.assertRedirects(response, reverse('tarefa_detalhe', args=[tarefa.id]))
+        self.assertEqual(self.client.get(reverse('tarefa_progresso', args=[tarefa.id])).json()['status'], 'PENDENTE')
+
+        call_command('run_worker', '--uma-vez', stdout=io.StringIO())
+
+        progresso = self.client.get(reverse('tarefa_progresso', args=[tarefa.id])).json()
+        self.assertEqual((progresso['status'], progresso['progresso']), ('CONCLUIDA', 100))
+        response = self.client.get(progresso['arquivo'])
+        self.assertIn('notas_FIS.xlsx', response['Content-Disposition'])
+        # Na mídia o arquivo tem nome aleatório, não o nome do download.
+        tarefa.refresh_from_db()
+        self.assertRegex(tarefa.arquivo.name, r'^tarefas/[0-9a-f]{32}\.xlsx$')
+        planilha = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual([linha[1] for linha in planilha['Notas'].iter_rows(values_only=True)], ['Aluno', 'Aluno Fis'])
+
+    def test_tarefa_de_outro_usuario(self):
+        tarefa = enfileirar('gerar_boletins', {'formato': 'zip', 'nome_arquivo': 'b.zip', 'curso_id': self.curso.id})
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(reverse('tarefa_progresso', args=[tarefa.id])).status_code, 404)
+
+    def test_falha_volta_para_fila_com_espera(self):
+        self.registrar('instavel', mock.Mock(side_effect=[OSError('disco cheio'), None]))
+        tarefa = enfileirar('instavel', maximo_tentativas=2)
+
+        executar(reservar_tarefa())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('PENDENTE', 1))
+        self.assertIn('disco cheio', tarefa.erro)
+        self.assertGreater(tarefa.disponivel_em, timezone.now())
+        self.assertIsNone(reservar_tarefa())
+
+        Tarefa.objects.filter(pk=tarefa.pk).update(disponivel_em=timezone.now())
+        executar(reservar_tarefa())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('CONCLUIDA', 2))
+
+    def test_erro_definitivo_nao_repete(self):
+        self.registrar('invalida', mock.Mock(side_effect=ErroTarefa('Turma inexistente.')))
+        tarefa = enfileirar('invalida')
+        executar(reservar_tarefa())
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('FALHOU', 1))
+
+    def test_worker_que_perdeu_a_reserva_descarta_o_resultado(self):
+        def gerar(tarefa):
+            # Enquanto este worker trabalha, o prazo vence e outro assume.
+            Tarefa.objects.filter(pk=tarefa.pk).update(disponivel_em=timezone.now() - timedelta(seconds=1))
+            self.segunda = reservar_tarefa()
+            return 'resultado.txt', io.BytesIO(b'primeiro')
+
+        self.registrar('disputada', gerar)
+        enfileirar('disputada')
+        primeira = reservar_tarefa()
+        self.assertFalse(executar(primeira))
+
+        tarefa = Tarefa.objects.get()
+        self.assertEqual((tarefa.status, tarefa.reserva, bool(tarefa.arquivo)), ('EXECUTANDO', self.segunda.reserva, False))
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'tarefas')), [])
+
+    def test_prazo_vencido_libera_a_tarefa(self):
+        self.registrar('lenta', mock.Mock(return_value=None))
+        tarefa = enfileirar('lenta')
+        self.assertEqual(reservar_tarefa().pk, tarefa.pk)
+        self.assertIsNone(reservar_tarefa())
+
+        Tarefa.objects.filter(pk=tarefa.pk).update(disponivel_em=timezone.now() - timedelta(seconds=1))
+        reservada = reservar_tarefa()
+        self.assertEqual((reservada.pk, reservada.tentativas), (tarefa.pk, 2))
+
+
+class DocumentosAutomaticosTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        curso = Curso.objects.create(nome='Letras', codigo='LET', carga_horaria=800)
+        turma = Turma.objects.create(codigo='LET-1A', semestre='2025.1', turno='Manhã', curso=curso)
+        disciplina = Disciplina.objects.create(nome='Redação', curso=curso)
+        cls.aluno = Aluno.objects.create(
+            user=User.objects.create_user('aluno-documentos'), nome='Aluno Doc', matricula='2025800', cpf='800',
+            email='doc@nexus.test', data_nascimento=date(2008, 1, 1), turma_atual=turma,
+        )
+        cls.matricula = Matricula.objects.get(aluno=cls.aluno, turma=turma)
+        Frequencia.objects.bulk_create([
+            Frequencia(matricula=cls.matricula, disciplina=disciplina,
+                       data_aula=date(2025, 3, dia), presente=dia != 1)
+            for dia in range(1, 5)
+        ])
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='nexus-documentos-')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def solicitar(self, tipo):
+        self.client.force_login(self.aluno.user)
+        self.client.post(reverse('aluno_documentos'), {'tipo': tipo}, HTTP_HOST='localhost')
+        return Documento.objects.get(aluno=self.aluno, tipo=tipo)
+
+    def test_atestado_emitido_pelo_worker(self):
+        documento = self.solicitar('ATESTADO_FREQUENCIA')
+        self.assertEqual(documento.status, 'PENDENTE')
+
+        executar(reservar_tarefa())
+        documento.refresh_from_db()
+        self.assertEqual(documento.status, 'EMITIDO')
+        self.assertIsNotNone(documento.data_emissao)
+        self.assertRegex(documento.arquivo.name, r'^documentos/atestado_frequencia_2025800_[0-9a-f]{32}\.pdf$')
+        with documento.arquivo.open('rb') as arquivo:
+            conteudo = arquivo.read()
+        self.assertTrue(conteudo.startswith(b'%PDF'))
+        pagina = re.search(rb'stream\n(.*?)endstream', conteudo, re.S).group(1)
+        texto = zlib.decompress(base64.a85decode(pagina, adobe=True))
+        self.assertIn(b'frequ\\352ncia geral de 75%', texto)
+
+    def test_outros_tipos_ficam_com_a_secretaria(self):
+        self.solicitar('HISTORICO')
+        self.assertFalse(Tarefa.objects.exists())
+
+    def test_matricula_trancada_fica_pendente(self):
+        Matricula.objects.filter(pk=self.matricula.pk).update(status='Trancado')
+        documento = self.solicitar('DECLARACAO_MATRICULA')
+
+        executar(reservar_tarefa())
+        documento.refresh_from_db()
+        self.assertEqual((documento.status, bool(documento.arquivo)), ('PENDENTE', False))
+        self.assertEqual(Tarefa.objects.get().status, 'FALHOU')
@@ -0,0 +1,7 @@
+import unicodedata
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, para comparar prefixos como o índice de busca."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).lower()
@@ -12,6 +12,20 @@ urlpatterns = [
     path('plataforma/', views.pagina_plataforma, name='plataforma'),
     path('juridico/', views.pagina_juridico, name='juridico'),
 
+    # Calendário (eventos em JSON por período)
+    path('calendario/eventos/', views.calendario_eventos, name='calendario_eventos'),
+
+    # Sugestões para campos de escolha (JSON)
+    path('autocompletar/<str:tipo>/', views.autocompletar, name='autocompletar'),
+
+    # Planilhas de frequências, notas e matrículas (?turma= ou ?curso=)
+    path('exportar/<str:planilha>/', views.exportar_planilha, name='exportar_planilha'),
+
+    # Tarefas em segundo plano: acompanhamento, progresso (JSON) e resultado
+    path('tarefas/<int:tarefa_id>/', views.tarefa_detalhe, name='tarefa_detalhe'),
+    path('tarefas/<int:tarefa_id>/progresso/', views.tarefa_progresso, name='tarefa_progresso'),
+    path('tarefas/<int:tarefa_id>/arquivo/', views.tarefa_arquivo, name='tarefa_arquivo'),
+
     # Dashboard Aluno (mantém compatibilidade com rotas originais)
     path('dashboard/aluno/', views.dashboard_aluno, name='dashboard_aluno'),
     path('dashboard/aluno/boletim/', views.aluno_boletim, name='aluno_boletim'),
@@ -31,10 +45,12 @@ urlpatterns = [
     path('dashboard/professor/', views.dashboard_professor, name='dashboard_professor'),
     path('dashboard/professor/notas/', views.professor_notas, name='professor_notas'),
     path('dashboard/professor/notas/salvar/', views.professor_salvar_notas, name='professor_salvar_notas'),
+    path('dashboard/professor/notas/json/', views.professor_notas_json, name='professor_notas_json'),
     path('dashboard/professor/frequencia/', views.professor_frequencia, name='professor_frequencia'),
     path('dashboard/professor/frequencia/salvar/', views.professor_salvar_frequencia, name='professor_salvar_frequencia'),
     path('dashboard/professor/materiais/', views.professor_materiais, name='professor_materiais'),
     path('dashboard/professor/materiais/download/<int:material_id>/', views.download_material, name='download_material'),
+    path('dashboard/professor/horario/', views.professor_horario, name='professor_horario'),
     path('dashboard/professor/calendario/', views.professor_calendario, name='professor_calendario'),
     path('dashboard/professor/comunicados/', views.professor_comunicados, name='professor_comunicados'),
     path('dashboard/professor/configuracoes/', views.professor_configuracoes, name='professor_configuracoes'),
@@ -43,6 +59,7 @@ urlpatterns = [
     path('dashboard/secretaria/', views.dashboard_secretaria, name='dashboard_secretaria'),
     path('dashboard/secretaria/alunos/', views.secretaria_alunos, name='secretaria_alunos'),
     path('dashboard/secretaria/alunos/adicionar/', views.secretaria_aluno_adicionar, name='secretaria_aluno_adicionar'),
+    path('dashboard/secretaria/alunos/importar/', views.secretaria_alunos_importar, name='secretaria_alunos_importar'),
     path('dashboard/secretaria/alunos/<int:aluno_id>/editar/', views.secretaria_aluno_editar, name='secretaria_aluno_editar'),
     path('dashboard/secretaria/alunos/<int:aluno_id>/excluir/', views.secretaria_aluno_excluir, name='secretaria_aluno_excluir'),
     path('dashboard/secretaria/professores/', views.secretaria_professores, name='secretaria_professores'),
@@ -50,6 +67,7 @@ urlpatterns = [
     path('dashboard/secretaria/professores/<int:professor_id>/editar/', views.secretaria_professor_editar, name='secretaria_professor_editar'),
     path('dashboard/secretaria/professores/<int:professor_id>/excluir/', views.secretaria_professor_excluir, name='secretaria_professor_excluir'),
     path('dashboard/secretaria/academico/', views.secretaria_academico, name='secretaria_academico'),
+    path('dashboard/secretaria/boletins/', views.secretaria_boletins, name='secretaria_boletins'),
     path('dashboard/secretaria/documentos/', views.secretaria_documentos, name='secretaria_documentos'),
     path('dashboard/secretaria/documentos/<int:doc_id>/visualizar/', views.secretaria_documento_visualizar, name='secretaria_documento_visualizar'),
     path('dashboard/secretaria/documentos/<int:doc_id>/emitir/', views.secretaria_documento_emitir, name='secretaria_documento_emitir'),
@@ -81,6 +99,7 @@ urlpatterns = [
     path('dashboard/coordenacao/turmas/<int:turma_id>/editar/', views.coordenacao_turma_editar, name='coordenacao_turma_editar'),
     path('dashboard/coordenacao/turmas/<int:turma_id>/excluir/', views.coordenacao_turma_excluir, name='coordenacao_turma_excluir'),
     path('dashboard/coordenacao/alunos/adicionar/', views.coordenacao_aluno_adicionar, name='coordenacao_aluno_adicionar'),
+    path('dashboard/coordenacao/alunos/importar/', views.coordenacao_alunos_importar, name='coordenacao_alunos_importar'),
     path('dashboard/coordenacao/alunos/<int:aluno_id>/editar/', views.coordenacao_aluno_editar, name='coordenacao_aluno_editar'),
     path('dashboard/coordenacao/alunos/<int:aluno_id>/excluir/', views.coordenacao_aluno_excluir, name='coordenacao_aluno_excluir'),
     
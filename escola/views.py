@@ -1,27 +1,43 @@
 import json
-import io
-from decimal import Decimal, InvalidOperation
-from django.db.models import Q, Count, Avg
+import uuid
+from decimal import Decimal
+from django.db.models import Q, Count
+from django.core.files.storage import default_storage
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import HttpResponse, JsonResponse, FileResponse
+from django.http import Http404, HttpResponse, JsonResponse, FileResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
 from rest_framework import viewsets
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from openpyxl import Workbook
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, quote_etag
 
 from .models import (
     Aluno, Nota, Turma, Professor, Disciplina, 
-    Aviso, Frequencia, Matricula, Evento, HorarioAula, Curso, Documento, Material,
-    JustificativaFalta
+    Aviso, Matricula, Evento, HorarioAula, Curso, Documento, Material,
+    JustificativaFalta, Tarefa
 )
 from .serializers import AlunoSerializer, NotaSerializer
+from .autocompletar import FONTES_SUGESTOES, limite_sugestoes, sugestoes
+from .boletim import montar_boletim, montar_diario_notas
+from .busca import filtrar_por_busca
+from .calendario import MAXIMO_DIAS_PERIODO, eventos_do_usuario, listar_eventos, versao_eventos
+from .contadores import obter_contadores
+from .documentos import TIPOS_AUTOMATICOS
+from .exportacao import PLANILHAS, escrever_xlsx, planilha_xlsx, resposta_xlsx
+from .frequencias import frequencia_do_aluno
+from .horarios import DIAS_GRADE, HORARIOS_PADRAO, grade_da_turma, grade_do_professor, linhas_da_grade
+from .lancamentos import lancar_frequencia, lancar_notas
+from .paginacao import paginar_por_chave
+from .pdf_boletins import FORMATOS, pdf_da_frequencia, pdf_do_boletim, resposta_boletins
+from .pdfs_gerados import resposta_pdf
+from .relatorios import alunos_com_indicadores, indicadores_gerais
+from .tarefas import enfileirar
 
 
 class AlunoViewSet(viewsets.ModelViewSet):
@@ -36,7 +52,7 @@ class NotaViewSet(viewsets.ModelViewSet):
 
 def login_view(request):
     if request.user.is_authenticated:
-        return redirect_user_by_role(request.user)
+        return redirect_user_by_role(request)
     
     if request.method == 'POST':
         usuario = request.POST.get('username')
@@ -46,58 +62,24 @@ def login_view(request):
         
         if user is not None:
             login(request, user)
-            return redirect_user_by_role(user)
+            return redirect_user_by_role(request)
         else:
             messages.error(request, 'Usuário ou senha incorretos.')
     
     return render(request, 'escola/login.html')
 
 
-def redirect_user_by_role(user):
+def redirect_user_by_role(request):
     """Redireciona o usuário para o dashboard apropriado baseado em sua função."""
-    if user.is_superuser:
-        return redirect('dashboard_admin')
-    
-    # Verifica se é aluno (via OneToOne relationship)
-    try:
-        if hasattr(user, 'perfil_aluno') and user.perfil_aluno:
-            return redirect('dashboard_aluno')
-    except Aluno.DoesNotExist:
-        pass
-    
-    # Verifica se é professor (via OneToOne relationship)
-    try:
-        if hasattr(user, 'perfil_professor') and user.perfil_professor:
-            return redirect('dashboard_professor')
-    except Professor.DoesNotExist:
-        pass
-    
-    # Fallback: tenta encontrar por email
-    if Aluno.objects.filter(email=user.email).exists():
-        aluno = Aluno.objects.get(email=user.email)
-        if not aluno.user:
-            aluno.user = user
-            aluno.save()
-        return redirect('dashboard_aluno')
-    
-    if Professor.objects.filter(email=user.email).exists():
-        professor = Professor.objects.get(email=user.email)
-        if not professor.user:
-            professor.user = user
-            professor.save()
-        return redirect('dashboard_professor')
-    
-    # Verifica grupos de permissão
-    user_groups = user.groups.values_list('name', flat=True)
-    
-    if 'secretaria' in [g.lower() for g in user_groups]:
-        return redirect('dashboard_secretaria')
-    
-    if 'coordenacao' in [g.lower() for g in user_groups]:
-        return redirect('dashboard_coordenacao')
-    
-    # Fallback para home
-    return redirect('home')
+    destinos = {
+        'admin': 'dashboard_admin',
+        'aluno': 'dashboard_aluno',
+        'professor': 'dashboard_professor',
+        'secretaria': 'dashboard_secretaria',
+        'coordenacao': 'dashboard_coordenacao',
+    }
+    # O papel já vincula aluno/professor cadastrado com o e-mail do usuário
+    return redirect(destinos.get(request.nexus_role.principal, 'home'))
 
 
 def logout_view(request):
@@ -124,13 +106,12 @@ def pagina_juridico(request):
 
 @login_required
 def dashboard_aluno(request):
-    try:
-        aluno = request.user.perfil_aluno
-        media_geral = aluno.calcular_media_geral()
-        faltas_totais = aluno.contar_faltas()
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         messages.error(request, 'Perfil de aluno não encontrado.')
         return redirect('home')
+    media_geral = aluno.calcular_media_geral()
+    faltas_totais = aluno.contar_faltas()
 
     avisos_query = Q(destinatario='todos') | Q(destinatario='alunos')
     if aluno.turma_atual:
@@ -138,16 +119,10 @@ def dashboard_aluno(request):
     
     avisos = Aviso.objects.filter(avisos_query, ativo=True).order_by('-data_criacao')[:5]
 
-    desempenho_data = []
-    if aluno.turma_atual:
-        for disciplina in aluno.turma_atual.curso.disciplinas.all():
-            notas = Nota.objects.filter(matricula__aluno=aluno, disciplina=disciplina)
-            lista_notas = [float(n.valor) for n in notas]
-            media = round(sum(lista_notas) / len(lista_notas), 1) if lista_notas else 0
-            desempenho_data.append({
-                'disciplina': disciplina.nome[:15],
-                'media': media
-            })
+    desempenho_data = [
+        {'disciplina': item['disciplina'][:15], 'media': item['media']}
+        for item in montar_boletim(aluno)
+    ]
     
     desempenho_json = json.dumps(desempenho_data)
 
@@ -163,30 +138,11 @@ def dashboard_aluno(request):
 
 @login_required
 def aluno_boletim(request):
-    try:
-        aluno = request.user.perfil_aluno
-        turma = aluno.turma_atual
-    except AttributeError:
-        return redirect('home')
-
-    boletim_completo = []
-    if turma:
-        disciplinas = turma.curso.disciplinas.all()
-        for disciplina in disciplinas:
-            notas = Nota.objects.filter(matricula__aluno=aluno, disciplina=disciplina)
-            lista_notas = [float(n.valor) for n in notas]
-            media = sum(lista_notas) / len(lista_notas) if lista_notas else 0
-            
-            status = "Aprovado" if media >= 6 else "Recuperação"
-            if not lista_notas:
-                status = "Cursando"
+    aluno = request.perfil.aluno
+    if aluno is None:
+        return redirect('home')
 
-            boletim_completo.append({
-                'disciplina': disciplina.nome,
-                'notas': lista_notas,
-                'media': round(media, 1),
-                'status': status
-            })
+    boletim_completo = montar_boletim(aluno)
 
     contexto = {
         'aluno': aluno,
@@ -197,50 +153,11 @@ def aluno_boletim(request):
 
 @login_required
 def aluno_frequencia(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
 
-    frequencia_detalhada = []
-    total_presenca = 0
-    total_aulas_geral = 0
-    
-    if aluno.turma_atual:
-        for disciplina in aluno.turma_atual.curso.disciplinas.all():
-            faltas = Frequencia.objects.filter(
-                matricula__aluno=aluno, 
-                disciplina=disciplina, 
-                presente=False
-            ).count()
-            
-            total_aulas = Frequencia.objects.filter(
-                matricula__aluno=aluno, 
-                disciplina=disciplina
-            ).count()
-
-            porcentagem = 100
-            if total_aulas > 0:
-                presencas = total_aulas - faltas
-                porcentagem = int((presencas / total_aulas) * 100)
-                total_presenca += presencas
-                total_aulas_geral += total_aulas
-
-            status = "Regular"
-            if porcentagem < 75:
-                status = "Atenção"
-            if porcentagem == 100:
-                status = "Excelente"
-
-            frequencia_detalhada.append({
-                'disciplina': disciplina.nome,
-                'faltas': faltas,
-                'total_aulas': total_aulas,
-                'porcentagem': porcentagem,
-                'status': status
-            })
-
-    porcentagem_geral = int((total_presenca / total_aulas_geral) * 100) if total_aulas_geral > 0 else 100
+    frequencia_detalhada, porcentagem_geral = frequencia_do_aluno(aluno)
     
     contexto = {
         'aluno': aluno,
@@ -252,24 +169,12 @@ def aluno_frequencia(request):
 
 @login_required
 def aluno_horario(request):
-    try:
-        aluno = request.user.perfil_aluno
-        turma = aluno.turma_atual
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
+    turma = aluno.turma_atual
 
-    grade_horaria = {}
-    horarios_padrao = ["07:00", "07:50", "08:40", "09:30", "09:50", "10:40", "11:30"]
-
-    if turma:
-        aulas = HorarioAula.objects.filter(turma=turma).select_related('disciplina')
-        
-        for hora in horarios_padrao:
-            grade_horaria[hora] = {'SEG': None, 'TER': None, 'QUA': None, 'QUI': None, 'SEX': None}
-            
-            for aula in aulas:
-                if aula.hora_inicio.strftime('%H:%M') == hora:
-                    grade_horaria[hora][aula.dia_semana] = aula.disciplina.nome
+    grade_horaria = grade_da_turma(turma.id) if turma else {}
 
     return render(request, 'escola/aluno_horario.html', {
         'aluno': aluno, 
@@ -279,28 +184,59 @@ def aluno_horario(request):
 
 @login_required
 def aluno_calendario(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
 
-    eventos_query = Evento.objects.filter(
-        Q(turma__isnull=True) | Q(turma=aluno.turma_atual)
-    ).values('titulo', 'data', 'tipo')
+    proximos_eventos = Evento.objects.filter(
+        Q(turma__isnull=True) | Q(turma=aluno.turma_atual),
+        data__gte=timezone.now().date()
+    ).order_by('data').values('titulo', 'data', 'tipo')[:5]
 
-    eventos_json = json.dumps(list(eventos_query), cls=DjangoJSONEncoder)
+    proximos_eventos_json = json.dumps(list(proximos_eventos), cls=DjangoJSONEncoder)
 
     return render(request, 'escola/aluno_calendario.html', {
         'aluno': aluno,
-        'eventos_json': eventos_json
+        'proximos_eventos_json': proximos_eventos_json
     })
 
 
 @login_required
-def aluno_justificativa(request):
+def calendario_eventos(request):
+    """
+    Eventos do calendário entre ?inicio= e ?fim= (datas ISO, inclusivas),
+    limitados ao que o usuário pode ver. Responde 304 quando o ETag ou a data
+    de modificação enviados pelo navegador ainda são válidos.
+    """
     try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+        inicio = parse_date(request.GET.get('inicio', '')[:10])
+        fim = parse_date(request.GET.get('fim', '')[:10])
+    except ValueError:
+        inicio = fim = None
+    if not inicio or not fim or fim < inicio:
+        return JsonResponse({'error': 'Informe um período válido em inicio e fim (AAAA-MM-DD).'}, status=400)
+    if (fim - inicio).days > MAXIMO_DIAS_PERIODO:
+        return JsonResponse({'error': f'O período não pode passar de {MAXIMO_DIAS_PERIODO} dias.'}, status=400)
+
+    eventos = eventos_do_usuario(request.nexus_role).filter(data__range=(inicio, fim))
+    etag, ultima_alteracao = versao_eventos(eventos)
+    etag = quote_etag(etag)
+    ultima_alteracao = int(ultima_alteracao.timestamp()) if ultima_alteracao else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=ultima_alteracao)
+    if response is None:
+        response = JsonResponse({'eventos': listar_eventos(eventos)})
+    response.headers['ETag'] = etag
+    if ultima_alteracao:
+        response.headers['Last-Modified'] = http_date(ultima_alteracao)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def aluno_justificativa(request):
+    aluno = request.perfil.aluno
+    if aluno is None:
         messages.error(request, 'Perfil de aluno não encontrado.')
         return redirect('home')
     
@@ -343,19 +279,13 @@ def aluno_justificativa(request):
 
 @login_required
 def aluno_evento(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
-        aluno = None
-    return render(request, 'escola/aluno_evento.html', {'aluno': aluno})
+    return render(request, 'escola/aluno_evento.html', {'aluno': request.perfil.aluno})
 
 
 @login_required
 def aluno_configuracoes(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
-        aluno = None
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
     
     user = request.user
@@ -410,24 +340,21 @@ def aluno_configuracoes(request):
 
 @login_required
 def aluno_materiais(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         messages.error(request, 'Perfil de aluno não encontrado.')
         return redirect('home')
     
     materiais = []
+    disciplinas = []
     if aluno.turma_atual:
+        disciplinas = aluno.turma_atual.curso.disciplinas.all()
         materiais = Material.objects.filter(
             Q(turma=aluno.turma_atual) | Q(turma__isnull=True),
-            disciplina__in=aluno.turma_atual.curso.disciplinas.all(),
+            disciplina__in=[disciplina.id for disciplina in disciplinas],
             ativo=True
         ).select_related('disciplina', 'professor').order_by('-data_upload')
     
-    disciplinas = []
-    if aluno.turma_atual:
-        disciplinas = aluno.turma_atual.curso.disciplinas.all()
-    
     disciplina_filtro = request.GET.get('disciplina', '')
     tipo_filtro = request.GET.get('tipo', '')
     
@@ -449,9 +376,8 @@ def aluno_materiais(request):
 
 @login_required
 def aluno_documentos(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         messages.error(request, 'Perfil de aluno não encontrado.')
         return redirect('home')
     
@@ -466,7 +392,10 @@ def aluno_documentos(request):
                 descricao=descricao,
                 criado_por=request.user
             )
-            messages.success(request, 'Solicitação de documento enviada com sucesso!')
+            if tipo in TIPOS_AUTOMATICOS:
+                messages.success(request, 'Solicitação enviada! O documento será emitido automaticamente em instantes.')
+            else:
+                messages.success(request, 'Solicitação de documento enviada com sucesso!')
         else:
             messages.error(request, 'Selecione o tipo de documento.')
         
@@ -484,167 +413,133 @@ def aluno_documentos(request):
 
 @login_required
 def exportar_boletim_pdf(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
 
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, 800, "Boletim Escolar - Nexus")
-    p.setFont("Helvetica", 12)
-    p.drawString(50, 780, f"Aluno: {aluno.nome}")
-    p.drawString(50, 765, f"Matrícula: {aluno.matricula}")
-    p.drawString(50, 750, f"Turma: {aluno.turma_atual.codigo if aluno.turma_atual else 'Sem Turma'}")
-    
-    p.line(50, 740, 550, 740)
-    
-    y = 710
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(50, y, "DISCIPLINA")
-    p.drawString(250, y, "MÉDIA")
-    p.drawString(400, y, "SITUAÇÃO")
-    y -= 20
-
-    if aluno.turma_atual:
-        for disciplina in aluno.turma_atual.curso.disciplinas.all():
-            notas = Nota.objects.filter(matricula__aluno=aluno, disciplina=disciplina)
-            lista_notas = [float(n.valor) for n in notas]
-            media = sum(lista_notas) / len(lista_notas) if lista_notas else 0
-            status = "Aprovado" if media >= 6 else "Recuperação"
-            if not lista_notas:
-                status = "Cursando"
-
-            p.setFont("Helvetica", 10)
-            p.drawString(50, y, str(disciplina.nome))
-            p.drawString(250, y, str(round(media, 1)))
-            
-            if status == "Recuperação":
-                p.setFillColor(colors.red)
-            elif status == "Aprovado":
-                p.setFillColor(colors.green)
-            else:
-                p.setFillColor(colors.black)
-                
-            p.drawString(400, y, status)
-            p.setFillColor(colors.black)
-            y -= 20
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="boletim_{aluno.matricula}.pdf"'
-    return response
+    return resposta_pdf(request, 'boletim', aluno, f'boletim_{aluno.matricula}.pdf', lambda: pdf_do_boletim({
+        'nome': aluno.nome,
+        'matricula': aluno.matricula,
+        'turma': aluno.turma_atual.codigo if aluno.turma_atual else None,
+        'linhas': montar_boletim(aluno),
+    }))
 
 
 @login_required
 def exportar_frequencia_pdf(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
 
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, 800, "Relatório de Frequência - Nexus")
-    p.setFont("Helvetica", 12)
-    p.drawString(50, 780, f"Aluno: {aluno.nome}")
-    
-    y = 740
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(50, y, "DISCIPLINA")
-    p.drawString(250, y, "FALTAS")
-    p.drawString(350, y, "% PRESENÇA")
-    y -= 20
-
-    if aluno.turma_atual:
-        for disciplina in aluno.turma_atual.curso.disciplinas.all():
-            faltas = Frequencia.objects.filter(matricula__aluno=aluno, disciplina=disciplina, presente=False).count()
-            total = Frequencia.objects.filter(matricula__aluno=aluno, disciplina=disciplina).count()
-            porc = int(((total - faltas) / total) * 100) if total > 0 else 100
-
-            p.setFont("Helvetica", 10)
-            p.drawString(50, y, str(disciplina.nome))
-            p.drawString(250, y, str(faltas))
-            p.drawString(350, y, f"{porc}%")
-            y -= 20
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="frequencia_{aluno.matricula}.pdf"'
-    return response
+    return resposta_pdf(request, 'frequencia', aluno, f'frequencia_{aluno.matricula}.pdf', lambda: pdf_da_frequencia({
+        'nome': aluno.nome,
+        'linhas': frequencia_do_aluno(aluno)[0],
+    }))
 
 
 @login_required
 def exportar_frequencia_excel(request):
-    try:
-        aluno = request.user.perfil_aluno
-    except AttributeError:
+    aluno = request.perfil.aluno
+    if aluno is None:
         return redirect('home')
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Frequência"
-    ws.append(['Disciplina', 'Total Aulas', 'Faltas', '% Presença', 'Situação'])
+    linhas, _ = frequencia_do_aluno(aluno)
+    arquivo = escrever_xlsx(
+        'Frequência',
+        ['Disciplina', 'Total Aulas', 'Faltas', '% Presença', 'Situação'],
+        ([item['disciplina'], item['total_aulas'], item['faltas'], f"{item['porcentagem']}%", item['status']]
+         for item in linhas),
+    )
+    return resposta_xlsx(arquivo, f'frequencia_{aluno.matricula}.xlsx')
 
-    if aluno.turma_atual:
-        for disciplina in aluno.turma_atual.curso.disciplinas.all():
-            faltas = Frequencia.objects.filter(matricula__aluno=aluno, disciplina=disciplina, presente=False).count()
-            total = Frequencia.objects.filter(matricula__aluno=aluno, disciplina=disciplina).count()
-            porc = int(((total - faltas) / total) * 100) if total > 0 else 100
-            status = "Atenção" if porc < 75 else "Regular"
-            ws.append([disciplina.nome, total, faltas, f"{porc}%", status])
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=frequencia_{aluno.matricula}.xlsx'
-    wb.save(response)
-    return response
+
+@login_required
+def exportar_planilha(request, planilha):
+    if not (check_secretaria_permission(request) or check_coordenacao_permission(request)):
+        messages.error(request, 'Acesso não autorizado.')
+        return redirect('home')
+    if planilha not in PLANILHAS:
+        raise Http404('Planilha inexistente.')
+
+    # A planilha da turma sai na hora; as do curso e da escola vão para a fila.
+    turma_id = request.GET.get('turma', '')
+    curso_id = request.GET.get('curso', '')
+    if turma_id.isdigit():
+        turma = get_object_or_404(Turma, id=turma_id)
+        return planilha_xlsx(planilha, f'{planilha}_{turma.codigo}.xlsx', turma_id=turma.id)
+    if curso_id.isdigit():
+        curso = get_object_or_404(Curso, id=curso_id)
+        parametros = {'planilha': planilha, 'nome_arquivo': f'{planilha}_{curso.codigo}.xlsx', 'curso_id': curso.id}
+    else:
+        parametros = {'planilha': planilha, 'nome_arquivo': f'{planilha}_escola.xlsx'}
+    tarefa = enfileirar('exportar_planilha', parametros, usuario=request.user)
+    return redirect('tarefa_detalhe', tarefa_id=tarefa.id)
 
 
-def check_secretaria_permission(user):
-    return user.is_superuser or user.groups.filter(name__iexact='secretaria').exists()
+BASE_DO_PAPEL = {
+    'admin': 'escola/base_admin.html',
+    'aluno': 'escola/base_aluno.html',
+    'professor': 'escola/base_professor.html',
+    'coordenacao': 'escola/base_coordenacao.html',
+}
 
 
-def check_coordenacao_permission(user):
-    return user.is_superuser or user.groups.filter(name__iexact='coordenacao').exists()
+@login_required
+def tarefa_detalhe(request, tarefa_id):
+    tarefa = get_object_or_404(Tarefa, id=tarefa_id, criado_por=request.user)
+    return render(request, 'escola/tarefa.html', {
+        'tarefa': tarefa,
+        'base_template': BASE_DO_PAPEL.get(request.nexus_role.principal, 'escola/base_secretaria.html'),
+    })
 
 
-def check_professor_permission(user):
-    return user.is_superuser or hasattr(user, 'perfil_professor')
+@login_required
+def tarefa_progresso(request, tarefa_id):
+    tarefa = get_object_or_404(Tarefa, id=tarefa_id, criado_por=request.user)
+    return JsonResponse({
+        'status': tarefa.status,
+        'status_display': tarefa.get_status_display(),
+        'progresso': tarefa.progresso,
+        'mensagem': tarefa.mensagem,
+        'tentativas': tarefa.tentativas,
+        'arquivo': reverse('tarefa_arquivo', args=[tarefa.id]) if tarefa.arquivo else None,
+    })
+
+
+@login_required
+def tarefa_arquivo(request, tarefa_id):
+    tarefa = get_object_or_404(Tarefa, id=tarefa_id, criado_por=request.user)
+    if not tarefa.arquivo:
+        raise Http404('A tarefa ainda não tem arquivo.')
+    return FileResponse(tarefa.arquivo.open('rb'), as_attachment=True, filename=tarefa.parametros.get('nome_arquivo'))
+
+
+def check_secretaria_permission(request):
+    return request.nexus_role.secretaria
+
+
+def check_coordenacao_permission(request):
+    return request.nexus_role.coordenacao
+
+
+def check_professor_permission(request):
+    return request.nexus_role.professor
 
 
 @login_required
 def dashboard_secretaria(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
 
-    total_alunos = Aluno.objects.count()
-    total_professores = Professor.objects.count()
-    total_turmas = Turma.objects.count()
-    total_cursos = Curso.objects.count()
-    
     ultimos_alunos = Aluno.objects.order_by('-id')[:5]
-    documentos_pendentes = Documento.objects.filter(status='PENDENTE').count()
-    justificativas_pendentes = JustificativaFalta.objects.filter(status='PENDENTE').count()
 
     context = {
-        'total_alunos': total_alunos,
-        'total_professores': total_professores,
-        'total_turmas': total_turmas,
-        'total_cursos': total_cursos,
+        **obter_contadores(
+            'total_alunos', 'total_professores', 'total_turmas', 'total_cursos',
+            'documentos_pendentes', 'justificativas_pendentes',
+        ),
         'ultimos_alunos': ultimos_alunos,
-        'documentos_pendentes': documentos_pendentes,
-        'justificativas_pendentes': justificativas_pendentes,
     }
     
     return render(request, 'escola/secre_dashboard.html', context)
@@ -652,22 +547,24 @@ def dashboard_secretaria(request):
 
 @login_required
 def secretaria_alunos(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return redirect('home')
     
-    alunos = Aluno.objects.all().order_by('nome')
-    turmas = Turma.objects.all()
+    alunos = Aluno.objects.select_related('turma_atual')
+    turmas = Turma.objects.order_by('codigo')
     
     busca = request.GET.get('busca', '')
     turma_filtro = request.GET.get('turma', '')
     
     if busca:
-        alunos = alunos.filter(Q(nome__icontains=busca) | Q(matricula__icontains=busca))
-    if turma_filtro:
+        alunos = filtrar_por_busca(alunos, busca)
+    if turma_filtro.isdigit():
         alunos = alunos.filter(turma_atual_id=turma_filtro)
+    pagina = paginar_por_chave(alunos, request.GET)
     
     return render(request, 'escola/secre_alunos.html', {
-        'alunos': alunos,
+        'alunos': pagina,
+        'pagina': pagina,
         'turmas': turmas,
         'busca': busca,
         'turma_filtro': turma_filtro
@@ -676,20 +573,28 @@ def secretaria_alunos(request):
 
 @login_required
 def secretaria_professores(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return redirect('home')
     
-    professores = Professor.objects.all().order_by('nome')
+    professores = Professor.objects.all()
     disciplinas = Disciplina.objects.all()
+    
+    busca = request.GET.get('busca', '')
+    if busca:
+        professores = filtrar_por_busca(professores, busca)
+    pagina = paginar_por_chave(professores, request.GET)
+    
     return render(request, 'escola/secre_professores.html', {
-        'professores': professores,
-        'disciplinas': disciplinas
+        'professores': pagina,
+        'pagina': pagina,
+        'disciplinas': disciplinas,
+        'busca': busca,
     })
 
 
 @login_required
 def secretaria_professor_adicionar(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -760,7 +665,7 @@ def secretaria_professor_adicionar(request):
 
 @login_required
 def secretaria_professor_editar(request, professor_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -846,7 +751,7 @@ def secretaria_professor_editar(request, professor_id):
 
 @login_required
 def secretaria_professor_excluir(request, professor_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -863,9 +768,36 @@ def secretaria_professor_excluir(request, professor_id):
     return render(request, 'escola/secre_professor_excluir.html', {'professor': professor})
 
 
+@login_required
+def secretaria_boletins(request):
+    """Boletins de toda a turma (?turma=) ou de todo o curso (?curso=), em ZIP ou PDF único."""
+    if not check_secretaria_permission(request):
+        messages.error(request, 'Acesso não autorizado.')
+        return redirect('home')
+
+    formato = request.GET.get('formato', 'zip')
+    if formato not in FORMATOS:
+        formato = 'zip'
+    turma_id = request.GET.get('turma', '')
+    curso_id = request.GET.get('curso', '')
+    if turma_id.isdigit():
+        turma = get_object_or_404(Turma, id=turma_id)
+        return resposta_boletins(Aluno.objects.filter(turma_atual=turma), formato, f'boletins_{turma.codigo}')
+    if curso_id.isdigit():
+        # O curso inteiro pode ter milhares de alunos: os boletins vão para a fila.
+        curso = get_object_or_404(Curso, id=curso_id)
+        tarefa = enfileirar('gerar_boletins', {
+            'formato': formato, 'nome_arquivo': f'boletins_{curso.codigo}.{formato}', 'curso_id': curso.id,
+        }, usuario=request.user)
+        return redirect('tarefa_detalhe', tarefa_id=tarefa.id)
+
+    messages.error(request, 'Informe a turma ou o curso dos boletins.')
+    return redirect('secretaria_academico')
+
+
 @login_required
 def secretaria_academico(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return redirect('home')
     
     if request.method == 'POST':
@@ -1066,9 +998,21 @@ def secretaria_academico(request):
     return render(request, 'escola/secre_academico.html', context)
 
 
+@login_required
+def autocompletar(request, tipo):
+    """Sugestões para os campos de escolha de aluno, professor e turma."""
+    if not (check_secretaria_permission(request) or check_coordenacao_permission(request)):
+        return JsonResponse({'error': 'Não autorizado'}, status=403)
+    if tipo not in FONTES_SUGESTOES:
+        return JsonResponse({'error': 'Tipo inválido.'}, status=404)
+
+    limite = limite_sugestoes(request.GET.get('limite'))
+    return JsonResponse({'resultados': sugestoes(tipo, request.GET.get('q', ''), limite)})
+
+
 @login_required
 def secretaria_documentos(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
 
@@ -1085,7 +1029,7 @@ def secretaria_documentos(request):
         documentos = documentos.filter(status=status_filtro)
 
     if busca_aluno:
-        documentos = documentos.filter(aluno__nome__icontains=busca_aluno)
+        documentos = documentos.filter(aluno__in=filtrar_por_busca(Aluno.objects.values('id'), busca_aluno))
 
     if request.method == 'POST':
         aluno_id = request.POST.get('aluno_id')
@@ -1116,7 +1060,6 @@ def secretaria_documentos(request):
         'tipo_filtro': tipo_filtro or 'TODOS',
         'status_filtro': status_filtro or 'TODOS',
         'busca_aluno': busca_aluno or '',
-        'alunos': Aluno.objects.all().order_by('nome'),
     }
 
     return render(request, 'escola/secre_documentos.html', context)
@@ -1124,7 +1067,7 @@ def secretaria_documentos(request):
 
 @login_required
 def secretaria_documento_visualizar(request, doc_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
     
@@ -1151,7 +1094,7 @@ def secretaria_documento_visualizar(request, doc_id):
 
 @login_required
 def secretaria_documento_emitir(request, doc_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return JsonResponse({'success': False, 'error': 'Acesso não autorizado.'})
     
     if request.method == 'POST':
@@ -1174,7 +1117,7 @@ def secretaria_documento_emitir(request, doc_id):
 
 @login_required
 def secretaria_documento_confirmar(request, doc_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return JsonResponse({'success': False, 'error': 'Acesso não autorizado.'})
     
     if request.method == 'POST':
@@ -1194,7 +1137,7 @@ def secretaria_documento_confirmar(request, doc_id):
 
 @login_required
 def secretaria_documento_enviar(request, doc_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         return JsonResponse({'success': False, 'error': 'Acesso não autorizado.'})
     
     if request.method == 'POST':
@@ -1217,12 +1160,12 @@ def secretaria_documento_enviar(request, doc_id):
 
 @login_required
 def aluno_documento_download(request, doc_id):
-    if not hasattr(request.user, 'perfil_aluno'):
+    if not request.nexus_role.aluno:
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
     
     try:
-        aluno = request.user.perfil_aluno
+        aluno = request.perfil.aluno
         documento = Documento.objects.get(id=doc_id, aluno=aluno)
         
         if documento.arquivo and documento.status in ['EMITIDO', 'ENTREGUE']:
@@ -1239,17 +1182,14 @@ def aluno_documento_download(request, doc_id):
 
 @login_required
 def secretaria_calendario(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
 
     eventos = Evento.objects.select_related('turma').order_by('-data')
-    eventos_query = Evento.objects.all().values('titulo', 'data', 'tipo', 'turma__codigo')
-    eventos_json = json.dumps(list(eventos_query), cls=DjangoJSONEncoder)
 
     context = {
         'eventos': eventos,
-        'eventos_json': eventos_json,
     }
     
     return render(request, 'escola/secre_calendario.html', context)
@@ -1257,7 +1197,7 @@ def secretaria_calendario(request):
 
 @login_required
 def secretaria_configuracoes(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
     
@@ -1301,7 +1241,7 @@ def secretaria_configuracoes(request):
 
 @login_required
 def secretaria_evento_adicionar(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -1338,7 +1278,7 @@ def secretaria_evento_adicionar(request):
 
 @login_required
 def secretaria_evento_editar(request, evento_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -1371,7 +1311,7 @@ def secretaria_evento_editar(request, evento_id):
 
 @login_required
 def secretaria_evento_excluir(request, evento_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -1384,7 +1324,7 @@ def secretaria_evento_excluir(request, evento_id):
 
 @login_required
 def secretaria_justificativas(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, "Acesso não autorizado.")
         return redirect('home')
 
@@ -1397,7 +1337,9 @@ def secretaria_justificativas(request):
         justificativas = justificativas.filter(status=status_filtro)
 
     if busca_aluno:
-        justificativas = justificativas.filter(aluno__nome__icontains=busca_aluno)
+        justificativas = justificativas.filter(
+            aluno__in=filtrar_por_busca(Aluno.objects.values('id'), busca_aluno)
+        )
 
     if request.method == 'POST':
         justificativa_id = request.POST.get('justificativa_id')
@@ -1433,14 +1375,10 @@ def secretaria_justificativas(request):
 
 @login_required
 def dashboard_coordenacao(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
-    total_alunos = Aluno.objects.count()
-    total_professores = Professor.objects.count()
-    total_turmas = Turma.objects.count()
-    
     turmas = Turma.objects.annotate(
         total_alunos=Count('alunos_turma')
     ).order_by('-total_alunos')[:5]
@@ -1448,9 +1386,7 @@ def dashboard_coordenacao(request):
     avisos_recentes = Aviso.objects.order_by('-data_criacao')[:5]
     
     context = {
-        'total_alunos': total_alunos,
-        'total_professores': total_professores,
-        'total_turmas': total_turmas,
+        **obter_contadores('total_alunos', 'total_professores', 'total_turmas'),
         'turmas': turmas,
         'avisos': avisos_recentes
     }
@@ -1459,7 +1395,7 @@ def dashboard_coordenacao(request):
 
 @login_required
 def coordenacao_turmas(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     turmas = Turma.objects.annotate(total_alunos=Count('alunos_turma')).order_by('codigo')
@@ -1474,22 +1410,24 @@ def coordenacao_turmas(request):
 
 @login_required
 def coordenacao_alunos(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
-    alunos = Aluno.objects.all().order_by('nome')
-    turmas = Turma.objects.all()
+    alunos = Aluno.objects.select_related('turma_atual')
+    turmas = Turma.objects.order_by('codigo')
     
     busca = request.GET.get('busca', '')
     turma_filtro = request.GET.get('turma', '')
     
     if busca:
-        alunos = alunos.filter(Q(nome__icontains=busca) | Q(matricula__icontains=busca))
-    if turma_filtro:
+        alunos = filtrar_por_busca(alunos, busca)
+    if turma_filtro.isdigit():
         alunos = alunos.filter(turma_atual_id=turma_filtro)
+    pagina = paginar_por_chave(alunos, request.GET)
     
     context = {
-        'alunos': alunos,
+        'alunos': pagina,
+        'pagina': pagina,
         'turmas': turmas,
         'busca': busca,
         'turma_filtro': turma_filtro
@@ -1499,19 +1437,29 @@ def coordenacao_alunos(request):
 
 @login_required
 def coordenacao_professores(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
-    professores = Professor.objects.all().order_by('nome')
-    return render(request, 'escola/coor_professores.html', {'professores': professores})
+    professores = Professor.objects.select_related('user')
+    
+    busca = request.GET.get('busca', '')
+    if busca:
+        professores = filtrar_por_busca(professores, busca)
+    pagina = paginar_por_chave(professores, request.GET)
+    
+    return render(request, 'escola/coor_professores.html', {
+        'professores': pagina,
+        'pagina': pagina,
+        'busca': busca,
+    })
 
 
 @login_required
 def coordenacao_relatorios(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
-    turmas = Turma.objects.annotate(
+    turmas = Turma.objects.select_related('curso').annotate(
         total_alunos=Count('alunos_turma')
     ).order_by('-total_alunos')
     
@@ -1523,63 +1471,38 @@ def coordenacao_relatorios(request):
     
     if turma_id:
         try:
-            turma_selecionada = Turma.objects.annotate(
+            turma_selecionada = Turma.objects.select_related('curso').annotate(
                 total_alunos=Count('alunos_turma')
             ).get(id=turma_id)
             
-            alunos_turma = Aluno.objects.filter(turma_atual=turma_selecionada).order_by('nome')
-            
             alunos_com_media = []
-            total_media = Decimal('0')
-            total_frequencia = 0
-            count_alunos = 0
-            count_freq = 0
+            medias = []
+            frequencias = []
             
-            for aluno in alunos_turma:
-                notas = Nota.objects.filter(matricula__aluno=aluno)
-                if notas.exists():
-                    media = notas.aggregate(avg=Avg('valor'))['avg']
-                    media = round(float(media), 1) if media else 0
-                else:
-                    media = 0
-                
-                frequencias = Frequencia.objects.filter(matricula__aluno=aluno)
-                total_aulas = frequencias.count()
-                presencas = frequencias.filter(presente=True).count()
-                freq_percent = int((presencas / total_aulas) * 100) if total_aulas > 0 else 100
+            for aluno in alunos_com_indicadores(turma_selecionada):
+                media = aluno.resumo.media
                 
                 alunos_com_media.append({
                     'aluno': aluno,
                     'media': media,
-                    'frequencia': freq_percent,
+                    'frequencia': aluno.resumo.percentual_frequencia,
                     'status': 'Aprovado' if media >= 6 else ('Recuperação' if media > 0 else 'Cursando')
                 })
                 
                 if media > 0:
-                    total_media += Decimal(str(media))
-                    count_alunos += 1
-                if total_aulas > 0:
-                    total_frequencia += freq_percent
-                    count_freq += 1
+                    medias.append(Decimal(str(media)))
+                if aluno.resumo.total_aulas > 0:
+                    frequencias.append(aluno.resumo.percentual_frequencia)
             
             alunos_turma = alunos_com_media
-            media_turma = round(float(total_media / count_alunos), 1) if count_alunos > 0 else None
-            frequencia_turma = int(total_frequencia / count_freq) if count_freq > 0 else None
+            media_turma = round(float(sum(medias) / len(medias)), 1) if medias else None
+            frequencia_turma = int(sum(frequencias) / len(frequencias)) if frequencias else None
             
         except Turma.DoesNotExist:
             pass
     
     total_alunos = Aluno.objects.count()
-    
-    all_notas = Nota.objects.all()
-    media_geral = None
-    if all_notas.exists():
-        avg = all_notas.aggregate(avg=Avg('valor'))['avg']
-        media_geral = round(float(avg), 1) if avg else None
-    
-    total_freq = Frequencia.objects.count()
-    presencas_total = Frequencia.objects.filter(presente=True).count()
-    frequencia_media = int((presencas_total / total_freq) * 100) if total_freq > 0 else None
+    indicadores = indicadores_gerais()
     
     context = {
         'turmas': turmas,
@@ -1588,31 +1511,28 @@ def coordenacao_relatorios(request):
         'alunos_turma': alunos_turma,
         'media_turma': media_turma,
         'frequencia_turma': frequencia_turma,
-        'media_geral': media_geral,
-        'frequencia_media': frequencia_media,
+        'media_geral': indicadores['media_geral'],
+        'frequencia_media': indicadores['frequencia_media'],
     }
     return render(request, 'escola/coor_relatorios.html', context)
 
 
 @login_required
 def coordenacao_calendario(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     eventos = Evento.objects.select_related('turma').order_by('-data')
-    eventos_query = Evento.objects.all().values('titulo', 'data', 'tipo', 'turma__codigo')
-    eventos_json = json.dumps(list(eventos_query), cls=DjangoJSONEncoder)
     
     context = {
         'eventos': eventos,
-        'eventos_json': eventos_json,
     }
     return render(request, 'escola/coor_calendario.html', context)
 
 
 @login_required
 def coordenacao_horarios(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     turmas = Turma.objects.all().order_by('codigo')
@@ -1621,21 +1541,13 @@ def coordenacao_horarios(request):
     turma_selecionada = None
     horarios = []
     
-    dias = ['SEG', 'TER', 'QUA', 'QUI', 'SEX']
-    horarios_padrao = ['07:00', '07:50', '08:40', '09:30', '09:50', '10:40', '11:30']
+    dias = DIAS_GRADE
+    horarios_padrao = HORARIOS_PADRAO
     
     if turma_id:
         try:
             turma_selecionada = Turma.objects.get(id=turma_id)
-            aulas = HorarioAula.objects.filter(turma=turma_selecionada).select_related('disciplina')
-            
-            for hora in horarios_padrao:
-                linha = {'hora': hora, 'aulas': {}}
-                for dia in dias:
-                    aula = aulas.filter(dia_semana=dia, hora_inicio__hour=int(hora.split(':')[0]), 
-                                       hora_inicio__minute=int(hora.split(':')[1])).first()
-                    linha['aulas'][dia] = aula
-                horarios.append(linha)
+            horarios = linhas_da_grade(grade_da_turma(turma_selecionada.id))
         except Turma.DoesNotExist:
             pass
     
@@ -1686,7 +1598,7 @@ def coordenacao_horarios(request):
 
 @login_required
 def coordenacao_cursos(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     cursos = Curso.objects.annotate(
@@ -1702,7 +1614,7 @@ def coordenacao_cursos(request):
 
 @login_required
 def coordenacao_curso_adicionar(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     if request.method == 'POST':
@@ -1730,7 +1642,7 @@ def coordenacao_curso_adicionar(request):
 
 @login_required
 def coordenacao_curso_editar(request, curso_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     curso = get_object_or_404(Curso, id=curso_id)
@@ -1754,7 +1666,7 @@ def coordenacao_curso_editar(request, curso_id):
 
 @login_required
 def coordenacao_curso_excluir(request, curso_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     curso = get_object_or_404(Curso, id=curso_id)
@@ -1772,7 +1684,7 @@ def coordenacao_curso_excluir(request, curso_id):
 
 @login_required
 def coordenacao_professor_senha(request, professor_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -1808,7 +1720,7 @@ def coordenacao_professor_senha(request, professor_id):
 
 @login_required
 def coordenacao_comunicados(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     avisos = Aviso.objects.filter(ativo=True).order_by('-data_criacao')
@@ -1873,7 +1785,7 @@ def coordenacao_comunicados(request):
 
 @login_required
 def coordenacao_configuracoes(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         return redirect('home')
     
     user = request.user
@@ -1916,15 +1828,14 @@ def coordenacao_configuracoes(request):
 
 @login_required
 def dashboard_professor(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
-    professor = None
+    professor = request.perfil.professor
     turmas = []
     
-    if hasattr(request.user, 'perfil_professor'):
-        professor = request.user.perfil_professor
+    if professor:
         turmas = professor.turmas.annotate(total_alunos=Count('alunos_turma'))
     
     avisos = Aviso.objects.filter(
@@ -1943,10 +1854,10 @@ def dashboard_professor(request):
 
 @login_required
 def professor_notas(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
+    professor = request.perfil.professor
     
     if professor:
         turmas = professor.turmas.all()
@@ -1959,6 +1870,7 @@ def professor_notas(request):
     disciplina_id = request.GET.get('disciplina')
     
     alunos = []
+    tipos_avaliacao = []
     turma_selecionada = None
     disciplina_selecionada = None
     
@@ -1970,33 +1882,65 @@ def professor_notas(request):
             if disciplina_id:
                 disciplina_selecionada = disciplinas.filter(id=disciplina_id).first()
                 if disciplina_selecionada:
-                    for aluno in alunos:
-                        matricula = Matricula.objects.filter(aluno=aluno, turma=turma_selecionada).first()
-                        if matricula:
-                            notas = Nota.objects.filter(matricula=matricula, disciplina=disciplina_selecionada)
-                            aluno.notas_disciplina = list(notas)
-                            if notas:
-                                aluno.media = sum([float(n.valor) for n in notas]) / len(notas)
-                            else:
-                                aluno.media = 0
+                    diario = montar_diario_notas(turma_selecionada, disciplina_selecionada)
+                    alunos = diario['alunos']
+                    tipos_avaliacao = diario['tipos']
     
     context = {
         'turmas': turmas,
         'disciplinas': disciplinas,
         'alunos': alunos,
+        'tipos_avaliacao': tipos_avaliacao,
         'turma_selecionada': turma_selecionada,
         'disciplina_selecionada': disciplina_selecionada
     }
     return render(request, 'escola/professor_notas.html', context)
 
 
+@login_required
+def professor_notas_json(request):
+    if not check_professor_permission(request):
+        return JsonResponse({'error': 'Não autorizado'}, status=403)
+    
+    professor = request.perfil.professor
+    if not professor:
+        return JsonResponse({'error': 'Perfil de professor não encontrado.'}, status=404)
+    
+    turma_id = request.GET.get('turma', '')
+    disciplina_id = request.GET.get('disciplina', '')
+    if not turma_id.isdigit() or not disciplina_id.isdigit():
+        return JsonResponse({'error': 'Informe a turma e a disciplina.'}, status=400)
+    
+    turma = professor.turmas.filter(id=turma_id).first()
+    disciplina = professor.disciplinas.filter(id=disciplina_id).first()
+    if not turma or not disciplina:
+        return JsonResponse({'error': 'Turma ou disciplina não encontrada.'}, status=404)
+    
+    diario = montar_diario_notas(turma, disciplina)
+    return JsonResponse({
+        'turma': {'id': turma.id, 'codigo': turma.codigo},
+        'disciplina': {'id': disciplina.id, 'nome': disciplina.nome},
+        'tipos': diario['tipos'],
+        'alunos': [
+            {
+                'id': aluno.id,
+                'nome': aluno.nome,
+                'matricula': aluno.matricula,
+                'notas': aluno.notas_disciplina,
+                'media': round(aluno.media, 1),
+            }
+            for aluno in diario['alunos']
+        ],
+    })
+
+
 @login_required
 def professor_salvar_notas(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return JsonResponse({'error': 'Não autorizado'}, status=403)
     
     if request.method == 'POST':
-        professor = getattr(request.user, 'perfil_professor', None)
+        professor = request.perfil.professor
         if not professor:
             messages.error(request, 'Perfil de professor não encontrado.')
             return redirect('professor_notas')
@@ -2012,51 +1956,15 @@ def professor_salvar_notas(request):
             messages.error(request, 'Você não tem permissão para acessar esta turma ou disciplina.')
             return redirect('professor_notas')
         
-        notas_salvas = 0
-        notas_atualizadas = 0
-        notas_invalidas = 0
-        notas_vazias = 0
-        
-        for key, value in request.POST.items():
-            if key.startswith('nota_'):
-                aluno_id = key.replace('nota_', '')
-                try:
-                    if not value or not value.strip():
-                        notas_vazias += 1
-                        continue
-                    
-                    nota_valor = Decimal(value.strip().replace(',', '.'))
-                    if nota_valor < 0 or nota_valor > 10:
-                        notas_invalidas += 1
-                        continue
-                    
-                    aluno = Aluno.objects.get(id=aluno_id)
-                    matricula = Matricula.objects.filter(aluno=aluno, turma=turma).first()
-                    
-                    if not matricula:
-                        if aluno.turma_atual == turma:
-                            matricula = Matricula.objects.create(
-                                aluno=aluno,
-                                turma=turma,
-                                status='Ativo'
-                            )
-                        else:
-                            notas_invalidas += 1
-                            continue
-                    
-                    nota, created = Nota.objects.update_or_create(
-                        matricula=matricula,
-                        disciplina=disciplina,
-                        tipo_avaliacao=tipo_avaliacao,
-                        defaults={'valor': nota_valor}
-                    )
-                    if created:
-                        notas_salvas += 1
-                    else:
-                        notas_atualizadas += 1
-                except (Aluno.DoesNotExist, ValueError, InvalidOperation):
-                    notas_invalidas += 1
-                    continue
+        valores = {
+            key.replace('nota_', ''): value
+            for key, value in request.POST.items()
+            if key.startswith('nota_')
+        }
+        resultado = lancar_notas(turma, disciplina, tipo_avaliacao, valores)
+        notas_salvas = resultado['salvas']
+        notas_atualizadas = resultado['atualizadas']
+        notas_invalidas = resultado['invalidas']
         
         if notas_salvas > 0 or notas_atualizadas > 0:
             msg = f'Notas processadas: {notas_salvas} novas, {notas_atualizadas} atualizadas.'
@@ -2074,10 +1982,10 @@ def professor_salvar_notas(request):
 
 @login_required
 def professor_frequencia(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
+    professor = request.perfil.professor
     
     if professor:
         turmas = professor.turmas.all()
@@ -2115,11 +2023,11 @@ def professor_frequencia(request):
 
 @login_required
 def professor_salvar_frequencia(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return JsonResponse({'error': 'Não autorizado'}, status=403)
     
     if request.method == 'POST':
-        professor = getattr(request.user, 'perfil_professor', None)
+        professor = request.perfil.professor
         if not professor:
             messages.error(request, 'Perfil de professor não encontrado.')
             return redirect('professor_frequencia')
@@ -2135,30 +2043,14 @@ def professor_salvar_frequencia(request):
             messages.error(request, 'Você não tem permissão para acessar esta turma ou disciplina.')
             return redirect('professor_frequencia')
         
-        alunos = Aluno.objects.filter(turma_atual=turma)
-        frequencias_salvas = 0
+        presentes = {
+            int(key.replace('presente_', ''))
+            for key, value in request.POST.items()
+            if key.startswith('presente_') and value == 'on' and key.replace('presente_', '').isdigit()
+        }
+        frequencias_salvas = lancar_frequencia(turma, disciplina, data_aula, presentes)
         alunos_sem_matricula = 0
         
-        for aluno in alunos:
-            matricula = Matricula.objects.filter(aluno=aluno, turma=turma).first()
-            
-            if not matricula:
-                matricula = Matricula.objects.create(
-                    aluno=aluno,
-                    turma=turma,
-                    status='Ativo'
-                )
-            
-            presente = request.POST.get(f'presente_{aluno.id}') == 'on'
-            
-            Frequencia.objects.update_or_create(
-                matricula=matricula,
-                disciplina=disciplina,
-                data_aula=data_aula,
-                defaults={'presente': presente}
-            )
-            frequencias_salvas += 1
-        
         msg = f'Frequência salva com sucesso! ({frequencias_salvas} alunos)'
         if alunos_sem_matricula > 0:
             msg += f' - {alunos_sem_matricula} aluno(s) sem matrícula foram ignorados.'
@@ -2170,10 +2062,10 @@ def professor_salvar_frequencia(request):
 
 @login_required
 def professor_materiais(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
+    professor = request.perfil.professor
     
     if professor:
         disciplinas = professor.disciplinas.all()
@@ -2235,12 +2127,28 @@ def professor_materiais(request):
     return render(request, 'escola/professor_materiais.html', context)
 
 
+@login_required
+def professor_horario(request):
+    if not check_professor_permission(request):
+        return redirect('home')
+    
+    professor = request.perfil.professor
+    grade = grade_do_professor(professor) if professor else {}
+    
+    context = {
+        'professor': professor,
+        'horarios': linhas_da_grade(grade) if grade else [],
+        'dias': DIAS_GRADE,
+    }
+    return render(request, 'escola/professor_horario.html', context)
+
+
 @login_required
 def professor_calendario(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
+    professor = request.perfil.professor
     
     if professor:
         turmas = professor.turmas.all()
@@ -2286,13 +2194,9 @@ def professor_calendario(request):
                 messages.error(request, 'Evento não encontrado.')
             return redirect('professor_calendario')
     
-    eventos_query = Evento.objects.all().values('id', 'titulo', 'data', 'tipo', 'turma__codigo', 'descricao')
-    eventos_json = json.dumps(list(eventos_query), cls=DjangoJSONEncoder)
-    
     context = {
         'professor': professor,
         'eventos': eventos,
-        'eventos_json': eventos_json,
         'turmas': turmas,
         'tipos': Evento.TIPO_CHOICES,
     }
@@ -2301,14 +2205,14 @@ def professor_calendario(request):
 
 @login_required
 def professor_comunicados(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
-    turmas = Turma.objects.all()
+    professor = request.perfil.professor
+    turmas = Turma.objects.select_related('curso')
     
-    avisos = Aviso.objects.filter(ativo=True).order_by('-data_criacao')
-    meus_avisos = Aviso.objects.filter(autor=request.user, ativo=True).order_by('-data_criacao')
+    avisos = Aviso.objects.filter(ativo=True).select_related('turma', 'autor').order_by('-data_criacao')
+    meus_avisos = Aviso.objects.filter(autor=request.user, ativo=True).select_related('turma').order_by('-data_criacao')
     
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -2355,10 +2259,10 @@ def professor_comunicados(request):
 
 @login_required
 def professor_configuracoes(request):
-    if not check_professor_permission(request.user):
+    if not check_professor_permission(request):
         return redirect('home')
     
-    professor = getattr(request.user, 'perfil_professor', None)
+    professor = request.perfil.professor
     user = request.user
     
     if request.method == 'POST':
@@ -2414,7 +2318,7 @@ def professor_configuracoes(request):
 
 @login_required
 def secretaria_aluno_adicionar(request):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2490,9 +2394,35 @@ def secretaria_aluno_adicionar(request):
     return render(request, 'escola/secre_aluno_form.html', {'turmas': turmas, 'acao': 'Adicionar'})
 
 
+def _importar_alunos(request, template):
+    """Guarda a planilha enviada e enfileira a importação, acompanhada na página da tarefa."""
+    if request.method == 'POST':
+        arquivo = request.FILES.get('arquivo')
+        extensao = arquivo.name.rsplit('.', 1)[-1].lower() if arquivo else ''
+        if not arquivo:
+            messages.error(request, 'Selecione um arquivo .csv ou .xlsx.')
+        elif extensao not in ('csv', 'xlsx'):
+            messages.error(request, 'Envie um arquivo .csv ou .xlsx.')
+        else:
+            caminho = default_storage.save(f'importacoes/{uuid.uuid4().hex}.{extensao}', arquivo)
+            tarefa = enfileirar('importar_alunos', {
+                'caminho': caminho, 'planilha': arquivo.name, 'nome_arquivo': 'linhas_nao_importadas.csv',
+            }, usuario=request.user)
+            return redirect('tarefa_detalhe', tarefa_id=tarefa.id)
+    return render(request, template)
+
+
+@login_required
+def secretaria_alunos_importar(request):
+    if not check_secretaria_permission(request):
+        messages.error(request, 'Acesso não autorizado.')
+        return redirect('home')
+    return _importar_alunos(request, 'escola/secre_alunos_importar.html')
+
+
 @login_required
 def secretaria_aluno_editar(request, aluno_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2590,7 +2520,7 @@ def secretaria_aluno_editar(request, aluno_id):
 
 @login_required
 def secretaria_aluno_excluir(request, aluno_id):
-    if not check_secretaria_permission(request.user):
+    if not check_secretaria_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2607,7 +2537,7 @@ def secretaria_aluno_excluir(request, aluno_id):
 
 @login_required
 def coordenacao_evento_adicionar(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2644,7 +2574,7 @@ def coordenacao_evento_adicionar(request):
 
 @login_required
 def coordenacao_evento_editar(request, evento_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2677,7 +2607,7 @@ def coordenacao_evento_editar(request, evento_id):
 
 @login_required
 def coordenacao_evento_excluir(request, evento_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2696,20 +2626,14 @@ def coordenacao_evento_excluir(request, evento_id):
 def download_material(request, material_id):
     material = get_object_or_404(Material, id=material_id, ativo=True)
     
-    user = request.user
-    is_professor = check_professor_permission(user)
-    is_secretaria = check_secretaria_permission(user)
-    is_coordenacao = check_coordenacao_permission(user)
-    
-    is_professor_owner = False
-    if is_professor and hasattr(user, 'perfil_professor'):
-        is_professor_owner = material.professor == user.perfil_professor
+    papel = request.nexus_role
+    is_professor_owner = papel.professor_id is not None and material.professor_id == papel.professor_id
     
     is_aluno_turma = False
-    if hasattr(user, 'perfil_aluno') and material.turma:
-        is_aluno_turma = user.perfil_aluno.turma_atual == material.turma
+    if papel.aluno and material.turma_id:
+        is_aluno_turma = Aluno.objects.filter(id=papel.aluno_id, turma_atual_id=material.turma_id).exists()
     
-    if not (is_professor_owner or is_secretaria or is_coordenacao or is_aluno_turma or user.is_superuser):
+    if not (is_professor_owner or papel.secretaria or papel.coordenacao or is_aluno_turma or papel.admin):
         messages.error(request, 'Você não tem permissão para acessar este material.')
         return redirect('home')
     
@@ -2724,7 +2648,7 @@ def download_material(request, material_id):
 
 @login_required
 def coordenacao_turma_adicionar(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2772,7 +2696,7 @@ def coordenacao_turma_adicionar(request):
 
 @login_required
 def coordenacao_turma_editar(request, turma_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2819,7 +2743,7 @@ def coordenacao_turma_editar(request, turma_id):
 
 @login_required
 def coordenacao_turma_excluir(request, turma_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2836,7 +2760,7 @@ def coordenacao_turma_excluir(request, turma_id):
 
 @login_required
 def coordenacao_aluno_adicionar(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -2926,9 +2850,17 @@ def coordenacao_aluno_adicionar(request):
     return render(request, 'escola/coor_aluno_form.html', {'turmas': turmas, 'acao': 'Adicionar'})
 
 
+@login_required
+def coordenacao_alunos_importar(request):
+    if not check_coordenacao_permission(request):
+        messages.error(request, 'Acesso não autorizado.')
+        return redirect('home')
+    return _importar_alunos(request, 'escola/coor_alunos_importar.html')
+
+
 @login_required
 def coordenacao_aluno_editar(request, aluno_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -3038,7 +2970,7 @@ def coordenacao_aluno_editar(request, aluno_id):
 
 @login_required
 def coordenacao_aluno_excluir(request, aluno_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -3055,7 +2987,7 @@ def coordenacao_aluno_excluir(request, aluno_id):
 
 @login_required
 def coordenacao_professor_adicionar(request):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -3121,7 +3053,7 @@ def coordenacao_professor_adicionar(request):
 
 @login_required
 def coordenacao_professor_editar(request, professor_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -3152,7 +3084,7 @@ def coordenacao_professor_editar(request, professor_id):
 
 @login_required
 def coordenacao_professor_excluir(request, professor_id):
-    if not check_coordenacao_permission(request.user):
+    if not check_coordenacao_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
@@ -3170,37 +3102,26 @@ def coordenacao_professor_excluir(request, professor_id):
 # ADMIN CUSTOM VIEWS
 # ==========================================
 
-def check_admin_permission(user):
-    return user.is_superuser
+def check_admin_permission(request):
+    return request.nexus_role.admin
 
 
 @login_required
 def dashboard_admin(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
-    from django.contrib.auth.models import User
-    
-    total_alunos = Aluno.objects.count()
-    total_professores = Professor.objects.count()
-    total_turmas = Turma.objects.count()
-    total_cursos = Curso.objects.count()
-    total_usuarios = User.objects.count()
-    documentos_pendentes = Documento.objects.filter(status='PENDENTE').count()
-    
-    ultimos_alunos = Aluno.objects.order_by('-id')[:5]
+    ultimos_alunos = Aluno.objects.select_related('turma_atual').order_by('-id')[:5]
     ultimos_avisos = Aviso.objects.order_by('-data_criacao')[:5]
     proximos_eventos = Evento.objects.filter(data__gte=timezone.now().date()).order_by('data')[:5]
-    documentos_recentes = Documento.objects.filter(status='PENDENTE').order_by('-data_solicitacao')[:5]
+    documentos_recentes = Documento.objects.filter(status='PENDENTE').select_related('aluno').order_by('-data_solicitacao')[:5]
     
     context = {
-        'total_alunos': total_alunos,
-        'total_professores': total_professores,
-        'total_turmas': total_turmas,
-        'total_cursos': total_cursos,
-        'total_usuarios': total_usuarios,
-        'documentos_pendentes': documentos_pendentes,
+        **obter_contadores(
+            'total_alunos', 'total_professores', 'total_turmas', 'total_cursos',
+            'total_usuarios', 'documentos_pendentes',
+        ),
         'ultimos_alunos': ultimos_alunos,
         'ultimos_avisos': ultimos_avisos,
         'proximos_eventos': proximos_eventos,
@@ -3212,15 +3133,22 @@ def dashboard_admin(request):
 
 @login_required
 def admin_usuarios(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         messages.error(request, 'Acesso não autorizado.')
         return redirect('home')
     
     from django.contrib.auth.models import User, Group
     
-    usuarios = User.objects.all().order_by('-date_joined')
+    usuarios = User.objects.prefetch_related('groups')
     grupos = Group.objects.all()
     
+    busca = request.GET.get('busca', '')
+    if busca:
+        usuarios = usuarios.filter(
+            Q(username__icontains=busca) | Q(email__icontains=busca)
+            | Q(first_name__icontains=busca) | Q(last_name__icontains=busca)
+        )
+    
     if request.method == 'POST':
         action = request.POST.get('action')
         
@@ -3277,23 +3205,28 @@ def admin_usuarios(request):
         
         return redirect('admin_usuarios')
     
+    # Mais recentes primeiro, como antes; o id acompanha a data de cadastro.
+    pagina = paginar_por_chave(usuarios, request.GET, ordenacao=('-id',))
+    
     return render(request, 'escola/admin_usuarios.html', {
-        'usuarios': usuarios,
+        'usuarios': pagina,
+        'pagina': pagina,
         'grupos': grupos,
+        'busca': busca,
     })
 
 
 @login_required
 def admin_alunos(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
-    alunos = Aluno.objects.all().order_by('nome')
-    turmas = Turma.objects.all()
+    alunos = Aluno.objects.select_related('turma_atual', 'user')
+    turmas = Turma.objects.select_related('curso').order_by('codigo')
     
     busca = request.GET.get('busca', '')
     if busca:
-        alunos = alunos.filter(Q(nome__icontains=busca) | Q(matricula__icontains=busca))
+        alunos = filtrar_por_busca(alunos, busca)
     
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -3360,8 +3293,11 @@ def admin_alunos(request):
         
         return redirect('admin_alunos')
     
+    pagina = paginar_por_chave(alunos, request.GET)
+    
     return render(request, 'escola/admin_alunos.html', {
-        'alunos': alunos,
+        'alunos': pagina,
+        'pagina': pagina,
         'turmas': turmas,
         'busca': busca,
     })
@@ -3369,7 +3305,7 @@ def admin_alunos(request):
 
 @login_required
 def admin_professores(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     professores = Professor.objects.all().order_by('nome')
@@ -3443,7 +3379,7 @@ def admin_professores(request):
 
 @login_required
 def admin_turmas(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     turmas = Turma.objects.annotate(total_alunos=Count('alunos_turma')).order_by('codigo')
@@ -3505,7 +3441,7 @@ def admin_turmas(request):
 
 @login_required
 def admin_cursos(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     cursos = Curso.objects.annotate(
@@ -3595,7 +3531,7 @@ def admin_cursos(request):
 
 @login_required
 def admin_avisos(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     avisos = Aviso.objects.all().order_by('-data_criacao')
@@ -3635,7 +3571,7 @@ def admin_avisos(request):
 
 @login_required
 def admin_eventos(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     eventos = Evento.objects.all().order_by('-data')
@@ -3677,7 +3613,7 @@ def admin_eventos(request):
 
 @login_required
 def admin_configuracoes(request):
-    if not check_admin_permission(request.user):
+    if not check_admin_permission(request):
         return redirect('home')
     
     user = request.user
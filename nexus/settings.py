@@ -61,6 +61,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'escola.middleware.PapelMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -158,6 +159,9 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Tamanho máximo (bytes) da pasta de PDFs gerados em MEDIA_ROOT/pdfs_gerados
+PDFS_GERADOS_TAMANHO_MAXIMO = int(os.environ.get('PDFS_GERADOS_TAMANHO_MAXIMO', 256 * 1024 * 1024))
+
 # CSRF Settings for proxy environments
 CSRF_TRUSTED_ORIGINS = [
     'https://*.replit.dev',